@@ -21,9 +21,6 @@ from rest_framework.serializers import ListSerializer, ModelSerializer
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
-from traceback_with_variables import format_exc
-from crispy_forms.helper import FormHelper
-from crispy_forms.layout import Submit, ButtonHolder, Layout
 from django.utils.translation import gettext as _
 from rest_framework.routers import SimpleRouter
 from django.urls import reverse
@@ -32,6 +29,13 @@ from django.forms import modelform_factory
 logger = logging.getLogger()
 
 
+def format_exc(e):
+    # Only needed on errors, so traceback_with_variables is imported lazily
+    from traceback_with_variables import format_exc
+
+    return format_exc(e)
+
+
 class CustomForm(Form):
     def __init__(
         self,
@@ -472,6 +476,10 @@ class CustomGenericDashboardViewSet(GenericViewSet):
         return form
 
     def add_crispy_helper(self, form):
+        # Dashboard only: keep crispy_forms off the API import path
+        from crispy_forms.helper import FormHelper
+        from crispy_forms.layout import ButtonHolder, Submit
+
         if not getattr(form, 'helper', None):
             form.helper = FormHelper()
             form.helper.layout = form.helper.build_default_layout(form)
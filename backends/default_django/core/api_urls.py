@@ -2,9 +2,12 @@ from django.urls import path
 
 from rest_framework.routers import DefaultRouter
 from .api_views import (AuthenticateApiView, ModeApiView, PollOfficeViewSet,
-                        VoteApiView, VotingPaperResultView,
-                        CandidatePartyViewSet, PollOfficeStatsView,
-                        PollOfficeResultsView, RefreshS3CredentialsView)
+                        PollOfficeBundleView,
+                        VoteApiView, VoteBatchApiView, VotingPaperResultView,
+                        CandidatePartyViewSet, PollOfficeStatsView, PollOfficeStatsBulkView,
+                        PollOfficeResultsView, RefreshS3CredentialsView,
+                        AreaStatsView, AreaResultsView, TurnoutView, TurnoutSeriesView,
+                        LiveFeedView)
 
 router = DefaultRouter()
 
@@ -14,11 +17,19 @@ router.register("candidateparties", CandidatePartyViewSet, basename="candidatepa
 urlpatterns = router.urls
 
 urlpatterns += [
+    path("polloffices/bundle/", PollOfficeBundleView.as_view(), name="poll-offices-bundle"),
     path("authenticate/", AuthenticateApiView.as_view(), name="authenticate"),
     path("mode/", ModeApiView.as_view(), name="work-mode"),
     path("vote/", VoteApiView.as_view(), name="vote"),
+    path("vote/batch/", VoteBatchApiView.as_view(), name="vote-batch"),
     path("votingpaperresult/", VotingPaperResultView.as_view(), name="voting-paper-result"),
     path("pollofficestats/", PollOfficeStatsView.as_view(), name="poll-office-stats"),
+    path("pollofficestats/bulk/", PollOfficeStatsBulkView.as_view(), name="poll-office-stats-bulk"),
     path("pollofficeresults/", PollOfficeResultsView.as_view(), name="poll-office-results"),
+    path("areastats/", AreaStatsView.as_view(), name="area-stats"),
+    path("arearesults/", AreaResultsView.as_view(), name="area-results"),
+    path("turnout/", TurnoutView.as_view(), name="turnout"),
+    path("turnout/series/", TurnoutSeriesView.as_view(), name="turnout-series"),
+    path("live/", LiveFeedView.as_view(), name="live-feed"),
     path('refresh-s3-credentials/', RefreshS3CredentialsView.as_view(), name='refresh-s3-credentials'),
 ]
@@ -1,23 +1,40 @@
+import asyncio
+import gzip
+import hashlib
 import json
 import os
 import secrets
 from datetime import timedelta
 from traceback import format_exc
+from typing import Optional
 
-import boto3
 from common_bases.custom_viewsets import CustomGenericViewSet
 from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models.aggregates import Count
 from django.db.models.query_utils import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .authentication import CachedSourceToken
 from .enums import Age, Gender, SourceType
 from .filters import PollOfficeFilterSet
 from .gen.api_views import (
@@ -33,7 +50,12 @@ from .gen.api_views import (
     GeneratedVotingPaperResultProposedViewSet,
     GeneratedVotingPaperResultViewSet,
 )
+from .live import GLOBAL, live_broker, office_key
 from .models import (
+    Area,
+    AreaCounters,
+    AreaCoverage,
+    AreaResult,
     CandidateParty,
     PollOffice,
     Source,
@@ -45,39 +67,226 @@ from .models import (
     VotingPaperResult,
     VotingPaperResultProposed,
 )
+from .pagination import KeysetPagination
 from .serializers import (
+    AreaResultsListSerializer,
+    AreaStatsListSerializer,
+    AreaTurnoutListSerializer,
     AuthenticationInputSerializer,
     AuthenticationResponseSerializer,
     CandidatePartySerializer,
+    PollOfficeCompactSerializer,
     PollOfficeResultSerializer,
     PollOfficeSerializer,
+    PollOfficeStatsBulkSerializer,
     PollOfficeStatsSerializer,
+    PollOfficeTurnoutSerializer,
     VoteAcceptedSerializer,
+    VoteBatchInputSerializer,
+    VoteBatchResponseSerializer,
     VoteInputSerializer,
     VoteProposedSerializer,
     VoteResponseSerializer,
+    VoteSeriesSerializer,
     VotingPaperResultInputSerializer,
     VotingPaperResultResponseSerializer,
     VotingPaperResultSerializer,
 )
-from .utils import issue_scoped_creds
+from .text import normalize_text
+from .utils import (
+    POLL_OFFICE_BUNDLE_FORMATS,
+    get_cached_results,
+    get_cached_stats,
+    get_global_counters,
+    get_last_accepted,
+    get_poll_office_counters,
+    get_poll_office_bundle,
+    get_poll_offices_stats,
+    get_versions,
+    get_vote_series,
+    issue_scoped_creds,
+    last_accepted_key,
+    results_scopes,
+    series_scope,
+    stats_scopes,
+)
 import logging
 
 logger = logging.getLogger('api')
 
 
+def _validators(request, tag, modified):
+    """(ETag, Last-Modified timestamp) of the response to request for the
+    data version tag, see core.utils.get_versions."""
+    if tag is None:
+        return None, None
+    digest = hashlib.sha1(f"{request.get_full_path()}|{tag}".encode()).hexdigest()
+    return quote_etag(digest), int(modified) if modified else None
+
+
+def _not_modified(request, etag, last_modified):
+    """304 response when the client already has this version, else None."""
+    if etag is None:
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    return _set_validators(response, etag, last_modified) if response else None
+
+
+def _set_validators(response, etag, last_modified):
+    if etag is not None:
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        # Revalidate on every poll instead of guessing a freshness lifetime
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _poll_office_pk(poll_office_id: str):
+    """pk of the poll office given by id or identifier, None when unknown."""
+    if poll_office_id.isnumeric():
+        return int(poll_office_id)
+    return (
+        PollOffice.objects.cache()
+        .filter(identifier=poll_office_id)
+        .values_list("pk", flat=True)
+        .first()
+    )
+
+
+class ConditionalListMixin:
+    """Answer list requests with 304 while version_scopes keep their version."""
+
+    version_scopes = []
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = _validators(request, *get_versions(self.version_scopes))
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return _set_validators(response, etag, last_modified)
+
+
 class SourceViewSet(GeneratedSourceViewSet):
 
     pass
 
 
-class PollOfficeViewSet(ListModelMixin, CustomGenericViewSet):
+class PollOfficeViewSet(ConditionalListMixin, ListModelMixin, CustomGenericViewSet):
+    """Poll offices in id order.
 
-    queryset = PollOffice.objects.all()
+    ?after={id} pages on the id and ?count=false skips the count (see
+    KeysetPagination); ?fields=compact only returns id, identifier, name
+    and city.
+    """
+
+    queryset = PollOffice.objects.order_by("pk")
     serializer_class = PollOfficeSerializer
+    pagination_class = KeysetPagination
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend]
     filterset_class = PollOfficeFilterSet
+    version_scopes = ["polloffices"]
+
+    def is_compact(self) -> bool:
+        return self.request.query_params.get("fields") == "compact"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_compact():
+            queryset = queryset.only(*PollOfficeCompactSerializer.Meta.fields)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return PollOfficeCompactSerializer
+        return super().get_serializer_class()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("fields", type=str, required=False, enum=["compact"])
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", type=str, required=True),
+            OpenApiParameter("limit", type=int, required=False),
+        ],
+        responses={200: PollOfficeCompactSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def search(self, request, *args, **kwargs):
+        """Offices whose identifier, name or city contain or look like ?q=,
+        best matches first, at most POLL_OFFICE_SEARCH_LIMIT of them.
+
+        Accents and case are ignored. Both tests use the trigram index on
+        PollOffice.search_text, so the cost does not grow with the table.
+        """
+        term = normalize_text(request.query_params.get("q"))
+        max_limit = settings.POLL_OFFICE_SEARCH_LIMIT
+        limit = request.query_params.get("limit", "")
+        limit = min(int(limit), max_limit) if limit.isnumeric() and int(limit) else max_limit
+        if not term:
+            return Response({"results": []})
+
+        offices = (
+            self.filter_queryset(PollOffice.objects.all())
+            .annotate(similarity=TrigramWordSimilarity(term, "search_text"))
+            .filter(
+                Q(search_text__contains=term) | Q(search_text__trigram_word_similar=term)
+            )
+            .order_by("-similarity", "pk")
+            .only(*PollOfficeCompactSerializer.Meta.fields)[:limit]
+        )
+        return Response(
+            {"results": PollOfficeCompactSerializer(offices, many=True).data}
+        )
+
+
+class PollOfficeBundleView(View):
+    """Every poll office in one gzip compressed body, for client bootstrap.
+
+    ?format=columns returns {columns, rows} instead of the list of offices
+    (see core.utils.build_poll_office_bundle). The body only changes with
+    the PollOffice rows and carries a strong ETag, so clients that have it
+    get a 304.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = request.GET.get("format", "json")
+        if form not in POLL_OFFICE_BUNDLE_FORMATS:
+            return JsonResponse(
+                {
+                    "message": "Invalid data",
+                    "code": "invalid_data",
+                    "errors": {
+                        "format": [f"Must be one of {', '.join(POLL_OFFICE_BUNDLE_FORMATS)}."]
+                    },
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        body, digest = get_poll_office_bundle(form)
+        gzipped = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        # One strong ETag per representation
+        etag = quote_etag(digest if gzipped else f"{digest}-identity")
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is None:
+            if gzipped:
+                response = HttpResponse(body, content_type="application/json")
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = HttpResponse(gzip.decompress(body), content_type="application/json")
+        else:
+            response = not_modified
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return _set_validators(response, etag, None)
 
 
 class VoteViewSet(GeneratedVoteViewSet):
@@ -105,11 +314,12 @@ class VoteAcceptedViewSet(GeneratedVoteAcceptedViewSet):
     pass
 
 
-class CandidatePartyViewSet(CustomGenericViewSet, ListModelMixin):
+class CandidatePartyViewSet(ConditionalListMixin, CustomGenericViewSet, ListModelMixin):
 
     serializer_class = CandidatePartySerializer
     permission_classes = [AllowAny]
     queryset = CandidateParty.objects.none()
+    version_scopes = ["candidateparties"]
 
     def get_queryset(self):
         return CandidateParty.objects.cache().exclude(identifier__startswith='**')
@@ -243,9 +453,9 @@ class AuthenticateApiView(APIView):
 class RefreshS3CredentialsView(APIView):
 
     def get(self, request, *args, **kwargs):
-        source_token: SourceToken = request.source_token
-        poll_office_id = source_token.poll_office.identifier
-        elector_id = source_token.source.elector_id
+        source_token: CachedSourceToken = request.source_token
+        poll_office_id = source_token.poll_office_identifier
+        elector_id = source_token.elector_id
         c = issue_scoped_creds(poll_office_id, elector_id)
 
         return Response({
@@ -291,6 +501,34 @@ class VoteApiView(APIView):
         )
 
 
+class VoteBatchApiView(APIView):
+
+    @extend_schema(
+        request=VoteBatchInputSerializer(),
+        responses=VoteBatchResponseSerializer(),
+    )
+    def post(self, request, *args, **kwargs):
+        # Phones flushing their backlog may send the bare list of ballots
+        data = request.data
+        if isinstance(data, list):
+            data = {"votes": data}
+
+        seria = VoteBatchInputSerializer(
+            data=data, context={"request": request}
+        )
+        if not seria.is_valid():
+            return Response(
+                {
+                    "message": "Invalid data",
+                    "code": "invalid_data",
+                    "errors": seria.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({"results": seria.save()})
+
+
 class VotingPaperResultView(APIView):
     @extend_schema(
         request=VotingPaperResultInputSerializer(),
@@ -324,57 +562,33 @@ class PollOfficeStatsView(APIView):
     def get(self, request, *args, **kwargs):
         qps = getattr(request, "query_params", request.GET)
         poll_office_id = qps.get("poll_office_id") or qps.get("poll_office")
-        if poll_office_id:
-            return self.handle_poll_office_stats(poll_office_id)
+        if not poll_office_id:
+            result, tag, modified = get_cached_stats(
+                "all", stats_scopes(None), self.handle_global_stats
+            )
         else:
-            return self.handle_global_stats()
+            pk = _poll_office_pk(poll_office_id)
+            if pk is None:
+                return Response(self.handle_poll_office_stats(poll_office_id))
+            result, tag, modified = get_cached_stats(
+                f"office:{pk}",
+                stats_scopes(pk),
+                lambda: self.handle_poll_office_stats(str(pk)),
+            )
+
+        etag, last_modified = _validators(request, tag, modified)
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        return _set_validators(Response(result), etag, last_modified)
 
     def handle_global_stats(self):
-        last_vote: Vote = (
-            Vote.objects.filter(voteaccepted__isnull=False)
-            .select_related("voteverified", "voteaccepted")
-            .prefetch_related("proposed_votes__source")
-            .last()
-        )
         result = {}
+        last_vote = get_last_accepted(last_accepted_key("vote"))
         if last_vote:
-            result["last_vote"] = {
-                "Accepted": VoteAcceptedSerializer(last_vote.voteaccepted).data
-            }
-            result["last_vote"]["Accepted"]["index"] = last_vote.id
+            result["last_vote"] = last_vote
 
-            try:
-                result["last_vote"]["Verified"] = VoteAcceptedSerializer(
-                    last_vote.voteverified
-                ).data
-                result["last_vote"]["Verified"]["index"] = last_vote.id
-            except VoteVerified.DoesNotExist:
-                result["last_vote"]["Verified"] = {}
-
-            for prop_vote in last_vote.proposed_votes.all():
-                prop_vote: VoteProposed
-                source_name = prop_vote.source.full_name
-                if not source_name:
-                    source_name = prop_vote.source.official_org
-                if not source_name:
-                    source_name = prop_vote.source.elector_id
-
-                result["last_vote"][source_name] = VoteProposedSerializer(
-                    prop_vote
-                ).data
-                result["last_vote"][source_name]["index"] = last_vote.id
-
-        totals = VoteAccepted.objects.cache(
-            ops=["aggregate"], timeout=60
-        ).aggregate(
-            votes=Count("pk"),
-            male=Count("pk", filter=Q(gender=Gender.MALE)),
-            female=Count("pk", filter=Q(gender=Gender.FEMALE)),
-            less_30=Count("pk", filter=Q(age=Age.LESS_30)),
-            less_60=Count("pk", filter=Q(age=Age.LESS_60)),
-            more_60=Count("pk", filter=Q(age=Age.MORE_60)),
-            has_torn=Count("pk", filter=Q(has_torn=True)),
-        )
+        totals = get_global_counters()
 
         totals["total_poll_offices"] = PollOffice.objects.cache().count()
         totals["covered_poll_offices"] = (
@@ -383,78 +597,20 @@ class PollOfficeStatsView(APIView):
         totals["total_sources"] = Source.objects.cache().count()
         result["totals"] = totals
 
-        return Response(result)
+        return result
 
     def handle_poll_office_stats(self, poll_office_id:str):
-        if poll_office_id.isnumeric():
-            last_vote: Vote = (
-                Vote.objects.filter(
-                    poll_office_id=poll_office_id, voteaccepted__isnull=False
-                )
-                .select_related("voteverified", "voteaccepted")
-                .prefetch_related("proposed_votes__source")
-                .last()
-            )
-        else:
-            last_vote: Vote = (
-                Vote.objects.filter(
-                    poll_office__identifier=poll_office_id, voteaccepted__isnull=False
-                )
-                .select_related("voteverified", "voteaccepted")
-                .prefetch_related("proposed_votes__source")
-                .last()
-            )
         result = {}
+        pk = _poll_office_pk(poll_office_id)
+        last_vote = get_last_accepted(last_accepted_key("vote", pk)) if pk else None
         if last_vote:
-            result["last_vote"] = {
-                "Accepted": VoteAcceptedSerializer(last_vote.voteaccepted).data
-            }
-            result["last_vote"]["Accepted"]["index"] = last_vote.index
-
-            try:
-                result["last_vote"]["Verified"] = VoteAcceptedSerializer(
-                    last_vote.voteverified
-                ).data
-                result["last_vote"]["Verified"]["index"] = last_vote.index
-            except VoteVerified.DoesNotExist:
-                result["last_vote"]["Verified"] = {}
-
-            for prop_vote in last_vote.proposed_votes.all():
-                prop_vote: VoteProposed
-                source_name = prop_vote.source.get_source_name()
-
-                result["last_vote"][source_name] = VoteProposedSerializer(
-                    prop_vote
-                ).data
-                result["last_vote"][source_name]["index"] = last_vote.index
+            result["last_vote"] = last_vote
 
         if poll_office_id.isnumeric():
-            totals = (
-                VoteAccepted.objects.filter(vote__poll_office_id=poll_office_id)
-                .cache(ops=["aggregate"], timeout=60)
-                .aggregate(
-                    votes=Count("pk"),
-                    male=Count("pk", filter=Q(gender=Gender.MALE)),
-                    female=Count("pk", filter=Q(gender=Gender.FEMALE)),
-                    less_30=Count("pk", filter=Q(age=Age.LESS_30)),
-                    less_60=Count("pk", filter=Q(age=Age.LESS_60)),
-                    more_60=Count("pk", filter=Q(age=Age.MORE_60)),
-                    has_torn=Count("pk", filter=Q(has_torn=True)),
-                )
-            )
+            totals = get_poll_office_counters(poll_office_id=poll_office_id)
         else:
-            totals = (
-                VoteAccepted.objects.filter(vote__poll_office__identifier=poll_office_id)
-                .cache(ops=["aggregate"], timeout=60)
-                .aggregate(
-                    votes=Count("pk"),
-                    male=Count("pk", filter=Q(gender=Gender.MALE)),
-                    female=Count("pk", filter=Q(gender=Gender.FEMALE)),
-                    less_30=Count("pk", filter=Q(age=Age.LESS_30)),
-                    less_60=Count("pk", filter=Q(age=Age.LESS_60)),
-                    more_60=Count("pk", filter=Q(age=Age.MORE_60)),
-                    has_torn=Count("pk", filter=Q(has_torn=True)),
-                )
+            totals = get_poll_office_counters(
+                poll_office__identifier=poll_office_id
             )
 
         if poll_office_id.isnumeric():
@@ -474,7 +630,81 @@ class PollOfficeStatsView(APIView):
 
         result["totals"] = totals
 
-        return Response(result)
+        return result
+
+
+class PollOfficeStatsBulkView(APIView):
+    """pollofficestats of many poll offices in one request.
+
+    Offices are given by ?poll_offices=1,2,PO-3 (ids or identifiers) or by
+    an area: ?country=CM&region=Centre (see Area.LEVELS). The response maps
+    each office id to the block /api/pollofficestats/?poll_office= returns.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[OpenApiParameter("poll_offices", type=str, required=False)]
+        + [OpenApiParameter(field, type=str, required=False) for field in Area.LEVELS],
+        responses={200: PollOfficeStatsBulkSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        qps = getattr(request, "query_params", request.GET)
+        max_offices = settings.STATS_BULK_MAX_OFFICES
+
+        if qps.get("poll_offices"):
+            values = [v.strip() for v in qps["poll_offices"].split(",") if v.strip()]
+            ids = [int(v) for v in values if v.isnumeric()]
+            identifiers = [v for v in values if not v.isnumeric()]
+            offices = PollOffice.objects.filter(
+                Q(pk__in=ids) | Q(identifier__in=identifiers)
+            )
+        elif any(qps.get(field) for field in Area.LEVELS):
+            offices = PollOffice.objects.filter(
+                **{field: qps[field] for field in Area.LEVELS if qps.get(field)}
+            )
+        else:
+            return Response(
+                {
+                    "message": "Invalid data",
+                    "code": "invalid_data",
+                    "errors": {
+                        "poll_offices": [
+                            "Give poll_offices or one of "
+                            f"{', '.join(Area.LEVELS)}."
+                        ]
+                    },
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        offices = dict(offices.order_by("pk").values_list("pk", "identifier")[: max_offices + 1])
+        if len(offices) > max_offices:
+            return Response(
+                {
+                    "message": "Invalid data",
+                    "code": "invalid_data",
+                    "errors": {
+                        "poll_offices": [f"At most {max_offices} poll offices per request."]
+                    },
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tag, modified = get_versions(
+            [scope for pk in offices for scope in stats_scopes(pk)]
+        )
+        etag, last_modified = _validators(request, tag, modified)
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+
+        stats = get_poll_offices_stats(offices)
+        response = {
+            str(pk): {"identifier": identifier, **stats[pk]}
+            for pk, identifier in offices.items()
+        }
+        return _set_validators(Response({"offices": response}), etag, last_modified)
 
 
 class PollOfficeResultsView(APIView):
@@ -507,26 +737,46 @@ class PollOfficeResultsView(APIView):
 
         qps = getattr(request, "query_params", request.GET)
         poll_office_id = qps.get("poll_office_id") or qps.get("poll_office")
-        base_qs = VotingPaperResult.objects.filter(
-            accepted_candidate_party__isnull=False
+        if not poll_office_id:
+            pk, poll_office_filter = None, {}
+        else:
+            pk = _poll_office_pk(poll_office_id)
+            if pk is None:
+                return Response(
+                    self.compute_results(poll_office__identifier=poll_office_id)
+                )
+            poll_office_filter = {"poll_office_id": pk}
+
+        # Validators come from version counters: unchanged results cost no query
+        tag, modified = get_versions(results_scopes(pk))
+        etag, last_modified = _validators(request, tag, modified)
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        results = get_cached_results(
+            pk, tag, lambda: self.compute_results(**poll_office_filter)
         )
-        if poll_office_id:
-            if poll_office_id.isnumeric():
-                base_qs = base_qs.filter(poll_office_id=poll_office_id)
-            else:
-                base_qs = base_qs.filter(poll_office__identifier=poll_office_id)
+        return _set_validators(Response(results), etag, last_modified)
 
-        total_ballots = base_qs.count()
+    @staticmethod
+    def compute_results(**poll_office_filter):
+        """Build the response from the accepted VotingPaperResult rows."""
+        base_qs = VotingPaperResult.objects.filter(
+            accepted_candidate_party__isnull=False, **poll_office_filter
+        )
 
         # Aggregate ballots per candidate party identifier
         aggregated = base_qs.values(
             "accepted_candidate_party__identifier"
         ).annotate(ballots=Count("pk"))
+        rows = [
+            (row["accepted_candidate_party__identifier"], int(row["ballots"] or 0))
+            for row in aggregated
+        ]
+        total_ballots = sum(ballots for _, ballots in rows)
         # Build result list with shares; sort deterministically by ballots desc, then party_id asc
         results = []
-        for row in aggregated:
-            party_id = row["accepted_candidate_party__identifier"]
-            ballots = int(row["ballots"] or 0)
+        for party_id, ballots in rows:
             share = (ballots / total_ballots) if total_ballots else 0.0
             results.append(
                 {"party_id": party_id, "ballots": ballots, "share": share}
@@ -535,24 +785,343 @@ class PollOfficeResultsView(APIView):
 
         totals = {
             "total_ballots": total_ballots,
-            "total_sources": SourceToken.objects.distinct("source").count(),
+            "total_sources": SourceToken.objects.cache().distinct("source").count(),
         }
 
         response = {"results": results, "totals": totals}
 
-        last_vpr: VotingPaperResult = base_qs.order_by("pk").last()
-        if last_vpr:
-            response["last_paper"] = {}
-            response["last_paper"]["Accepted"] = {
-                "index": last_vpr.index,
-                "party_id": last_vpr.accepted_candidate_party.identifier,
-            }
-            for prop_vp in last_vpr.proposed_vp_results.all():
-                prop_vp: VotingPaperResultProposed
-                response["last_paper"][prop_vp.source.get_source_name()] = {
-                    "index": last_vpr.index,
-                    "party_id": prop_vp.party_candidate.identifier,
+        if "poll_office_id" in poll_office_filter:
+            last_paper_key = last_accepted_key("paper", poll_office_filter["poll_office_id"])
+        elif not poll_office_filter:
+            last_paper_key = last_accepted_key("paper")
+        else:
+            # Unknown poll office identifier
+            last_paper_key = None
+        response["last_paper"] = (
+            get_last_accepted(last_paper_key) if last_paper_key else None
+        )
+        return response
+
+
+def _area_filter(request):
+    """Return (filter, error response) for the level/country/region/city/district
+    query parameters of the area rollup views."""
+    qps = getattr(request, "query_params", request.GET)
+    level = qps.get("level", "country")
+    if level not in Area.LEVELS:
+        return None, Response(
+            {
+                "message": "Invalid data",
+                "code": "invalid_data",
+                "errors": {"level": [f"Must be one of {', '.join(Area.LEVELS)}."]},
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    area_filter = {"level": level}
+    for field in Area.LEVELS:
+        if qps.get(field):
+            area_filter[field] = qps[field]
+    return area_filter, None
+
+
+_AREA_PARAMETERS = [
+    OpenApiParameter("level", type=str, required=False, enum=Area.LEVELS),
+] + [OpenApiParameter(field, type=str, required=False) for field in Area.LEVELS]
+
+
+class AreaStatsView(APIView):
+    """Vote totals of every area of a level, read from AreaCounters.
+
+    ?level=region&country=CM returns one entry per region of CM.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=_AREA_PARAMETERS,
+        responses={200: AreaStatsListSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        area_filter, error = _area_filter(request)
+        if error:
+            return error
+
+        fields = AreaCounters.COUNTER_FIELDS
+        areas = []
+        for row in (
+            AreaCounters.objects.filter(**area_filter)
+            .order_by(*Area.LEVELS)
+            .values("level", *Area.LEVELS, *fields)
+        ):
+            totals = {f: row.pop(f) for f in fields}
+            areas.append({**row, "totals": totals})
+        return Response({"areas": areas})
+
+
+class AreaResultsView(APIView):
+    """Accepted ballots per party of every area of a level, read from AreaResult.
+
+    ?level=city&country=CM&region=Centre returns one entry per city of that region.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=_AREA_PARAMETERS,
+        responses={200: AreaResultsListSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        area_filter, error = _area_filter(request)
+        if error:
+            return error
+
+        areas = {}
+        for row in (
+            AreaResult.objects.filter(**area_filter)
+            .order_by(*Area.LEVELS)
+            .values("level", *Area.LEVELS, "party__identifier", "ballots")
+        ):
+            key = tuple(row[f] for f in ("level", *Area.LEVELS))
+            area = areas.setdefault(
+                key,
+                {
+                    **{f: row[f] for f in ("level", *Area.LEVELS)},
+                    "results": [],
+                    "total_ballots": 0,
+                },
+            )
+            area["results"].append(
+                {"party_id": row["party__identifier"], "ballots": row["ballots"]}
+            )
+            area["total_ballots"] += row["ballots"]
+
+        for area in areas.values():
+            total_ballots = area["total_ballots"]
+            for result in area["results"]:
+                result["share"] = (
+                    result["ballots"] / total_ballots if total_ballots else 0.0
+                )
+            area["results"].sort(key=lambda r: (-r["ballots"], r["party_id"]))
+
+        return Response({"areas": list(areas.values())})
+
+
+def _ratio(part: int, whole: Optional[int]) -> Optional[float]:
+    return part / whole if whole else None
+
+
+class TurnoutView(APIView):
+    """Turnout (accepted votes / registered voters) and reporting coverage.
+
+    ?poll_office={id or identifier} returns the turnout of one office;
+    otherwise ?level=region&country=CM returns one entry per region of CM,
+    read from the AreaCounters and AreaCoverage rollups.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[OpenApiParameter("poll_office", type=str, required=False)]
+        + _AREA_PARAMETERS,
+        responses={200: AreaTurnoutListSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        qps = getattr(request, "query_params", request.GET)
+        poll_office_id = qps.get("poll_office_id") or qps.get("poll_office")
+        if poll_office_id:
+            return self.poll_office_turnout(poll_office_id)
+
+        area_filter, error = _area_filter(request)
+        if error:
+            return error
+
+        votes = {
+            tuple(row[:-1]): row[-1]
+            for row in AreaCounters.objects.filter(**area_filter).values_list(
+                "level", *Area.LEVELS, "votes"
+            )
+        }
+        areas = []
+        for row in (
+            AreaCoverage.objects.filter(**area_filter)
+            .order_by(*Area.LEVELS)
+            .values("level", *Area.LEVELS, *AreaCoverage.COVERAGE_FIELDS)
+        ):
+            area_votes = votes.get(tuple(row[f] for f in ("level", *Area.LEVELS)), 0)
+            areas.append(
+                {
+                    **row,
+                    "votes": area_votes,
+                    "turnout": _ratio(area_votes, row["voters_count"]),
+                    "coverage": _ratio(row["reporting_offices"], row["poll_offices"]),
                 }
+            )
+        return Response({"areas": areas})
+
+    def poll_office_turnout(self, poll_office_id: str):
+        if poll_office_id.isnumeric():
+            poll_office_filter = {"pk": poll_office_id}
         else:
-            response["last_paper"] = None
-        return Response(response)
+            poll_office_filter = {"identifier": poll_office_id}
+        row = (
+            PollOffice.objects.filter(**poll_office_filter)
+            .values("pk", "identifier", "voters_count", "counters__votes")
+            .first()
+        )
+        if row is None:
+            return Response(
+                {"message": "Poll office not found", "code": "not_found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        votes = row["counters__votes"] or 0
+        return Response(
+            PollOfficeTurnoutSerializer(
+                {
+                    "poll_office_id": row["pk"],
+                    "identifier": row["identifier"],
+                    "votes": votes,
+                    "voters_count": row["voters_count"],
+                    "turnout": _ratio(votes, row["voters_count"]),
+                }
+            ).data
+        )
+
+
+class TurnoutSeriesView(APIView):
+    """Accepted votes over time, read from the VoteBucket rollup.
+
+    Globally by default, of one office with ?poll_office={id or identifier}
+    or of one area with ?level=region&country=CM&region=Centre. ?since and
+    ?until (ISO 8601) bound the series, ?points caps its length.
+    """
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("poll_office", type=str, required=False),
+            OpenApiParameter("since", type=OpenApiTypes.DATETIME, required=False),
+            OpenApiParameter("until", type=OpenApiTypes.DATETIME, required=False),
+            OpenApiParameter("points", type=int, required=False),
+        ]
+        + _AREA_PARAMETERS,
+        responses={200: VoteSeriesSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        qps = getattr(request, "query_params", request.GET)
+        errors = {}
+
+        bounds = {}
+        for name in ("since", "until"):
+            value = qps.get(name)
+            try:
+                bounds[name] = parse_datetime(value) if value else None
+            except ValueError:
+                bounds[name] = None
+            if value and bounds[name] is None:
+                errors[name] = ["Must be an ISO 8601 datetime."]
+            elif bounds[name] is not None and timezone.is_naive(bounds[name]):
+                bounds[name] = timezone.make_aware(bounds[name])
+
+        max_points = settings.VOTE_SERIES_MAX_POINTS
+        points = qps.get("points", str(max_points))
+        if not points.isnumeric() or not 0 < int(points) <= max_points:
+            errors["points"] = [f"Must be between 1 and {max_points}."]
+
+        if errors:
+            return Response(
+                {"message": "Invalid data", "code": "invalid_data", "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        poll_office_id = qps.get("poll_office_id") or qps.get("poll_office")
+        if poll_office_id:
+            pk = _poll_office_pk(poll_office_id)
+            if pk is None:
+                return Response(
+                    {"message": "Poll office not found", "code": "not_found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            scope = series_scope(pk)
+        elif "level" in qps:
+            area_filter, error = _area_filter(request)
+            if error:
+                return error
+            scope = series_scope(
+                area=tuple(area_filter.get(f, "") for f in ("level", *Area.LEVELS))
+            )
+        else:
+            scope = series_scope()
+
+        step, series = get_vote_series(
+            scope,
+            bounds["since"],
+            bounds["until"] or timezone.now(),
+            int(points),
+        )
+        return Response(VoteSeriesSerializer({"step": step, "series": series}).data)
+
+
+class LiveFeedView(View):
+    """Server-Sent Events stream of the accepted votes and ballots.
+
+    GET /api/live/ streams the deltas of all poll offices, summed;
+    ?poll_office={id or identifier} streams those of one office. Events are
+    "stats" (counter deltas, see PollOfficeCounters) and "results" (ballots
+    per party identifier). Needs an ASGI server: under WSGI every watcher
+    would hold a worker thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {
+                    "message": "The live feed is served by the ASGI application",
+                    "code": "asgi_required",
+                },
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        poll_office_id = request.GET.get("poll_office_id") or request.GET.get("poll_office")
+        key = GLOBAL
+        if poll_office_id:
+            if poll_office_id.isnumeric():
+                poll_office_filter = {"pk": poll_office_id}
+            else:
+                poll_office_filter = {"identifier": poll_office_id}
+            poll_office_id = await (
+                PollOffice.objects.filter(**poll_office_filter)
+                .values_list("pk", flat=True)
+                .afirst()
+            )
+            if poll_office_id is None:
+                return JsonResponse(
+                    {"message": "Poll office not found", "code": "not_found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            key = office_key(poll_office_id)
+
+        response = StreamingHttpResponse(
+            self.stream(key), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Disable proxy buffering (nginx)
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    async def stream(key):
+        queue = live_broker.subscribe(key)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), settings.LIVE_FEED_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            live_broker.unsubscribe(key, queue)
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
-from django.db.utils import ProgrammingError
+
+
+def create_postgres_extensions(sender, using, **kwargs):
+    """pre_migrate receiver creating the extensions the core indexes use.
+
+    The migrations are generated on each deployment, so they cannot carry
+    the CreateExtension operations themselves.
+    """
+    from django.db import connections
+
+    with connections[using].cursor() as cursor:
+        # PollOffice.search_text gin_trgm_ops index
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
 
 
 class CoreConfig(AppConfig):
@@ -7,125 +19,68 @@ class CoreConfig(AppConfig):
     name = "core"
 
     def ready(self):
-        self.create_default_candidate_parties_if_needed()
-        self.load_poll_offices_if_empty()
-        self.load_candidate_parties_if_empty()
-
-    def create_default_candidate_parties_if_needed(self):
-        from core.models import CandidateParty
-        try:
-            CandidateParty.objects.get_or_create(
-                identifier="**undecided**",
-                party_name="UNDECIDED",
-                candidate_name="UNDECIDED",
-            )
-
-            CandidateParty.objects.get_or_create(
-                identifier="**white**",
-                party_name="WHITE",
-                candidate_name="WHITE",
-            )
-        except ProgrammingError:
-            pass
-
-    def load_poll_offices_if_empty(self):
-        """If there is not PollOffice in the database load the poll_offices.json
-        located inside settings.BASE_DIR folder"""
-        from django.conf import settings
-        from django.db import transaction
-        import json
-        from pathlib import Path
-
-        try:
-            from core.models import PollOffice
-        except ProgrammingError:
-            # Migrations not yet applied in some contexts
-            return
-
-        try:
-            if PollOffice.objects.exists():
-                return
-
-            base_dir = Path(getattr(settings, "BASE_DIR", Path.cwd()))
-            downloads_dir = Path(getattr(settings, "DOWNLOADS_DIR", base_dir / "downloads"))
-
-            candidates = [
-                base_dir / "poll_offices.json",
-                downloads_dir / "poll_offices.json",
-            ]
-            json_path = next((p for p in candidates if p.exists()), None)
-            if not json_path:
-                return
-
-            with json_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            if not isinstance(data, list):
-                return
-
-            instances = []
-            for item in data:
-                if not isinstance(item, dict):
-                    continue
-                name = item.get("name")
-                identifier = item.get("identifier")
-                if not name or not identifier:
-                    continue
-                country = item.get("country") or "Unknown"
-                instances.append(
-                    PollOffice(
-                        name=name,
-                        identifier=str(identifier),
-                        country=str(country),
-                        state=item.get("state") or None,
-                        region=item.get("region") or None,
-                        city=item.get("city") or None,
-                        county=item.get("county") or None,
-                        district=item.get("district") or None,
-                        voters_count=item.get("voters_count") or None,
-                    )
-                )
-
-            if not instances:
-                return
-
-            with transaction.atomic():
-                PollOffice.objects.bulk_create(instances, ignore_conflicts=True)
-        except ProgrammingError:
-            # Tables may not be ready; ignore during initial migrate/setup
-            return
-        except Exception:
-            # Be silent on ready() to avoid breaking startup
-            return
-
-    def load_candidate_parties_if_empty(self):
-        """If there is not PollOffice in the database load the poll_offices.json
-        located inside settings.BASE_DIR folder"""
-        from django.conf import settings
-        from django.db import transaction
-        import json
-        from pathlib import Path
-
-        try:
-            from core.models import CandidateParty
-        except ProgrammingError:
-            # Migrations not yet applied in some contexts
-            return
-
-        try:
-            if CandidateParty.objects.count() > 2:
-                return
-
-            with (settings.BASE_DIR / "candidate_parties.json").open() as fp:
-                candidates = json.load(fp)
-
-            rows = []
-            for candidate in candidates:
-                rows.append(CandidateParty(**candidate))
-
-            CandidateParty.objects.bulk_create(rows)
-            print(f"Created {len(rows)} CandidateParty objects.")
-        except ProgrammingError:
-            pass
-        except Exception as e:
-            print(e)
+        # Signal wiring only: ready() runs in every process and must not do
+        # I/O. Reference data is loaded by the bootstrap command.
+        self.connect_token_cache_invalidation()
+        self.connect_poll_office_counters()
+        self.connect_results_cache_invalidation()
+        self.connect_version_bumps()
+        self.connect_area_coverage()
+        self.connect_postgres_extensions()
+
+    def connect_token_cache_invalidation(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from core.authentication import invalidate_source_token
+        from core.models import SourceToken
+
+        post_save.connect(invalidate_source_token, sender=SourceToken)
+        post_delete.connect(invalidate_source_token, sender=SourceToken)
+
+    def connect_poll_office_counters(self):
+        from django.db.models.signals import post_save
+
+        from core.models import VoteAccepted
+        from core.utils import increment_counters_on_accept
+
+        post_save.connect(increment_counters_on_accept, sender=VoteAccepted)
+
+    def connect_results_cache_invalidation(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from core.models import VotingPaperResult
+        from core.utils import invalidate_results_on_accept, update_last_paper_on_accept
+
+        post_save.connect(invalidate_results_on_accept, sender=VotingPaperResult)
+        post_save.connect(update_last_paper_on_accept, sender=VotingPaperResult)
+        post_delete.connect(invalidate_results_on_accept, sender=VotingPaperResult)
+
+    def connect_version_bumps(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from core.models import CandidateParty, PollOffice, Source, SourceToken
+        from core.utils import bump_versions_on_change
+
+        for model in (PollOffice, CandidateParty, Source, SourceToken):
+            post_save.connect(bump_versions_on_change, sender=model)
+            post_delete.connect(bump_versions_on_change, sender=model)
+
+    def connect_area_coverage(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+        from core.models import PollOffice
+        from core.utils import (
+            remember_area_coverage,
+            remove_area_coverage_on_delete,
+            update_area_coverage_on_change,
+        )
+
+        pre_save.connect(remember_area_coverage, sender=PollOffice)
+        pre_delete.connect(remember_area_coverage, sender=PollOffice)
+        post_save.connect(update_area_coverage_on_change, sender=PollOffice)
+        post_delete.connect(remove_area_coverage_on_delete, sender=PollOffice)
+
+    def connect_postgres_extensions(self):
+        from django.db.models.signals import pre_migrate
+
+        pre_migrate.connect(create_postgres_extensions, sender=self)
@@ -1,7 +1,14 @@
+import hashlib
+import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
 from datetime import timedelta
-from typing import Dict
+from typing import Optional, Tuple
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from rest_framework.authentication import (
@@ -9,9 +16,9 @@ from rest_framework.authentication import (
 )
 from rest_framework.authentication import get_authorization_header
 from django.contrib.auth.backends import BaseBackend, ModelBackend
+from redis.exceptions import RedisError
 
 from core.models import SourceToken
-from core.serializers import SourceTokenSerializer
 
 from rest_framework.exceptions import AuthenticationFailed
 from django.utils import timezone
@@ -21,38 +28,184 @@ User = get_user_model()
 logger = logging.getLogger("api")
 
 
+@dataclass(frozen=True)
+class CachedSourceToken:
+    """What authenticated requests need to know about their SourceToken.
+
+    Holds everything the vote, voting paper result and S3 endpoints read, so
+    an authenticated request needs no query to resolve its source, user or
+    poll office.
+    """
+
+    token_id: int
+    source_id: int
+    elector_id: str
+    poll_office_id: int
+    poll_office_identifier: str
+    user_id: Optional[int]
+    username: Optional[str]
+
+    @classmethod
+    def from_source_token(cls, source_token: SourceToken) -> "CachedSourceToken":
+        source = source_token.source
+        user = source.user
+        return cls(
+            token_id=source_token.pk,
+            source_id=source.pk,
+            elector_id=source.elector_id,
+            poll_office_id=source_token.poll_office_id,
+            poll_office_identifier=source_token.poll_office.identifier,
+            user_id=user.pk if user else None,
+            username=user.username if user else None,
+        )
+
+
 class TokenCache:
-    cache: Dict[str, SourceToken] = {}
+    """Two-level cache of bearer token -> CachedSourceToken.
+
+    L1 is a per-process LRU bounded to TOKEN_CACHE_SIZE entries that live
+    TOKEN_CACHE_TTL seconds. L2 is the Redis used by cacheops, shared by all
+    workers, with entries living TOKEN_CACHE_SHARED_TTL seconds. Unknown
+    tokens are cached too, for TOKEN_CACHE_MISS_TTL seconds, so bad bearer
+    tokens do not reach PostgreSQL on every request. Redis keys are hashes
+    of the tokens, never the tokens themselves.
+    """
+
+    MISS = None
+    # Bump the version when CachedSourceToken fields change
+    _redis_prefix = "ufrecs:token:v2:"
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, Optional[CachedSourceToken]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedSourceToken]:
+        """Return the record of a token, or None when the token is unknown."""
+        found, record = self._get_local(key)
+        if found:
+            return record
+
+        found, record = self._get_shared(key)
+        if not found:
+            record = self._fetch(key)
+            self._set_shared(key, record)
+        self._set_local(key, record)
+        return record
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            self._redis().delete(self._redis_key(key))
+        except RedisError:
+            logger.exception("Cannot invalidate token in Redis")
+
+    def clear(self) -> None:
+        """Empty the local cache (L1) of this process."""
+        with self._lock:
+            self._entries.clear()
+
+    def _get_local(self, key: str) -> Tuple[bool, Optional[CachedSourceToken]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, record = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, record
+
+    def _set_local(self, key: str, record: Optional[CachedSourceToken]) -> None:
+        ttl = settings.TOKEN_CACHE_TTL if record else settings.TOKEN_CACHE_MISS_TTL
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Tuple[bool, Optional[CachedSourceToken]]:
+        try:
+            raw = self._redis().get(self._redis_key(key))
+        except RedisError:
+            logger.exception("Cannot read token from Redis")
+            return False, None
+        if raw is None:
+            return False, None
+        values = json.loads(raw)
+        return True, CachedSourceToken(*values) if values else self.MISS
+
+    def _set_shared(self, key: str, record: Optional[CachedSourceToken]) -> None:
+        if record:
+            raw, ttl = json.dumps(astuple(record)), settings.TOKEN_CACHE_SHARED_TTL
+        else:
+            raw, ttl = json.dumps(None), settings.TOKEN_CACHE_MISS_TTL
+        try:
+            self._redis().set(self._redis_key(key), raw, ex=ttl)
+        except RedisError:
+            logger.exception("Cannot write token to Redis")
 
+    def _fetch(self, key: str) -> Optional[CachedSourceToken]:
+        # Single query joining the source, its user and the poll office
+        source_token = (
+            SourceToken.objects.filter(token=key)
+            .select_related("source__user", "poll_office")
+            .first()
+        )
+        if source_token is None:
+            return self.MISS
+        return CachedSourceToken.from_source_token(source_token)
 
-class TokenAuthentication(DrfTokenAuthentication):
-    keyword = "Bearer"
+    def _redis_key(self, key: str) -> str:
+        return self._redis_prefix + hashlib.sha256(key.encode()).hexdigest()
 
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            auth = get_authorization_header(request).decode()
-            if not auth:
-                return
+    @staticmethod
+    def _redis():
+        from cacheops.redis import redis_client
+
+        return redis_client
 
-            if len(auth.split()) < 2:
-                return
 
-            key = auth.split()[1]
+token_cache = TokenCache()
 
-            source_token = TokenCache.cache.get(key)
-            if not source_token:
-                source_token: SourceToken = SourceToken.objects.get(token=key)
-                TokenCache.cache[key] = source_token
-                logger.debug(f"key {key} given to user {source_token.source.user}")
 
-            # if source_token and source_token.expiry:
-            #     if source_token.expiry < timezone.now():
-            #         TokenCache.cache.pop(key, None)
-            #         raise AuthenticationFailed("The API token has expired")
+def invalidate_source_token(sender, instance: SourceToken, **kwargs):
+    """Signal receiver dropping a saved or deleted SourceToken from the cache.
 
-            if source_token:
-                request.source_token = source_token
-                return source_token.source.user, key
+    Other processes keep their L1 entry until it expires (TOKEN_CACHE_TTL).
+    """
+    token_cache.invalidate(instance.token)
 
-        except SourceToken.DoesNotExist:
-            return None
+
+class TokenAuthentication(DrfTokenAuthentication):
+    keyword = "Bearer"
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        auth = get_authorization_header(request).decode()
+        if not auth:
+            return
+
+        if len(auth.split()) < 2:
+            return
+
+        key = auth.split()[1]
+
+        source_token = token_cache.get(key)
+
+        # if source_token and source_token.expiry:
+        #     if source_token.expiry < timezone.now():
+        #         token_cache.invalidate(key)
+        #         raise AuthenticationFailed("The API token has expired")
+
+        if source_token:
+            request.source_token = source_token
+            if source_token.user_id is None:
+                return None, key
+            # Deferred instance: no query unless another field is read
+            user = User.from_db(
+                "default",
+                ["id", "username"],
+                [source_token.user_id, source_token.username],
+            )
+            return user, key
@@ -0,0 +1,108 @@
+"""Reference data the API needs, loaded by the bootstrap command.
+
+Every function is idempotent, so the command can run on each deployment.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import CandidateParty, PollOffice
+from core.utils import bump_versions_on_commit, rebuild_area_coverage
+
+DEFAULT_CANDIDATE_PARTIES = (
+    {"identifier": "**undecided**", "party_name": "UNDECIDED", "candidate_name": "UNDECIDED"},
+    {"identifier": "**white**", "party_name": "WHITE", "candidate_name": "WHITE"},
+)
+
+
+def create_default_candidate_parties() -> int:
+    """Create the undecided and white parties; returns how many were missing."""
+    created = 0
+    for party in DEFAULT_CANDIDATE_PARTIES:
+        _, was_created = CandidateParty.objects.get_or_create(**party)
+        created += was_created
+    if created:
+        bump_versions_on_commit(["candidateparties"])
+    return created
+
+
+def find_poll_offices_json() -> Optional[Path]:
+    """poll_offices.json of BASE_DIR or DOWNLOADS_DIR, None when missing."""
+    base_dir = Path(getattr(settings, "BASE_DIR", Path.cwd()))
+    downloads_dir = Path(getattr(settings, "DOWNLOADS_DIR", base_dir / "downloads"))
+    candidates = [
+        base_dir / "poll_offices.json",
+        downloads_dir / "poll_offices.json",
+    ]
+    return next((p for p in candidates if p.exists()), None)
+
+
+def load_poll_offices_if_empty(json_path: Optional[Path] = None) -> int:
+    """Load poll_offices.json (see find_poll_offices_json) into an empty
+    PollOffice table; returns the number of offices created."""
+    if PollOffice.objects.exists():
+        return 0
+    json_path = json_path or find_poll_offices_json()
+    if not json_path:
+        return 0
+
+    with json_path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        return 0
+
+    instances = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        name = item.get("name")
+        identifier = item.get("identifier")
+        if not name or not identifier:
+            continue
+        country = item.get("country") or "Unknown"
+        office = PollOffice(
+            name=name,
+            identifier=str(identifier),
+            country=str(country),
+            state=item.get("state") or None,
+            region=item.get("region") or None,
+            city=item.get("city") or None,
+            county=item.get("county") or None,
+            district=item.get("district") or None,
+            voters_count=item.get("voters_count") or None,
+        )
+        office.refresh_search_text()
+        instances.append(office)
+
+    if not instances:
+        return 0
+
+    with transaction.atomic():
+        created = PollOffice.objects.bulk_create(instances, ignore_conflicts=True)
+        rebuild_area_coverage()
+        bump_versions_on_commit(["polloffices"])
+    return len(created)
+
+
+def load_candidate_parties_if_empty(json_path: Optional[Path] = None) -> int:
+    """Load BASE_DIR/candidate_parties.json when only the default parties
+    exist; returns the number of parties created."""
+    if CandidateParty.objects.count() > len(DEFAULT_CANDIDATE_PARTIES):
+        return 0
+    json_path = json_path or Path(settings.BASE_DIR) / "candidate_parties.json"
+    if not json_path.exists():
+        return 0
+
+    with json_path.open() as fp:
+        candidates = json.load(fp)
+
+    with transaction.atomic():
+        rows = CandidateParty.objects.bulk_create(
+            [CandidateParty(**candidate) for candidate in candidates]
+        )
+        bump_versions_on_commit(["candidateparties"])
+    return len(rows)
@@ -0,0 +1,155 @@
+"""Live feed of accepted votes and ballots, streamed as Server-Sent Events.
+
+Deciders publish one message per committed batch on the LIVE_FEED_CHANNEL
+Redis channel. Each web process runs a single LiveFeedBroker subscribed to
+that channel, which fans the message out to the SSE connections of the
+process, so watchers cost no query and one publish reaches all of them.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from redis.exceptions import RedisError
+
+logger = logging.getLogger("api")
+
+GLOBAL = "all"
+
+Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+
+def _redis():
+    from cacheops.redis import redis_client
+
+    return redis_client
+
+
+def office_key(poll_office_id: int) -> str:
+    return f"office:{poll_office_id}"
+
+
+def publish_live(event: str, deltas: Dict[int, Dict[str, int]]) -> None:
+    """Publish the deltas of a batch, keyed by poll office id, once committed.
+
+    event is "stats" (counter deltas) or "results" (ballots per party).
+    """
+    deltas = {
+        poll_office_id: {k: v for k, v in delta.items() if v}
+        for poll_office_id, delta in deltas.items()
+    }
+    if not any(deltas.values()):
+        return
+    message = json.dumps({"event": event, "offices": deltas})
+
+    def publish():
+        try:
+            _redis().publish(settings.LIVE_FEED_CHANNEL, message)
+        except RedisError:
+            logger.exception("Cannot publish to the live feed")
+
+    transaction.on_commit(publish)
+
+
+def _sum_deltas(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    total: Dict[str, int] = defaultdict(int)
+    for delta in deltas:
+        for k, v in delta.items():
+            total[k] += v
+    return dict(total)
+
+
+class LiveFeedBroker:
+    """Fans the LIVE_FEED_CHANNEL messages out to the subscribed queues.
+
+    Subscribers are asyncio queues of the SSE responses, keyed by GLOBAL or
+    office_key(). A daemon thread started on the first subscription holds
+    the only Redis subscription of the process. Slow subscribers lose their
+    oldest events instead of growing their queue.
+    """
+
+    def __init__(self, listen: bool = True):
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listen = listen
+        self._thread = None
+
+    def subscribe(self, key: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.LIVE_FEED_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[key].add((asyncio.get_running_loop(), queue))
+            if self._listen and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="live-feed", daemon=True
+                )
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, key: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            for subscriber in [s for s in subscribers if s[1] is queue]:
+                subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(key, None)
+
+    def dispatch(self, message: Dict[str, Any]) -> None:
+        """Deliver a published message to the subscribers it concerns."""
+        event = message["event"]
+        offices = message["offices"]
+        with self._lock:
+            targets = []
+            if self._subscribers.get(GLOBAL):
+                targets.append(
+                    (GLOBAL, {"delta": _sum_deltas(offices.values())})
+                )
+            for poll_office_id, delta in offices.items():
+                key = office_key(poll_office_id)
+                if self._subscribers.get(key):
+                    targets.append(
+                        (key, {"poll_office_id": int(poll_office_id), "delta": delta})
+                    )
+            deliveries = [
+                (subscriber, data)
+                for key, data in targets
+                for subscriber in self._subscribers[key]
+            ]
+
+        for (loop, queue), data in deliveries:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, (event, data))
+            except RuntimeError:
+                # Loop closed under a subscriber that did not unsubscribe
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.LIVE_FEED_CHANNEL)
+                while True:
+                    raw = pubsub.get_message(timeout=1.0)
+                    if raw is None:
+                        continue
+                    try:
+                        self.dispatch(json.loads(raw["data"]))
+                    except Exception:
+                        logger.exception("Cannot dispatch a live feed message")
+            except RedisError:
+                logger.exception("Live feed subscription lost, reconnecting")
+                time.sleep(1)
+
+
+live_broker = LiveFeedBroker()
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Import what a worker imports before serving its first request
+REQUEST_PATH_SCRIPT = """
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+get_wsgi_application()
+get_resolver().url_patterns
+"""
+
+
+def audit_imports(settings_module: str) -> list:
+    """(module, self µs, cumulative µs) of the modules imported on the request path.
+
+    Parsed from the `python -X importtime` report of a fresh interpreter.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", REQUEST_PATH_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+    modules = []
+    for line in err.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "List the slowest imports of a worker up to its first request. Fails "
+        "when a package of IMPORT_AUDIT_DEFERRED is imported on that path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of modules to list, by cumulative time (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "ufrecs.settings")
+        modules = audit_imports(settings_module)
+
+        total = sum(own for _, own, _ in modules)
+        self.stdout.write(
+            self.style.NOTICE(f"{len(modules)} modules imported in {total / 1e6:.3f}s")
+        )
+        for name, own, cumulative in sorted(modules, key=lambda m: -m[2])[: options["top"]]:
+            self.stdout.write(f"{cumulative / 1e3:10.1f}ms {own / 1e3:10.1f}ms  {name}")
+
+        deferred = set(settings.IMPORT_AUDIT_DEFERRED)
+        eager = sorted({name for name, _, _ in modules if name.split(".")[0] in deferred})
+        if eager:
+            raise CommandError(
+                f"Imported on the request path, import them lazily: {', '.join(eager)}"
+            )
+        self.stdout.write(self.style.SUCCESS("No deferred package on the request path."))
@@ -0,0 +1,56 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from core.api_views import PollOfficeResultsView
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure requests per second of /api/pollofficeresults/ against the "
+        "current database, without then with the results cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per run (default: 500)",
+        )
+        parser.add_argument(
+            "--poll-office",
+            default=None,
+            help="Poll office id or identifier; all offices when omitted",
+        )
+
+    def handle(self, *args, **options):
+        requests: int = options["requests"]
+        params = {}
+        if options["poll_office"]:
+            params["poll_office"] = options["poll_office"]
+
+        factory = APIRequestFactory()
+        view = PollOfficeResultsView.as_view()
+
+        def run() -> float:
+            started = perf_counter()
+            for _ in range(requests):
+                response = view(factory.get("/api/pollofficeresults/", params))
+                response.render()
+            return requests / (perf_counter() - started)
+
+        with override_settings(RESULTS_CACHE_TTL=0):
+            uncached = run()
+        self.stdout.write(self.style.NOTICE(f"uncached: {uncached:.0f} req/s"))
+
+        # First request fills the cache
+        view(factory.get("/api/pollofficeresults/", params))
+        cached = run()
+        self.stdout.write(self.style.NOTICE(f"cached:   {cached:.0f} req/s"))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: x{cached / uncached:.1f} over {requests} requests.")
+        )
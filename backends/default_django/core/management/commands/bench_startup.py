@@ -0,0 +1,82 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter so nothing is imported or set up yet
+SETUP_SCRIPT = """
+import json, os, time
+started = time.perf_counter()
+import django
+django.setup()
+elapsed = time.perf_counter() - started
+from django.db import connections
+print(json.dumps({
+    "seconds": elapsed,
+    "db_connections": [c.alias for c in connections.all() if c.connection is not None],
+}))
+"""
+
+
+def measure_setup(settings_module: str) -> dict:
+    """Cold django.setup() time and opened database connections of one process."""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    out = subprocess.run(
+        [sys.executable, "-c", SETUP_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold django.setup() time in fresh interpreters. Fails when "
+        "the median exceeds --max-seconds or when setup opens a database "
+        "connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Number of interpreters to start (default: 5)",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=settings.STARTUP_MAX_SECONDS,
+            help=f"Median budget (default: STARTUP_MAX_SECONDS = {settings.STARTUP_MAX_SECONDS})",
+        )
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "ufrecs.settings")
+        runs = [measure_setup(settings_module) for _ in range(options["runs"])]
+
+        timings = [run["seconds"] for run in runs]
+        median = statistics.median(timings)
+        self.stdout.write(
+            self.style.NOTICE(
+                f"django.setup(): median {median:.3f}s, "
+                f"min {min(timings):.3f}s, max {max(timings):.3f}s"
+            )
+        )
+
+        connected = sorted({alias for run in runs for alias in run["db_connections"]})
+        if connected:
+            raise CommandError(
+                f"django.setup() opened database connections: {', '.join(connected)}"
+            )
+        if median > options["max_seconds"]:
+            raise CommandError(
+                f"django.setup() takes {median:.3f}s, over the {options['max_seconds']}s budget"
+            )
+        self.stdout.write(self.style.SUCCESS("Startup within budget."))
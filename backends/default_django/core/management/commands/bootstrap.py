@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.bootstrap import (
+    create_default_candidate_parties,
+    load_candidate_parties_if_empty,
+    load_poll_offices_if_empty,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the reference data of an empty database: default candidate "
+        "parties, poll_offices.json and candidate_parties.json. Safe to run "
+        "on every deployment, after migrate."
+    )
+
+    def handle(self, *args, **options):
+        created = create_default_candidate_parties()
+        self.stdout.write(f"Default candidate parties created: {created}")
+
+        created = load_poll_offices_if_empty()
+        self.stdout.write(f"Poll offices loaded: {created}")
+
+        created = load_candidate_parties_if_empty()
+        self.stdout.write(f"Candidate parties loaded: {created}")
+
+        self.stdout.write(self.style.SUCCESS("Bootstrap completed."))
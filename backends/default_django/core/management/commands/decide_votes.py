@@ -1,15 +1,23 @@
 from collections import defaultdict
 from datetime import datetime, timedelta
-from time import sleep
-from typing import Any, Dict, Iterable, Optional
+from time import monotonic, sleep
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from django.utils import timezone
 
 from core.enums import Age, Gender
-from core.models import Vote, VoteAccepted
-from core.utils import compute_vote_decision
+from core.utils import (
+    Key,
+    ProposalListener,
+    accept_vote_decisions,
+    accept_votes_bulk,
+    compute_vote_decision,
+    pending_votes,
+    run_workers,
+    upcoming_votes,
+)
 
 
 Weight = float
@@ -34,18 +42,68 @@ class Command(BaseCommand):
             default=1000,
             help="Max votes to process per cycle (default: 100)",
         )
+        parser.add_argument(
+            "--engine",
+            choices=["python", "sql"],
+            default="python",
+            help=(
+                "python decides votes one by one and can explain each decision "
+                "(verbosity >= 2); sql decides a whole batch in one query and "
+                "writes it with one INSERT (default: python)"
+            ),
+        )
+        parser.add_argument(
+            "--listen",
+            action="store_true",
+            help=(
+                "Wait for NOTIFY from the vote ingestion instead of polling and "
+                "decide only the notified votes (requires DECIDER_NOTIFY)"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of forked worker processes; each claims a disjoint batch "
+                "with FOR UPDATE SKIP LOCKED (default: 1)"
+            ),
+        )
 
     def handle(self, *args, **options):
         sleep_seconds: float = options["sleep"]
         batch_size: int = options["batch_size"]
         verbosity: int = int(options.get("verbosity", 1))
+        workers: int = options["workers"]
+        self.engine: str = options["engine"]
 
         self.stdout.write(
             self.style.NOTICE(
-                f"decide_votes started; polling every {sleep_seconds}s, batch={batch_size}, verbosity={verbosity}."
+                f"decide_votes started; polling every {sleep_seconds}s, batch={batch_size}, engine={self.engine}, workers={workers}, verbosity={verbosity}."
             )
         )
 
+        def run():
+            self._run(
+                listen=options["listen"],
+                sleep_seconds=sleep_seconds,
+                batch_size=batch_size,
+                verbosity=verbosity,
+            )
+
+        if workers > 1:
+            run_workers(workers, run)
+        else:
+            run()
+
+    def _run(self, *, listen: bool, sleep_seconds: float, batch_size: int, verbosity: int) -> None:
+        if listen:
+            try:
+                self._listen(batch_size=batch_size, verbosity=verbosity)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING("Shutting down decide_votes."))
+            return
+
         cycle_no = 0
         try:
             while True:
@@ -67,24 +125,86 @@ class Command(BaseCommand):
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING("Shutting down decide_votes."))
 
-    def _process_batch(self, *, batch_size: int, cycle_no: int, verbosity: int) -> int:
+    def _listen(self, *, batch_size: int, verbosity: int) -> None:
+        """Decide the notified votes as soon as their deciding window closes."""
+        listener = ProposalListener(settings.VOTE_PROPOSED_CHANNEL)
+        listener.listen()
+        self.stdout.write(
+            self.style.NOTICE(f"Listening on {settings.VOTE_PROPOSED_CHANNEL}.")
+        )
+
+        # Notifications only cover new proposals: decide the backlog first,
+        # then wait for the proposals stored before LISTEN like notified ones
+        cycle_no = self._drain(batch_size=batch_size, cycle_no=0, verbosity=verbosity)
+        listener.schedule(upcoming_votes())
+
+        next_sweep = monotonic() + settings.DECIDE_SWEEP_SECONDS
+        while True:
+            keys = listener.wait(batch_size, timeout=max(next_sweep - monotonic(), 0))
+            if monotonic() >= next_sweep:
+                # Safety net for keys missed or dropped after a failed decision
+                cycle_no = self._drain(
+                    batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity
+                )
+                next_sweep = monotonic() + settings.DECIDE_SWEEP_SECONDS
+            if not keys:
+                continue
+            cycle_no += 1
+            processed = self._process_batch(
+                batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity, keys=keys
+            )
+            if verbosity >= 1:
+                self.stdout.write(
+                    self.style.NOTICE(
+                        f"Cycle {cycle_no}: processed {processed} of {len(keys)} notified votes, {listener.pending_count} waiting"
+                    )
+                )
+
+    def _drain(self, *, batch_size: int, cycle_no: int, verbosity: int) -> int:
+        """Decide all the pending votes, whatever their keys. Returns the last cycle_no."""
+        processed = None
+        while processed != 0:
+            cycle_no += 1
+            processed = self._process_batch(
+                batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity
+            )
+        return cycle_no
+
+    def _process_batch(
+        self,
+        *,
+        batch_size: int,
+        cycle_no: int,
+        verbosity: int,
+        keys: Optional[List[Key]] = None,
+    ) -> int:
         """Process up to batch_size votes lacking a VoteAccepted.
 
-        Uses row-level locking to avoid races if multiple workers run.
-        Returns the number of VoteAccepted created.
+        When keys is given, only the votes with these (poll_office_id, index)
+        are considered. The batch is claimed with FOR UPDATE SKIP LOCKED and
+        stays locked until its decisions are committed, so concurrent workers
+        decide disjoint batches. Returns the number of VoteAccepted created.
         """
-        created_count = 0
-        five_min_ago = timezone.now() - timedelta(minutes=5)
-
-        # with transaction.atomic():
-        #     # Lock a slice of pending votes. skip_locked prevents blocking on locks.
-        pending_votes = (
-            Vote.objects
-            .filter(voteaccepted__isnull=True,
-                    proposed_votes__created_at__lt=five_min_ago)
-            .order_by("id")[:batch_size]
+        pending = (
+            pending_votes(keys)
+            .select_for_update(skip_locked=True)[:batch_size]
         )
 
+        with transaction.atomic():
+            if self.engine == "sql":
+                return self._process_batch_sql(
+                    pending, cycle_no=cycle_no, verbosity=verbosity
+                )
+            return self._process_batch_python(
+                pending, cycle_no=cycle_no, verbosity=verbosity
+            )
+
+    def _process_batch_python(self, pending_votes, *, cycle_no: int, verbosity: int) -> int:
+        """Decide a batch of pending votes one by one with compute_vote_decision
+        and write the decisions at once with accept_vote_decisions.
+
+        Returns the number of VoteAccepted created.
+        """
         votes = list(pending_votes)
         if verbosity >= 1:
             self.stdout.write(
@@ -93,8 +213,8 @@ class Command(BaseCommand):
                 )
             )
 
-        # Process outside the lock to minimize transaction time; we only locked ids.
-        # We'll re-check existence of VoteAccepted when creating to keep idempotent.
+        decisions: Dict[int, Tuple[str, str, bool]] = {}
+        explanations: Dict[int, Dict[str, Any]] = {}
         for vote in votes:
             try:
                 result, details = compute_vote_decision(vote, include_details=True)
@@ -114,7 +234,6 @@ class Command(BaseCommand):
                     )
                 continue
 
-            gender, age, has_torn = result
             if verbosity >= 2 and details:
                 counts = details.get("counts", {})
                 self.stdout.write(
@@ -122,46 +241,44 @@ class Command(BaseCommand):
                         f"Vote id={vote.id}: proposed={counts.get('proposed', 0)}, verified={'yes' if counts.get('verified', 0) else 'no'}"
                     )
                 )
+            decisions[vote.id] = result
+            explanations[vote.id] = details or {}
 
-            # Create inside a short transaction with a guard check for idempotency
-            with transaction.atomic():
-                if VoteAccepted.objects.filter(vote_id=vote.id).exists():
-                    if verbosity >= 2:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"Vote id={vote.id}: VoteAccepted already exists; skipping"
-                            )
-                        )
-                    continue
-                VoteAccepted.objects.create(
-                    vote=vote,
-                    gender=gender,
-                    age=age,
-                    has_torn=has_torn,
-                )
-                created_count += 1
+        # One write for the batch: skips votes accepted meanwhile and bumps
+        # the shared counters once, see accept_vote_decisions
+        accepted = set(accept_vote_decisions(decisions))
+        created_count = len(accepted)
+        for vote_id, (gender, age, has_torn) in decisions.items():
+            if vote_id not in accepted:
                 if verbosity >= 2:
                     self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Vote id={vote.id}: created VoteAccepted(gender={gender}, age={age}, has_torn={has_torn})"
+                        self.style.WARNING(
+                            f"Vote id={vote_id}: VoteAccepted already exists; skipping"
                         )
                     )
-                if verbosity >= 3 and details:
-                    for field in ("gender", "age", "has_torn"):
-                        fd = details.get(field) or {}
-                        weights = fd.get("weights", {})
-                        candidates = fd.get("candidates", [])
-                        chosen = fd.get("chosen")
-                        reason = fd.get("reason", "")
-                        weights_str = ", ".join(
-                            f"{k}={v}" for k, v in sorted(weights.items(), key=lambda kv: str(kv[0]))
-                        )
-                        tie_info = " (tie)" if len(candidates) > 1 else ""
-                        self.stdout.write(
-                            self.style.NOTICE(
-                                f"  - {field}: weights[{weights_str}] -> {chosen}{tie_info} {reason}"
-                            )
+                continue
+            if verbosity >= 2:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Vote id={vote_id}: created VoteAccepted(gender={gender}, age={age}, has_torn={has_torn})"
+                    )
+                )
+            if verbosity >= 3 and explanations[vote_id]:
+                for field in ("gender", "age", "has_torn"):
+                    fd = explanations[vote_id].get(field) or {}
+                    weights = fd.get("weights", {})
+                    candidates = fd.get("candidates", [])
+                    chosen = fd.get("chosen")
+                    reason = fd.get("reason", "")
+                    weights_str = ", ".join(
+                        f"{k}={v}" for k, v in sorted(weights.items(), key=lambda kv: str(kv[0]))
+                    )
+                    tie_info = " (tie)" if len(candidates) > 1 else ""
+                    self.stdout.write(
+                        self.style.NOTICE(
+                            f"  - {field}: weights[{weights_str}] -> {chosen}{tie_info} {reason}"
                         )
+                    )
 
         if created_count:
             self.stdout.write(
@@ -169,4 +286,26 @@ class Command(BaseCommand):
             )
         return created_count
 
-    
+    def _process_batch_sql(self, pending_votes, *, cycle_no: int, verbosity: int) -> int:
+        """Decide a batch of pending votes with the set-based SQL engine.
+
+        The weighted majority of the whole batch is computed by a single query
+        and all VoteAccepted rows are written with one bulk_create. Returns the
+        number of VoteAccepted created.
+        """
+        vote_ids = list(pending_votes.values_list("id", flat=True))
+        if verbosity >= 1:
+            self.stdout.write(
+                self.style.NOTICE(
+                    f"Cycle {cycle_no}: fetched {len(vote_ids)} pending votes to decide"
+                )
+            )
+        if not vote_ids:
+            return 0
+
+        created_count = accept_votes_bulk(vote_ids)
+        if created_count:
+            self.stdout.write(
+                self.style.SUCCESS(f"Created {created_count} VoteAccepted records.")
+            )
+        return created_count
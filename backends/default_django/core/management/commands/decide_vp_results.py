@@ -1,12 +1,20 @@
-from datetime import timedelta
-from time import sleep
+from time import monotonic, sleep
+from typing import List, Optional
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from django.utils import timezone
 
 from core.models import VotingPaperResult
-from core.utils import compute_voting_paper_result_decision
+from core.utils import (
+    Key,
+    ProposalListener,
+    accept_paper_decisions,
+    compute_voting_paper_result_decision,
+    pending_vp_results,
+    run_workers,
+    upcoming_vp_results,
+)
 
 
 class Command(BaseCommand):
@@ -28,18 +36,57 @@ class Command(BaseCommand):
             default=100,
             help="Max voting paper results to process per cycle (default: 100)",
         )
+        parser.add_argument(
+            "--listen",
+            action="store_true",
+            help=(
+                "Wait for NOTIFY from the voting paper result ingestion instead of "
+                "polling and decide only the notified results (requires DECIDER_NOTIFY)"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of forked worker processes; each claims a disjoint batch "
+                "with FOR UPDATE SKIP LOCKED (default: 1)"
+            ),
+        )
 
     def handle(self, *args, **options):
         sleep_seconds: float = options["sleep"]
         batch_size: int = options["batch_size"]
         verbosity: int = int(options.get("verbosity", 1))
+        workers: int = options["workers"]
 
         self.stdout.write(
             self.style.NOTICE(
-                f"decide_vp_results started; polling every {sleep_seconds}s, batch={batch_size}, verbosity={verbosity}."
+                f"decide_vp_results started; polling every {sleep_seconds}s, batch={batch_size}, workers={workers}, verbosity={verbosity}."
             )
         )
 
+        def run():
+            self._run(
+                listen=options["listen"],
+                sleep_seconds=sleep_seconds,
+                batch_size=batch_size,
+                verbosity=verbosity,
+            )
+
+        if workers > 1:
+            run_workers(workers, run)
+        else:
+            run()
+
+    def _run(self, *, listen: bool, sleep_seconds: float, batch_size: int, verbosity: int) -> None:
+        if listen:
+            try:
+                self._listen(batch_size=batch_size, verbosity=verbosity)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING("Shutting down decide_vp_results."))
+            return
+
         cycle_no = 0
         try:
             while True:
@@ -66,24 +113,79 @@ class Command(BaseCommand):
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING("Shutting down decide_vp_results."))
 
-    def _process_batch(self, *, batch_size: int, cycle_no: int, verbosity: int) -> int:
+    def _listen(self, *, batch_size: int, verbosity: int) -> None:
+        """Decide the notified results as soon as their deciding window closes."""
+        listener = ProposalListener(settings.VP_RESULT_PROPOSED_CHANNEL)
+        listener.listen()
+        self.stdout.write(
+            self.style.NOTICE(f"Listening on {settings.VP_RESULT_PROPOSED_CHANNEL}.")
+        )
+
+        # Notifications only cover new proposals: decide the backlog first,
+        # then wait for the proposals stored before LISTEN like notified ones
+        cycle_no = self._drain(batch_size=batch_size, cycle_no=0, verbosity=verbosity)
+        listener.schedule(upcoming_vp_results())
+
+        next_sweep = monotonic() + settings.DECIDE_SWEEP_SECONDS
+        while True:
+            keys = listener.wait(batch_size, timeout=max(next_sweep - monotonic(), 0))
+            if monotonic() >= next_sweep:
+                # Safety net for keys missed or dropped after a failed decision
+                cycle_no = self._drain(
+                    batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity
+                )
+                next_sweep = monotonic() + settings.DECIDE_SWEEP_SECONDS
+            if not keys:
+                continue
+            cycle_no += 1
+            processed = self._process_batch(
+                batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity, keys=keys
+            )
+            if verbosity >= 1:
+                self.stdout.write(
+                    self.style.NOTICE(
+                        f"Cycle {cycle_no}: processed {processed} of {len(keys)} notified voting paper results, {listener.pending_count} waiting"
+                    )
+                )
+
+    def _drain(self, *, batch_size: int, cycle_no: int, verbosity: int) -> int:
+        """Decide all the pending voting paper results, whatever their keys. Returns the last cycle_no."""
+        processed = None
+        while processed != 0:
+            cycle_no += 1
+            processed = self._process_batch(
+                batch_size=batch_size, cycle_no=cycle_no, verbosity=verbosity
+            )
+        return cycle_no
+
+    def _process_batch(
+        self,
+        *,
+        batch_size: int,
+        cycle_no: int,
+        verbosity: int,
+        keys: Optional[List[Key]] = None,
+    ) -> int:
         """Process up to batch_size VotingPaperResult lacking an accepted_candidate_party.
 
         Uses a small age window on proposals to avoid racing with in-flight submissions.
+        When keys is given, only the results with these (poll_office_id, index)
+        are considered. The batch is claimed with FOR UPDATE SKIP LOCKED and
+        stays locked until its decisions are committed, so concurrent workers
+        decide disjoint batches.
         Returns the number of VotingPaperResult updated with an accepted_candidate_party.
         """
-        updated_count = 0
-        five_min_ago = timezone.now() - timedelta(minutes=5)
-
         pending_qs = (
-            VotingPaperResult.objects
-            .filter(
-                accepted_candidate_party__isnull=True,
-                proposed_vp_results__created_at__lt=five_min_ago,
-            )
-            .order_by("id")[:batch_size]
+            pending_vp_results(keys)
+            .select_for_update(skip_locked=True)[:batch_size]
         )
+        with transaction.atomic():
+            return self._decide(pending_qs, cycle_no=cycle_no, verbosity=verbosity)
 
+    def _decide(self, pending_qs, *, cycle_no: int, verbosity: int) -> int:
+        """Decide the claimed voting paper results one by one and save the
+        decisions at once with accept_paper_decisions."""
+        decided = []
         vp_results = list(pending_qs)
         if verbosity >= 1:
             self.stdout.write(
@@ -126,7 +228,7 @@ class Command(BaseCommand):
                 # Idempotency: check it wasn't accepted concurrently
                 fresh = (
                     VotingPaperResult.objects.select_for_update()
-                    .only("id", "accepted_candidate_party_id")
+                    .only("id", "poll_office_id", "accepted_candidate_party_id")
                     .get(id=vpr.id)
                 )
                 if fresh.accepted_candidate_party_id is not None:
@@ -139,8 +241,7 @@ class Command(BaseCommand):
                     continue
 
                 fresh.accepted_candidate_party = chosen_party
-                fresh.save(update_fields=["accepted_candidate_party"])
-                updated_count += 1
+                decided.append(fresh)
 
                 if verbosity >= 2:
                     self.stdout.write(
@@ -164,6 +265,10 @@ class Command(BaseCommand):
                         )
                     )
 
+        # One write for the batch, in the transaction claiming it
+        accept_paper_decisions(decided)
+        updated_count = len(decided)
+
         if updated_count:
             self.stdout.write(
                 self.style.SUCCESS(
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from core.models import Vote, VoteVerified, VoteProposed, VoteAccepted
+from core.models import AreaCounters, AreaCoverage, LastAccepted, PollOfficeCounters, Vote, VoteBucket, VoteVerified, VoteProposed, VoteAccepted
+from core.utils import bump_versions_on_commit
 
 
 class Command(BaseCommand):
@@ -38,10 +39,24 @@ class Command(BaseCommand):
         # Delete in dependency-safe order (children first)
         with transaction.atomic():
             deleted = {}
+            bump_versions_on_commit(
+                [
+                    "votes:all",
+                    *(
+                        f"votes:{poll_office_id}"
+                        for poll_office_id in PollOfficeCounters.objects.values_list("pk", flat=True)
+                    ),
+                ]
+            )
             deleted["VoteAccepted"], _ = VoteAccepted.objects.all().delete()
             deleted["VoteVerified"], _ = VoteVerified.objects.all().delete()
             deleted["VoteProposed"], _ = VoteProposed.objects.all().delete()
             deleted["Vote"], _ = Vote.objects.all().delete()
+            PollOfficeCounters.objects.all().delete()
+            AreaCounters.objects.all().delete()
+            AreaCoverage.objects.update(reporting_offices=0)
+            VoteBucket.objects.all().delete()
+            LastAccepted.objects.filter(key__startswith="vote:").delete()
 
         self.stdout.write(self.style.SUCCESS("Deletion completed."))
         for model_name in ("VoteAccepted", "VoteVerified", "VoteProposed", "Vote"):
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
-from core.models import VotingPaperResult, VotingPaperResultProposed
+from core.models import AreaResult, LastAccepted, VotingPaperResult, VotingPaperResultProposed
 
 
 class Command(BaseCommand):
@@ -41,6 +41,8 @@ class Command(BaseCommand):
                 VotingPaperResultProposed.objects.all().delete()
             )
             deleted["VotingPaperResult"], _ = VotingPaperResult.objects.all().delete()
+            AreaResult.objects.all().delete()
+            LastAccepted.objects.filter(key__startswith="paper:").delete()
 
         self.stdout.write(self.style.SUCCESS("Deletion completed."))
         for model_name in ("VotingPaperResultProposed", "VotingPaperResult"):
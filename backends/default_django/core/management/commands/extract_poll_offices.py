@@ -14,6 +14,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction  # noqa: F401  (kept for backward compat; no DB writes)
 
 from core.models import PollOffice
+from core.text import normalize_text, strip_accents
 
 
 # Lazy import so the module remains importable without the dependency
@@ -28,23 +29,8 @@ def _import_pdfplumber():  # pragma: no cover - thin wrapper
         ) from exc
 
 
-def _strip_accents(s: str) -> str:
-    import unicodedata
-
-    nfkd = unicodedata.normalize("NFKD", s)
-    return "".join(ch for ch in nfkd if not unicodedata.combining(ch))
-
-
-def _norm(s: Optional[str]) -> str:
-    if s is None:
-        return ""
-    s = str(s).strip()
-    if not s:
-        return ""
-    s = _strip_accents(s).lower()
-    s = re.sub(r"\s+", " ", s)
-    s = s.strip(" :;,.|/\\-\u00a0")
-    return s
+_strip_accents = strip_accents
+_norm = normalize_text
 
 
 HEADER_SYNONYMS: Dict[str, set[str]] = {
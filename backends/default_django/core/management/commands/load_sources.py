@@ -10,6 +10,7 @@ from faker import Faker
 
 from core.enums import SourceType
 from core.models import Source, User
+from core.utils import bump_versions
 
 
 class Command(BaseCommand):
@@ -49,6 +50,7 @@ class Command(BaseCommand):
 
                        for i in range(to_create)]
         Source.objects.bulk_create(sources_tmp)
+        bump_versions(["sources"])
         self.stdout.write(
             self.style.NOTICE(
                 "Created sources. Done!"
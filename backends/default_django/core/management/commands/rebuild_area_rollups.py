@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from core.models import Area, AreaCounters, AreaResult, VotingPaperResult
+from core.utils import (
+    count_accepted_votes_by_poll_office,
+    poll_office_areas,
+    rebuild_area_coverage,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the AreaCounters, AreaResult and AreaCoverage rollups from "
+        "the VoteAccepted, VotingPaperResult and PollOffice rows. Deciders "
+        "keep running: their rollup updates wait for the rebuild."
+    )
+
+    def handle(self, *args, **options):
+        fields = AreaCounters.COUNTER_FIELDS
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for model in (AreaCounters, AreaResult):
+                    cursor.execute(
+                        f"LOCK TABLE {model._meta.db_table} IN EXCLUSIVE MODE"
+                    )
+
+            by_office = count_accepted_votes_by_poll_office()
+            ballots = list(
+                VotingPaperResult.objects.filter(accepted_candidate_party__isnull=False)
+                .values_list("poll_office_id", "accepted_candidate_party_id")
+                .annotate(ballots=Count("pk"))
+            )
+            areas = poll_office_areas(
+                list(by_office) + [poll_office_id for poll_office_id, _, _ in ballots]
+            )
+
+            counters = defaultdict(lambda: dict.fromkeys(fields, 0))
+            for poll_office_id, office_counters in by_office.items():
+                for area in areas.get(poll_office_id, []):
+                    for f in fields:
+                        counters[area][f] += office_counters[f]
+
+            results = defaultdict(int)
+            for poll_office_id, party_id, count in ballots:
+                for area in areas.get(poll_office_id, []):
+                    results[(*area, party_id)] += count
+
+            AreaCounters.objects.all().delete()
+            AreaCounters.objects.bulk_create(
+                [
+                    AreaCounters(**dict(zip(("level", *Area.LEVELS), area)), **area_counters)
+                    for area, area_counters in counters.items()
+                ],
+                batch_size=1000,
+            )
+            AreaResult.objects.all().delete()
+            AreaResult.objects.bulk_create(
+                [
+                    AreaResult(
+                        **dict(zip(("level", *Area.LEVELS, "party_id"), key)),
+                        ballots=count,
+                    )
+                    for key, count in results.items()
+                ],
+                batch_size=1000,
+            )
+            coverage = rebuild_area_coverage()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(counters)} area counters, {len(results)} area results "
+                f"and {coverage} area coverages."
+            )
+        )
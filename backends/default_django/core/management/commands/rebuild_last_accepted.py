@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from core.models import LastAccepted, Vote, VotingPaperResult
+from core.utils import update_last_papers, update_last_votes
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the LastAccepted pointers (last_vote / last_paper blocks) "
+        "from the accepted votes and voting paper results."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Deciders advancing a pointer wait for the rebuild
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"LOCK TABLE {LastAccepted._meta.db_table} IN EXCLUSIVE MODE"
+                )
+            LastAccepted.objects.all().delete()
+
+            vote_ids = list(
+                Vote.objects.filter(voteaccepted__isnull=False)
+                .values("poll_office_id")
+                .annotate(latest=Max("id"))
+                .values_list("latest", flat=True)
+            )
+            update_last_votes(vote_ids)
+
+            vpr_ids = list(
+                VotingPaperResult.objects.filter(accepted_candidate_party__isnull=False)
+                .values("poll_office_id")
+                .annotate(latest=Max("id"))
+                .values_list("latest", flat=True)
+            )
+            update_last_papers(vpr_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt last accepted pointers of {len(vote_ids)} poll offices "
+                f"with votes and {len(vpr_ids)} with voting paper results."
+            )
+        )
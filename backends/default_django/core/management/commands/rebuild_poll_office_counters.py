@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import PollOfficeCounters
+from core.utils import bump_versions_on_commit, count_accepted_votes_by_poll_office
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the PollOfficeCounters table from the VoteAccepted rows. "
+        "Deciders keep running: their counter updates wait for the rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the poll offices whose counters are wrong.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run: bool = options["dry_run"]
+        fields = PollOfficeCounters.COUNTER_FIELDS
+
+        with transaction.atomic():
+            if not dry_run:
+                # Block counter updates; their VoteAccepted rows are either
+                # committed (and counted below) or will add their delta after us
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"LOCK TABLE {PollOfficeCounters._meta.db_table} IN EXCLUSIVE MODE"
+                    )
+
+            expected = count_accepted_votes_by_poll_office()
+            current = {
+                row.pop("poll_office_id"): row
+                for row in PollOfficeCounters.objects.values("poll_office_id", *fields)
+            }
+
+            wrong = sorted(
+                poll_office_id
+                for poll_office_id in expected.keys() | current.keys()
+                if expected.get(poll_office_id, dict.fromkeys(fields, 0))
+                != current.get(poll_office_id, dict.fromkeys(fields, 0))
+            )
+            for poll_office_id in wrong:
+                self.stdout.write(
+                    f"  - poll office {poll_office_id}: {current.get(poll_office_id)} -> {expected.get(poll_office_id)}"
+                )
+
+            if dry_run:
+                self.stdout.write(
+                    self.style.NOTICE(f"{len(wrong)} poll offices have wrong counters.")
+                )
+                return
+
+            bump_versions_on_commit(
+                ["votes:all", *(f"votes:{poll_office_id}" for poll_office_id in wrong)]
+            )
+            PollOfficeCounters.objects.all().delete()
+            PollOfficeCounters.objects.bulk_create(
+                [
+                    PollOfficeCounters(poll_office_id=poll_office_id, **counters)
+                    for poll_office_id, counters in expected.items()
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt counters of {len(expected)} poll offices ({len(wrong)} were wrong)."
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import PollOffice
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute PollOffice.search_text, e.g. after adding the column or "
+        "loading offices with a raw bulk insert."
+    )
+
+    def handle(self, *args, **options):
+        offices = []
+        changed = 0
+        queryset = PollOffice.objects.only("pk", "search_text", *PollOffice.SEARCH_FIELDS)
+        for office in queryset.iterator(chunk_size=2000):
+            before = office.search_text
+            office.refresh_search_text()
+            if office.search_text != before:
+                offices.append(office)
+            if len(offices) >= 1000:
+                changed += len(offices)
+                PollOffice.objects.bulk_update(offices, ["search_text"])
+                offices = []
+        changed += len(offices)
+        PollOffice.objects.bulk_update(offices, ["search_text"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the search text of {changed} poll offices.")
+        )
@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import VoteAccepted, VoteBucket
+from core.utils import (
+    SERIES_GLOBAL,
+    bucket_start,
+    poll_office_areas,
+    series_scope,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the VoteBucket time series from the VoteAccepted rows. "
+        "Deciders keep running: their bucket updates wait for the rebuild."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"LOCK TABLE {VoteBucket._meta.db_table} IN EXCLUSIVE MODE"
+                )
+
+            # Accepted votes per poll office and finest bucket
+            finest = min(settings.VOTE_BUCKET_WIDTHS)
+            by_office = defaultdict(lambda: defaultdict(int))
+            for created_at, poll_office_id in VoteAccepted.objects.values_list(
+                "created_at", "vote__poll_office_id"
+            ).iterator(chunk_size=5000):
+                by_office[poll_office_id][bucket_start(created_at, finest)] += 1
+            areas = poll_office_areas(by_office)
+
+            buckets = defaultdict(int)
+            for poll_office_id, counts in by_office.items():
+                scopes = [
+                    SERIES_GLOBAL,
+                    series_scope(poll_office_id),
+                    *(series_scope(area=area) for area in areas.get(poll_office_id, [])),
+                ]
+                for start, count in counts.items():
+                    for width in settings.VOTE_BUCKET_WIDTHS:
+                        for scope in scopes:
+                            buckets[(scope, width, bucket_start(start, width))] += count
+
+            VoteBucket.objects.all().delete()
+            VoteBucket.objects.bulk_create(
+                [
+                    VoteBucket(scope=scope, width=width, start=start, votes=votes)
+                    for (scope, width, start), votes in buckets.items()
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(buckets)} vote buckets of {len(by_office)} poll offices."
+            )
+        )
@@ -6,14 +6,18 @@ from pathlib import Path
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from core.models import PollOffice
-from core.serializers import PollOfficeSerializer
+from core.utils import (
+    POLL_OFFICE_BUNDLE_FORMATS,
+    build_poll_office_bundle,
+    serialize_poll_offices,
+)
 
 
 class Command(BaseCommand):
     help = (
         "Serialize all PollOffice records using PollOfficeSerializer and "
-        "save them to poll_offices.json"
+        "save them to poll_offices.json, or write the gzip bundle served by "
+        "/api/polloffices/bundle/ with --bundle"
     )
 
     def add_arguments(self, parser):
@@ -33,17 +37,38 @@ class Command(BaseCommand):
             default=2,
             help="JSON indentation (default: 2)",
         )
+        parser.add_argument(
+            "--bundle",
+            choices=POLL_OFFICE_BUNDLE_FORMATS,
+            default=None,
+            help=(
+                "Write the gzip compressed bundle in this format instead of "
+                "indented JSON (default output: BASE_DIR/poll_offices.<format>.gz)"
+            ),
+        )
 
     def handle(self, *args, **options):
         # Resolve output path
         base_dir: Path = Path(getattr(settings, "BASE_DIR", Path.cwd()))
         output_opt: str | None = options.get("output")
+        bundle: str | None = options.get("bundle")
+        if bundle:
+            output_path = (
+                Path(output_opt) if output_opt else base_dir / f"poll_offices.{bundle}.gz"
+            )
+            body = build_poll_office_bundle(bundle)
+            output_path.write_bytes(body)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Saved the {bundle} bundle ({len(body)} bytes) to {output_path}"
+                )
+            )
+            return
+
         output_path = Path(output_opt) if output_opt else base_dir / "poll_offices.json"
 
         # Fetch and serialize poll offices deterministically
-        queryset = PollOffice.objects.all().order_by("identifier", "id")
-        serializer = PollOfficeSerializer(queryset, many=True)
-        data = serializer.data
+        data = serialize_poll_offices()
 
         # Write JSON file
         indent = int(options.get("indent") or 2)
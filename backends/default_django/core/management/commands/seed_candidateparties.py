@@ -9,6 +9,7 @@ from django.utils.text import slugify
 from faker import Faker
 
 from core.models import CandidateParty
+from core.utils import bump_versions_on_commit
 
 
 def fake_party_name(fake: Faker) -> str:
@@ -70,6 +71,7 @@ class Command(BaseCommand):
 
         with transaction.atomic():
             CandidateParty.objects.bulk_create(objects, ignore_conflicts=True)
+            bump_versions_on_commit(["candidateparties"])
 
         self.stdout.write(self.style.SUCCESS(f"Created {len(objects)} CandidateParty records."))
 
@@ -9,6 +9,7 @@ from django.db import transaction
 from faker import Faker
 
 from core.models import PollOffice
+from core.utils import bump_versions_on_commit, rebuild_area_coverage
 
 
 def safe_fake_attr(fake: Faker, attr: str) -> Optional[str]:
@@ -86,8 +87,13 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"[dry-run] Prepared {len(objects)} PollOffice instances (not saved)."))
             return
 
+        for office in objects:
+            office.refresh_search_text()
+
         with transaction.atomic():
             PollOffice.objects.bulk_create(objects, ignore_conflicts=True)
+            rebuild_area_coverage()
+            bump_versions_on_commit(["polloffices"])
 
         self.stdout.write(self.style.SUCCESS(f"Created {len(objects)} PollOffice records."))
 
@@ -11,6 +11,7 @@ from faker import Faker
 
 from core.enums import SourceType
 from core.models import Source
+from core.utils import bump_versions_on_commit
 
 
 def generate_elector_id() -> str:
@@ -127,5 +128,6 @@ class Command(BaseCommand):
 
         with transaction.atomic():
             created = Source.objects.bulk_create([p[0] for p in prepared])
+            bump_versions_on_commit(["sources"])
 
         self.stdout.write(self.style.SUCCESS(f"Created {created} Source records."))
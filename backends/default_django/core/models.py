@@ -1,6 +1,8 @@
 from django.contrib.auth.hashers import check_password as django_check_password
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 from .gen.models import (
@@ -16,6 +18,7 @@ from .gen.models import (
     GeneratedVotingPaperResult,
     GeneratedVotingPaperResultProposed,
 )
+from .text import normalize_text
 
 
 class User(AbstractUser):
@@ -57,17 +60,65 @@ class Source(GeneratedSource):
 
 class PollOffice(GeneratedPollOffice):
 
-    pass
+    SEARCH_FIELDS = ("identifier", "name", "city")
+
+    # normalize_text() of SEARCH_FIELDS, trigram indexed for
+    # /api/polloffices/search/
+    search_text = models.TextField(default="", editable=False)
+
+    class Meta(GeneratedPollOffice.Meta):
+
+        indexes = [
+            GinIndex(
+                fields=["search_text"],
+                opclasses=["gin_trgm_ops"],
+                name="polloffice_search_trgm_idx",
+            ),
+        ]
+
+    def refresh_search_text(self):
+        """Set search_text from SEARCH_FIELDS; bulk_create does not call save()."""
+        self.search_text = " ".join(
+            filter(None, (normalize_text(getattr(self, f)) for f in self.SEARCH_FIELDS))
+        )
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "search_text"}
+        return super().save(*args, **kwargs)
 
 
 class Vote(GeneratedVote):
 
-    pass
+    class Meta(GeneratedVote.Meta):
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["poll_office", "index"],
+                name="unique_vote_poll_office_index",
+            ),
+        ]
 
 
 class VoteProposed(GeneratedVoteProposed):
 
-    pass
+    class Meta(GeneratedVoteProposed.Meta):
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vote", "source"],
+                name="unique_voteproposed_vote_source",
+            ),
+        ]
+        indexes = [
+            # Deciders join proposals on vote and filter on their age
+            models.Index(
+                fields=["vote", "created_at"],
+                name="voteproposed_vote_created_idx",
+            ),
+        ]
 
 
 class Voter(GeneratedVoter):
@@ -92,14 +143,221 @@ class CandidateParty(GeneratedCandidateParty):
 
 class VotingPaperResult(GeneratedVotingPaperResult):
 
-    pass
+    class Meta(GeneratedVotingPaperResult.Meta):
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["poll_office", "index"],
+                name="unique_vpresult_poll_office_index",
+            ),
+        ]
+        indexes = [
+            # Undecided papers, scanned in id order by decide_vp_results
+            models.Index(
+                fields=["id"],
+                condition=models.Q(accepted_candidate_party__isnull=True),
+                name="vpresult_undecided_idx",
+            ),
+            # Per office results grouped by accepted party
+            models.Index(
+                fields=["poll_office", "accepted_candidate_party"],
+                name="vpresult_office_party_idx",
+            ),
+        ]
 
 
 class VotingPaperResultProposed(GeneratedVotingPaperResultProposed):
 
-    pass
+    class Meta(GeneratedVotingPaperResultProposed.Meta):
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vp_result", "source"],
+                name="unique_vpresultproposed_vp_result_source",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["vp_result", "created_at"],
+                name="vprproposed_vpr_created_idx",
+            ),
+        ]
 
 
 class SourceToken(GeneratedSourceToken):
 
-    pass
+    class Meta(GeneratedSourceToken.Meta):
+
+        indexes = [
+            # Token reuse lookup in AuthenticateView
+            models.Index(
+                fields=["source", "poll_office"],
+                name="sourcetoken_source_office_idx",
+            ),
+        ]
+
+
+class VoteCounters(models.Model):
+    """Running totals of accepted votes, see core.utils.bump_poll_office_counters."""
+
+    votes = models.PositiveIntegerField(default=0)
+    male = models.PositiveIntegerField(default=0)
+    female = models.PositiveIntegerField(default=0)
+    less_30 = models.PositiveIntegerField(default=0)
+    less_60 = models.PositiveIntegerField(default=0)
+    more_60 = models.PositiveIntegerField(default=0)
+    has_torn = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = (
+        "votes",
+        "male",
+        "female",
+        "less_30",
+        "less_60",
+        "more_60",
+        "has_torn",
+    )
+
+    class Meta:
+
+        abstract = True
+
+
+class PollOfficeCounters(VoteCounters):
+    """Running totals of the accepted votes of a poll office.
+
+    Maintained in the transaction that inserts the VoteAccepted rows (see
+    core.utils.bump_poll_office_counters) and rebuilt from the raw rows by
+    the rebuild_poll_office_counters command.
+    """
+
+    poll_office = models.OneToOneField(
+        PollOffice,
+        models.CASCADE,
+        primary_key=True,
+        related_name="counters",
+    )
+
+
+class Area(models.Model):
+    """A node of the country > region > city > district hierarchy.
+
+    Fields below the level are empty strings, as are unknown PollOffice
+    fields, so the area is a unique key.
+    """
+
+    LEVELS = ("country", "region", "city", "district")
+
+    level = models.CharField(
+        max_length=16, choices=[(level, level) for level in LEVELS]
+    )
+    country = models.CharField(max_length=255, default="")
+    region = models.CharField(max_length=255, default="")
+    city = models.CharField(max_length=255, default="")
+    district = models.CharField(max_length=255, default="")
+
+    class Meta:
+
+        abstract = True
+
+
+class AreaCounters(Area, VoteCounters):
+    """Running totals of the accepted votes of an area, kept with PollOfficeCounters."""
+
+    class Meta:
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["level", "country", "region", "city", "district"],
+                name="unique_areacounters_area",
+            ),
+        ]
+
+
+class AreaCoverage(Area):
+    """Registered voters and reporting poll offices of an area.
+
+    poll_offices and voters_count follow the PollOffice saves and deletes
+    (see core.utils.update_area_coverage_on_change) and are rebuilt when
+    offices are loaded (see core.utils.rebuild_area_coverage);
+    reporting_offices, the offices with at least one accepted vote, is kept
+    with PollOfficeCounters by core.utils.bump_poll_office_counters.
+    """
+
+    COVERAGE_FIELDS = ("poll_offices", "voters_count", "reporting_offices")
+
+    poll_offices = models.PositiveIntegerField(default=0)
+    voters_count = models.PositiveBigIntegerField(default=0)
+    reporting_offices = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["level", "country", "region", "city", "district"],
+                name="unique_areacoverage_area",
+            ),
+        ]
+
+
+class AreaResult(Area):
+    """Accepted ballots of a CandidateParty in an area.
+
+    Maintained in the transaction accepting the VotingPaperResult (see
+    core.utils.bump_area_results).
+    """
+
+    party = models.ForeignKey(CandidateParty, models.CASCADE, related_name="+")
+    ballots = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["level", "country", "region", "city", "district", "party"],
+                name="unique_arearesult_area_party",
+            ),
+        ]
+
+
+class VoteBucket(models.Model):
+    """Accepted votes of a scope in the width seconds starting at start.
+
+    scope is core.utils.series_scope(): "all", a poll office or an area.
+    Maintained with PollOfficeCounters by core.utils.bump_poll_office_counters
+    for each of settings.VOTE_BUCKET_WIDTHS, rebuilt by the
+    rebuild_vote_buckets command.
+    """
+
+    scope = models.CharField(max_length=1024)
+    width = models.PositiveIntegerField()
+    start = models.DateTimeField()
+    votes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "width", "start"],
+                name="unique_votebucket_scope_width_start",
+            ),
+        ]
+
+
+class LastAccepted(models.Model):
+    """Latest accepted vote or voting paper, globally and per poll office.
+
+    key is core.utils.last_accepted_key(kind, poll_office_id) and snapshot
+    the last_vote / last_paper block of the stats and results responses,
+    so they are served from one row. Advanced by core.utils.update_last_votes
+    and update_last_papers, rebuilt by the rebuild_last_accepted command.
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    ref_id = models.BigIntegerField()
+    snapshot = models.JSONField(encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
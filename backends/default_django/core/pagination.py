@@ -0,0 +1,105 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination that can page on the primary key and skip COUNT.
+
+    ?after={id} returns the limit rows following that id in id order, so
+    every page costs one index range scan; start with ?after=0 and follow
+    next. ?count=false keeps offset paging but drops the COUNT(*) query.
+    Both return {next, results} (plus previous for offsets) and detect the
+    next page by fetching one extra row. Without these parameters the
+    response is the usual {count, next, previous, results}.
+    """
+
+    after_query_param = "after"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.after_query_param in request.query_params
+        self.counted = (
+            not self.keyset
+            and request.query_params.get(self.count_query_param, "true").lower()
+            not in ("false", "0")
+        )
+        if self.counted:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        if self.keyset:
+            self.offset = 0
+            after = request.query_params[self.after_query_param]
+            if not after.isnumeric():
+                raise ValidationError({self.after_query_param: ["Must be an id."]})
+            queryset = queryset.order_by("pk").filter(pk__gt=int(after))
+        else:
+            self.offset = self.get_offset(request)
+
+        rows = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.page = rows[: self.limit]
+        return self.page
+
+    def get_next_link(self):
+        if self.counted:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        if self.keyset:
+            return replace_query_param(url, self.after_query_param, self.page[-1].pk)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_previous_link(self):
+        if self.counted:
+            return super().get_previous_link()
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        if self.offset - self.limit <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, self.offset - self.limit)
+
+    def get_paginated_response(self, data):
+        if self.counted:
+            return super().get_paginated_response(data)
+        response = OrderedDict([("next", self.get_next_link())])
+        if not self.keyset:
+            response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        paginated = super().get_paginated_response_schema(schema)
+        # count is absent with ?after= or ?count=false
+        paginated["required"] = ["results"]
+        return paginated
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.after_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Return the rows after this id, in id order.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "false skips the total count.",
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -0,0 +1,335 @@
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger("api")
+
+# First file descriptor of systemd socket activation (sd_listen_fds(3)): the
+# workers hand their listener to pyruvate.serve(application, None, ...)
+LISTEN_FDS_START = 3
+
+# A retiring worker writes its pid to the master's pipe for a replacement,
+# then keeps accepting for HANDOVER_SECONDS while the replacement starts
+HANDOVER_SECONDS = 1.0
+
+
+class RecyclingApplication:
+    """WSGI middleware retiring its worker after max_requests requests.
+
+    Past the limit the worker calls stop_accepting, so new connections go
+    to the other workers, serves what it already accepted until no request
+    has been in flight for linger seconds, or for at most grace seconds
+    (long lived streams), then calls retire (os._exit by default) and
+    PreforkServer forks a fresh worker. Bounds the per-process caches such
+    as core.authentication.TokenCache.
+    """
+
+    def __init__(
+        self,
+        application,
+        max_requests: int,
+        stop_accepting: Callable[[], None],
+        linger: float = 1.0,
+        grace: float = 30,
+        retire: Optional[Callable[[], None]] = None,
+    ):
+        self.application = application
+        self.max_requests = max_requests
+        self.stop_accepting = stop_accepting
+        self.linger = linger
+        self.grace = grace
+        self.retire = retire or (lambda: os._exit(0))
+        self.served = 0
+        self.in_flight = 0
+        self._last_done = time.monotonic()
+        self._retiring = False
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.served += 1
+            self.in_flight += 1
+            if self.served >= self.max_requests and not self._retiring:
+                self._retiring = True
+                threading.Thread(target=self._retire_when_idle, daemon=True).start()
+        try:
+            return _ClosingIterator(self.application(environ, start_response), self._done)
+        except BaseException:
+            self._done()
+            raise
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._last_done = time.monotonic()
+
+    def _retire_when_idle(self):
+        self.stop_accepting()
+        deadline = time.monotonic() + self.grace
+        while time.monotonic() < deadline:
+            with self._lock:
+                idle = not self.in_flight and time.monotonic() - self._last_done >= self.linger
+            if idle:
+                break
+            time.sleep(min(self.linger, 0.1))
+        else:
+            logger.warning("Worker %s retiring with %s requests in flight", os.getpid(), self.in_flight)
+        self.retire()
+
+
+class _ClosingIterator:
+    """Response body calling on_close once, when exhausted or closed.
+
+    pyruvate does not always close() the bodies it has sent.
+    """
+
+    def __init__(self, result, on_close):
+        self._result = result
+        self._iterator = iter(result)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        try:
+            if hasattr(self._result, "close"):
+                self._result.close()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+
+def _reuseport_socket(address: Tuple[str, int]) -> socket.socket:
+    family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(address)
+    return sock
+
+
+def _move_to_listen_fd(sock: socket.socket) -> None:
+    """Put sock on LISTEN_FDS_START and close its original descriptor."""
+    if sock.fileno() != LISTEN_FDS_START:
+        os.dup2(sock.fileno(), LISTEN_FDS_START)
+        sock.close()
+    else:
+        sock.detach()
+
+
+class PreforkServer:
+    """Serve a preloaded WSGI application from forked pyruvate processes.
+
+    bind() reserves the "host:port" address, and LISTEN_FDS_START, before
+    anything else claims them; run() forks workers processes of threads
+    threads, replaces the ones that retire or crash and stops them all on
+    SIGTERM or SIGINT. Load the application before run() so the workers
+    share its memory.
+
+    Each worker listens on its own SO_REUSEPORT socket: the kernel spreads
+    the connections over them, and a retiring worker closes its own to stop
+    receiving new ones before it drains.
+
+    The signal handlers only set flags: forking, reaping and signalling the
+    workers happen in the main loop, woken by signal.set_wakeup_fd.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        workers: int = 0,
+        threads: int = 4,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+    ):
+        self.address = address
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.bound: Optional[Tuple[str, int]] = None
+        self._application = None
+        self._children: Dict[int, float] = {}
+        self._retiring: Set[int] = set()
+        self._retire_pipe: Optional[Tuple[int, int]] = None
+        self._wakeup: Optional[Tuple[int, int]] = None
+        self._stopping = False
+
+    def bind(self) -> Tuple[str, int]:
+        """Bind, without listening, so the address is checked and kept."""
+        host, port = self.address.rsplit(":", 1)
+        placeholder = _reuseport_socket((host.strip("[]"), int(port)))
+        self.bound = placeholder.getsockname()[:2]
+        if placeholder.fileno() != LISTEN_FDS_START:
+            try:
+                os.fstat(LISTEN_FDS_START)
+            except OSError:
+                pass
+            else:
+                placeholder.close()
+                raise RuntimeError(
+                    f"File descriptor {LISTEN_FDS_START} is in use, call bind() first"
+                )
+        # A bound socket that does not listen gets no connection
+        _move_to_listen_fd(placeholder)
+        return self.bound
+
+    def run(self, application) -> None:
+        if self.bound is None:
+            self.bind()
+        self._application = application
+        self._retire_pipe = os.pipe()
+        os.set_blocking(self._retire_pipe[0], False)
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        # Only there to write to the wakeup fd when a worker exits
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        logger.info(
+            "Serving on %s with %s workers of %s threads",
+            self.address,
+            self.workers,
+            self.threads,
+        )
+
+        for _ in range(self.workers):
+            self._spawn(application)
+        stopped = False
+        while self._children:
+            select.select([self._wakeup[0], self._retire_pipe[0]], [], [], 1.0)
+            try:
+                while os.read(self._wakeup[0], 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            if self._stopping and not stopped:
+                stopped = True
+                for pid in list(self._children):
+                    try:
+                        os.kill(pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+            # Before reaping, so a retired worker is not respawned as crashed
+            self._replace_retiring()
+            self._reap()
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+
+    def _replace_retiring(self) -> None:
+        """Fork a replacement for each worker that announced its retirement."""
+        while True:
+            try:
+                data = os.read(self._retire_pipe[0], 4096)
+            except BlockingIOError:
+                return
+            for (pid,) in struct.iter_unpack("i", data):
+                if pid in self._children and pid not in self._retiring:
+                    self._retiring.add(pid)
+                    if not self._stopping:
+                        self._spawn(self._application)
+
+    def _reap(self) -> None:
+        """Collect the exited workers and replace those that did not retire."""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+            if not pid:
+                return
+            started = self._children.pop(pid, None)
+            if pid in self._retiring:
+                # Its replacement is already serving
+                self._retiring.discard(pid)
+                continue
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.error("Worker %s exited with %s", pid, code)
+            if time.monotonic() - started < 1:
+                # Crashing at startup: do not fork in a tight loop
+                time.sleep(1)
+            self._spawn(self._application)
+
+    def _spawn(self, application) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.monotonic()
+            return
+        try:
+            self._serve(application)
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+        os._exit(1)
+
+    def _serve(self, application) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        for fd in (*self._wakeup, self._retire_pipe[0]):
+            os.close(fd)
+
+        listener = _reuseport_socket(self.bound)
+        listener.listen(1024)
+        _move_to_listen_fd(listener)
+        os.environ["LISTEN_FDS"] = "1"
+        os.environ["LISTEN_PID"] = str(os.getpid())
+        os.environ.pop("LISTEN_FDNAMES", None)
+
+        if self.max_requests:
+            application = RecyclingApplication(
+                application,
+                self.max_requests + random.randint(0, self.max_requests_jitter),
+                stop_accepting=self._hand_over,
+            )
+
+        import pyruvate
+
+        # Only returns on errors: a retiring worker exits in RecyclingApplication
+        pyruvate.serve(application, None, self.threads)
+
+    def _hand_over(self) -> None:
+        """Have the master fork a replacement, then close the worker's
+        listener behind pyruvate's back.
+
+        Its descriptor is replaced by an unbound socket, so the kernel stops
+        routing connections to this worker, the listener leaves pyruvate's
+        poller and no other file can take its descriptor number.
+
+        Relies on pyruvate (checked with 1.6) registering the
+        LISTEN_FDS_START listener with its epoll poller once, at startup,
+        and only accepting when the poller reports it readable: closing the
+        listener's last descriptor removes it from the epoll set, and the
+        unbound socket taking its number is never registered nor accepted
+        on. The connections already accepted are kept, on their own
+        descriptors.
+        """
+        os.write(self._retire_pipe[1], struct.pack("i", os.getpid()))
+        time.sleep(HANDOVER_SECONDS)
+        unbound = socket.socket()
+        os.dup2(unbound.fileno(), LISTEN_FDS_START)
+        unbound.close()
@@ -1,14 +1,19 @@
+from django.conf import settings
 from django.db import transaction
 from rest_framework.fields import (
     BooleanField,
     CharField,
     ChoiceField,
+    DateTimeField,
+    DictField,
     FloatField,
     IntegerField,
     JSONField,
+    ListField,
 )
 from rest_framework.serializers import Serializer
 
+from .authentication import CachedSourceToken
 from .enums import Age, Gender
 from .gen.serializers import (
     GeneratedCandidatePartySerializer,
@@ -36,6 +41,7 @@ from .models import (
     VotingPaperResult,
     VotingPaperResultProposed,
 )
+from .utils import notify_proposed
 
 
 class SourceSerializer(GeneratedSourceSerializer):
@@ -54,6 +60,15 @@ class PollOfficeSerializer(GeneratedPollOfficeSerializer):
         fields = GeneratedPollOfficeSerializer.Meta.fields + []
 
 
+class PollOfficeCompactSerializer(GeneratedPollOfficeSerializer):
+    """The fields of the office picker, for ?fields=compact."""
+
+    class Meta:
+
+        model = PollOffice
+        fields = ["id", "identifier", "name", "city"]
+
+
 class VoteSerializer(GeneratedVoteSerializer):
 
     class Meta:
@@ -140,6 +155,29 @@ class SourceTokenSerializer(GeneratedSourceTokenSerializer):
         fields = GeneratedSourceTokenSerializer.Meta.fields + []
 
 
+def _upsert_ballots(model, poll_office_id, indexes):
+    """Return {index: row} of model, Vote or VotingPaperResult, for the
+    given indexes of a poll office.
+
+    Relies on the (poll_office, index) unique constraint: INSERT ... ON
+    CONFLICT DO NOTHING creates the missing rows without writing or locking
+    the existing ones, so concurrent proposers of a ballot do not wait on
+    each other, then one SELECT reads them all.
+    """
+    indexes = sorted(set(indexes))
+    model.objects.bulk_create(
+        [model(poll_office_id=poll_office_id, index=index) for index in indexes],
+        ignore_conflicts=True,
+    )
+    rows = model.objects.filter(poll_office_id=poll_office_id, index__in=indexes)
+    return {row.index: row for row in rows}
+
+
+def _upsert_votes(poll_office_id, indexes):
+    """Return {index: Vote} for the given indexes of a poll office."""
+    return _upsert_ballots(Vote, poll_office_id, indexes)
+
+
 class VoteInputSerializer(Serializer):
     index = IntegerField()
     gender = ChoiceField(choices=Gender.choices())
@@ -148,34 +186,26 @@ class VoteInputSerializer(Serializer):
 
     def save(self, **kwargs):
         request = self.context.get("request")
-        source_token: SourceToken = request.source_token
+        source_token: CachedSourceToken = request.source_token
         poll_office_id = source_token.poll_office_id
+        index = self.validated_data["index"]
 
-        with transaction.atomic():
-            poll_office = PollOffice.objects.select_for_update().get(
-                pk=poll_office_id
-            )
-            vote, created = Vote.objects.get_or_create(
-                poll_office=poll_office, index=self.validated_data["index"]
-            )
-            vote_proposed: VoteProposed = VoteProposed.objects.filter(
-                vote=vote, source=source_token.source
-            ).first()
-            if not vote_proposed:
-                vote_proposed = VoteProposed.objects.create(
+        vote = _upsert_votes(poll_office_id, [index])[index]
+        vote_proposed, = VoteProposed.objects.bulk_create(
+            [
+                VoteProposed(
                     vote=vote,
-                    source=source_token.source,
+                    source_id=source_token.source_id,
                     gender=self.validated_data.get("gender"),
                     age=self.validated_data.get("age"),
                     has_torn=self.validated_data.get("has_torn", False),
                 )
-            else:
-                vote_proposed.gender = self.validated_data.get("gender")
-                vote_proposed.age = self.validated_data.get("age")
-                vote_proposed.has_torn = self.validated_data.get(
-                    "has_torn", False
-                )
-                vote_proposed.save()
+            ],
+            update_conflicts=True,
+            unique_fields=["vote", "source"],
+            update_fields=["gender", "age", "has_torn"],
+        )
+        notify_proposed(settings.VOTE_PROPOSED_CHANNEL, poll_office_id, [index])
 
         return vote_proposed
 
@@ -185,40 +215,137 @@ class VoteResponseSerializer(Serializer):
     index = IntegerField()
 
 
-class VotingPaperResultInputSerializer(Serializer):
-    index = IntegerField()
-    party_id = CharField()
+class VoteBatchInputSerializer(Serializer):
+    votes = ListField(
+        child=DictField(),
+        allow_empty=False,
+        max_length=settings.VOTE_BATCH_MAX_SIZE,
+    )
 
     def save(self, **kwargs):
+        """Save a backlog of ballots for the token's poll office at once.
+
+        Each item is validated with VoteInputSerializer and gets its own status
+        (created, updated, duplicate or invalid) so a bad item never rejects
+        the whole batch. When an index is sent twice, the last item wins.
+        Returns the list of per-item results in the input order.
+        """
         request = self.context.get("request")
-        source_token: SourceToken = request.source_token
+        source_token: CachedSourceToken = request.source_token
         poll_office_id = source_token.poll_office_id
+        source_id = source_token.source_id
+
+        results = []
+        by_index = {}
+        for position, item in enumerate(self.validated_data["votes"]):
+            item_seria = VoteInputSerializer(data=item)
+            if not item_seria.is_valid():
+                results.append(
+                    {
+                        "position": position,
+                        "index": item.get("index"),
+                        "status": "invalid",
+                        "errors": item_seria.errors,
+                    }
+                )
+                continue
+
+            data = item_seria.validated_data
+            result = {"position": position, "index": data["index"]}
+            previous = by_index.get(data["index"])
+            if previous:
+                previous[0]["status"] = "duplicate"
+            by_index[data["index"]] = (result, data)
+            results.append(result)
+
+        if not by_index:
+            return results
 
         with transaction.atomic():
-            poll_office = PollOffice.objects.select_for_update().get(
-                pk=poll_office_id
+            votes = _upsert_votes(poll_office_id, by_index)
+            # Only used to label items; the upsert below is what persists them
+            existing = set(
+                VoteProposed.objects.filter(
+                    source_id=source_id,
+                    vote_id__in=[vote.pk for vote in votes.values()],
+                ).values_list("vote_id", flat=True)
             )
-            voting_paper_result, created = (
-                VotingPaperResult.objects.get_or_create(
-                    poll_office=poll_office, index=self.validated_data["index"]
+
+            saved = []
+            for index in sorted(by_index):
+                result, data = by_index[index]
+                vote = votes[index]
+                result["status"] = (
+                    "updated" if vote.pk in existing else "created"
                 )
-            )
-            vp_result_proposed: VotingPaperResultProposed = (
-                VotingPaperResultProposed.objects.filter(
-                    vp_result=voting_paper_result, source=source_token.source
-                ).first()
-            )
-            candidate_party = CandidateParty.objects.get(
-                identifier=self.validated_data["party_id"]
-            )
-            vp_result_proposed = (
-                VotingPaperResultProposed.objects.get_or_create(
-                    vp_result=voting_paper_result,
-                    source=source_token.source,
-                    defaults={"party_candidate": candidate_party},
+                vote_proposed = VoteProposed(
+                    vote=vote,
+                    source_id=source_id,
+                    gender=data.get("gender"),
+                    age=data.get("age"),
+                    has_torn=data.get("has_torn", False),
                 )
+                saved.append((result, vote_proposed))
+
+            VoteProposed.objects.bulk_create(
+                [vote_proposed for result, vote_proposed in saved],
+                update_conflicts=True,
+                unique_fields=["vote", "source"],
+                update_fields=["gender", "age", "has_torn"],
+            )
+            notify_proposed(
+                settings.VOTE_PROPOSED_CHANNEL, poll_office_id, sorted(by_index)
             )
 
+        for result, vote_proposed in saved:
+            result["id"] = vote_proposed.pk
+
+        return results
+
+
+class VoteBatchItemResultSerializer(Serializer):
+    position = IntegerField()
+    index = IntegerField(allow_null=True)
+    status = CharField()
+    id = IntegerField(required=False)
+    errors = JSONField(required=False)
+
+
+class VoteBatchResponseSerializer(Serializer):
+    results = VoteBatchItemResultSerializer(many=True)
+
+
+class VotingPaperResultInputSerializer(Serializer):
+    index = IntegerField()
+    party_id = CharField()
+
+    def save(self, **kwargs):
+        request = self.context.get("request")
+        source_token: CachedSourceToken = request.source_token
+        poll_office_id = source_token.poll_office_id
+
+        candidate_party = CandidateParty.objects.get(
+            identifier=self.validated_data["party_id"]
+        )
+        index = self.validated_data["index"]
+        voting_paper_result = _upsert_ballots(
+            VotingPaperResult, poll_office_id, [index]
+        )[index]
+        # First proposal of a source wins: ON CONFLICT DO NOTHING
+        vp_result_proposed = VotingPaperResultProposed(
+            vp_result=voting_paper_result,
+            source_id=source_token.source_id,
+            party_candidate=candidate_party,
+        )
+        VotingPaperResultProposed.objects.bulk_create(
+            [vp_result_proposed], ignore_conflicts=True
+        )
+        notify_proposed(
+            settings.VP_RESULT_PROPOSED_CHANNEL,
+            poll_office_id,
+            [index],
+        )
+
         return vp_result_proposed
 
 
@@ -248,6 +375,14 @@ class PollOfficeStatsSerializer(Serializer):
     last_vote = PollOfficeStatLastVotePartSerializer()
 
 
+class PollOfficeStatsEntrySerializer(PollOfficeStatsSerializer):
+    identifier = CharField()
+
+
+class PollOfficeStatsBulkSerializer(Serializer):
+    offices = DictField(child=PollOfficeStatsEntrySerializer())
+
+
 class PollOfficeResultLastPaperPartSerializer(Serializer):
     index = IntegerField()
     party_id = CharField()
@@ -259,6 +394,62 @@ class PollOfficeResultResultPartSerializer(Serializer):
     share = FloatField()
 
 
+class AreaPartSerializer(Serializer):
+    level = CharField()
+    country = CharField()
+    region = CharField()
+    city = CharField()
+    district = CharField()
+
+
+class AreaStatsSerializer(AreaPartSerializer):
+    totals = PollOfficeStatTotalsPartSerializer()
+
+
+class AreaStatsListSerializer(Serializer):
+    areas = AreaStatsSerializer(many=True)
+
+
+class AreaResultsSerializer(AreaPartSerializer):
+    results = PollOfficeResultResultPartSerializer(many=True)
+    total_ballots = IntegerField()
+
+
+class AreaResultsListSerializer(Serializer):
+    areas = AreaResultsSerializer(many=True)
+
+
+class TurnoutPartSerializer(Serializer):
+    votes = IntegerField()
+    voters_count = IntegerField(allow_null=True)
+    turnout = FloatField(allow_null=True)
+
+
+class PollOfficeTurnoutSerializer(TurnoutPartSerializer):
+    poll_office_id = IntegerField()
+    identifier = CharField()
+
+
+class AreaTurnoutSerializer(AreaPartSerializer, TurnoutPartSerializer):
+    poll_offices = IntegerField()
+    reporting_offices = IntegerField()
+    coverage = FloatField(allow_null=True)
+
+
+class AreaTurnoutListSerializer(Serializer):
+    areas = AreaTurnoutSerializer(many=True)
+
+
+class VoteSeriesPointSerializer(Serializer):
+    start = DateTimeField()
+    votes = IntegerField()
+
+
+class VoteSeriesSerializer(Serializer):
+    step = IntegerField(help_text="Seconds covered by each point")
+    series = VoteSeriesPointSerializer(many=True)
+
+
 class PollOfficeResultSerializer(Serializer):
     last_paper = PollOfficeResultLastPaperPartSerializer(allow_null=True)
     results = PollOfficeResultResultPartSerializer(many=True)
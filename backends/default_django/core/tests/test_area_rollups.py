@@ -0,0 +1,291 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.enums import Age, Gender
+from core.models import (
+    AreaCounters,
+    AreaCoverage,
+    AreaResult,
+    CandidateParty,
+    PollOffice,
+    Vote,
+    VoteAccepted,
+    VotingPaperResult,
+)
+from core.utils import bump_area_results
+
+
+class AreaRollupsTests(APITestCase):
+    def setUp(self):
+        self.yaounde_1 = PollOffice.objects.create(
+            name="Yaounde 1",
+            identifier="PO-AREA-001",
+            country="CM",
+            region="Centre",
+            city="Yaounde",
+            district="Yaounde I",
+        )
+        self.yaounde_2 = PollOffice.objects.create(
+            name="Yaounde 2",
+            identifier="PO-AREA-002",
+            country="CM",
+            region="Centre",
+            city="Yaounde",
+            district="Yaounde II",
+        )
+        self.douala = PollOffice.objects.create(
+            name="Douala",
+            identifier="PO-AREA-003",
+            country="CM",
+            region="Littoral",
+            city="Douala",
+        )
+        self.party_a = CandidateParty.objects.create(
+            party_name="A", candidate_name="A", identifier="AREA-A"
+        )
+        self.party_b = CandidateParty.objects.create(
+            party_name="B", candidate_name="B", identifier="AREA-B"
+        )
+
+    def _accept_vote(self, office, index, gender=Gender.MALE, age=Age.LESS_30):
+        vote = Vote.objects.create(poll_office=office, index=index)
+        VoteAccepted.objects.create(vote=vote, gender=gender, age=age)
+
+    def _accept_paper(self, office, index, party):
+        VotingPaperResult.objects.create(
+            poll_office=office, index=index, accepted_candidate_party=party
+        )
+        bump_area_results([(office.pk, party.pk)])
+
+    def test_vote_accepted_bumps_every_level(self):
+        self._accept_vote(self.yaounde_1, 1)
+        self._accept_vote(self.yaounde_2, 1, gender=Gender.FEMALE)
+        self._accept_vote(self.douala, 1)
+
+        def votes(**area):
+            return AreaCounters.objects.get(**area).votes
+
+        self.assertEqual(votes(level="country", country="CM"), 3)
+        self.assertEqual(votes(level="region", country="CM", region="Centre"), 2)
+        self.assertEqual(
+            votes(level="city", country="CM", region="Centre", city="Yaounde"), 2
+        )
+        self.assertEqual(
+            votes(
+                level="district",
+                country="CM",
+                region="Centre",
+                city="Yaounde",
+                district="Yaounde II",
+            ),
+            1,
+        )
+        # Unknown district: the office is counted under an empty district
+        self.assertEqual(
+            votes(
+                level="district",
+                country="CM",
+                region="Littoral",
+                city="Douala",
+                district="",
+            ),
+            1,
+        )
+        self.assertEqual(
+            AreaCounters.objects.get(level="country", country="CM").female, 1
+        )
+
+    def test_area_rows_are_bumped_in_the_accepting_transaction(self):
+        vote = Vote.objects.create(poll_office=self.douala, index=1)
+
+        # Not executed: the rebuild commands rely on the rows being committed
+        # with the VoteAccepted rows
+        with self.captureOnCommitCallbacks():
+            VoteAccepted.objects.create(vote=vote, gender=Gender.MALE, age=Age.LESS_30)
+
+        self.assertEqual(
+            AreaCounters.objects.get(level="country", country="CM").votes, 1
+        )
+        self.assertEqual(
+            AreaCoverage.objects.get(level="country", country="CM").reporting_offices, 1
+        )
+
+    def test_area_stats_filters_by_parent_area(self):
+        self._accept_vote(self.yaounde_1, 1)
+        self._accept_vote(self.douala, 1)
+
+        resp = self.client.get(
+            reverse("area-stats"), {"level": "region", "country": "CM"}
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        areas = resp.json()["areas"]
+        self.assertEqual([a["region"] for a in areas], ["Centre", "Littoral"])
+        self.assertEqual(areas[0]["totals"]["votes"], 1)
+        self.assertEqual(areas[0]["totals"]["male"], 1)
+
+    def test_area_results(self):
+        self._accept_paper(self.yaounde_1, 1, self.party_a)
+        self._accept_paper(self.yaounde_2, 1, self.party_a)
+        self._accept_paper(self.yaounde_2, 2, self.party_b)
+        self._accept_paper(self.douala, 1, self.party_b)
+
+        resp = self.client.get(
+            reverse("area-results"),
+            {"level": "city", "country": "CM", "region": "Centre"},
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        areas = resp.json()["areas"]
+        self.assertEqual(len(areas), 1)
+        self.assertEqual(areas[0]["city"], "Yaounde")
+        self.assertEqual(areas[0]["total_ballots"], 3)
+        self.assertEqual(
+            [(r["party_id"], r["ballots"]) for r in areas[0]["results"]],
+            [("AREA-A", 2), ("AREA-B", 1)],
+        )
+        self.assertAlmostEqual(areas[0]["results"][0]["share"], 2 / 3)
+
+    def test_invalid_level(self):
+        resp = self.client.get(reverse("area-results"), {"level": "planet"})
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.json()["code"], "invalid_data")
+
+    def test_rebuild_command_fixes_drift(self):
+        self._accept_vote(self.yaounde_1, 1)
+        VotingPaperResult.objects.create(
+            poll_office=self.douala, index=1, accepted_candidate_party=self.party_a
+        )
+        AreaCounters.objects.filter(level="country").update(votes=42)
+
+        call_command("rebuild_area_rollups", stdout=StringIO())
+
+        self.assertEqual(
+            AreaCounters.objects.get(level="country", country="CM").votes, 1
+        )
+        self.assertEqual(
+            AreaResult.objects.get(
+                level="region", country="CM", region="Littoral", party=self.party_a
+            ).ballots,
+            1,
+        )
+
+
+class AreaTurnoutTests(APITestCase):
+    def setUp(self):
+        self.centre_1 = PollOffice.objects.create(
+            name="Centre 1",
+            identifier="PO-TURN-001",
+            country="CM",
+            region="Centre",
+            voters_count=4,
+        )
+        self.centre_2 = PollOffice.objects.create(
+            name="Centre 2",
+            identifier="PO-TURN-002",
+            country="CM",
+            region="Centre",
+            voters_count=6,
+        )
+        self.littoral = PollOffice.objects.create(
+            name="Littoral",
+            identifier="PO-TURN-003",
+            country="CM",
+            region="Littoral",
+        )
+
+    def _accept_vote(self, office, index):
+        vote = Vote.objects.create(poll_office=office, index=index)
+        VoteAccepted.objects.create(vote=vote, gender=Gender.MALE, age=Age.LESS_30)
+
+    def test_created_offices_are_counted(self):
+        coverage = AreaCoverage.objects.get(level="region", country="CM", region="Centre")
+
+        self.assertEqual(coverage.poll_offices, 2)
+        self.assertEqual(coverage.voters_count, 10)
+        self.assertEqual(coverage.reporting_offices, 0)
+
+    def test_office_reports_once(self):
+        self._accept_vote(self.centre_1, 1)
+        self._accept_vote(self.centre_1, 2)
+
+        coverage = AreaCoverage.objects.get(level="country", country="CM")
+        self.assertEqual(coverage.reporting_offices, 1)
+
+    def test_area_turnout_and_coverage(self):
+        self._accept_vote(self.centre_1, 1)
+        self._accept_vote(self.centre_1, 2)
+        self._accept_vote(self.centre_2, 1)
+
+        resp = self.client.get(reverse("turnout"), {"level": "region", "country": "CM"})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        centre, littoral = resp.json()["areas"]
+        self.assertEqual(centre["region"], "Centre")
+        self.assertEqual(centre["votes"], 3)
+        self.assertAlmostEqual(centre["turnout"], 3 / 10)
+        self.assertEqual(centre["coverage"], 1.0)
+        # No registered voters known: no turnout
+        self.assertEqual(littoral["votes"], 0)
+        self.assertIsNone(littoral["turnout"])
+        self.assertEqual(littoral["coverage"], 0.0)
+
+    def test_poll_office_turnout(self):
+        self._accept_vote(self.centre_1, 1)
+
+        resp = self.client.get(reverse("turnout"), {"poll_office": "PO-TURN-001"})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()["votes"], 1)
+        self.assertEqual(resp.json()["voters_count"], 4)
+        self.assertAlmostEqual(resp.json()["turnout"], 1 / 4)
+
+    def test_unknown_poll_office(self):
+        resp = self.client.get(reverse("turnout"), {"poll_office": "PO-NOPE"})
+
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def _region(self, region):
+        return AreaCoverage.objects.get(level="region", country="CM", region=region)
+
+    def test_moving_an_office_moves_its_coverage(self):
+        self._accept_vote(self.centre_2, 1)
+        self.centre_2.region = "Littoral"
+        self.centre_2.save()
+
+        littoral = self._region("Littoral")
+        self.assertEqual(littoral.poll_offices, 2)
+        self.assertEqual(littoral.voters_count, 6)
+        self.assertEqual(littoral.reporting_offices, 1)
+        centre = self._region("Centre")
+        self.assertEqual(centre.poll_offices, 1)
+        self.assertEqual(centre.voters_count, 4)
+        self.assertEqual(centre.reporting_offices, 0)
+        country = AreaCoverage.objects.get(level="country", country="CM")
+        self.assertEqual(country.poll_offices, 3)
+        self.assertEqual(country.reporting_offices, 1)
+
+    def test_edit_only_touches_the_office_areas(self):
+        # Drift a rebuild would repair
+        AreaCoverage.objects.filter(level="region", region="Littoral").update(voters_count=99)
+
+        self.centre_1.voters_count = 10
+        self.centre_1.save()
+
+        self.assertEqual(self._region("Centre").voters_count, 16)
+        self.assertEqual(self._region("Littoral").voters_count, 99)
+
+    def test_deleting_an_office_removes_its_coverage(self):
+        self._accept_vote(self.centre_2, 1)
+
+        self.centre_2.delete()
+
+        centre = self._region("Centre")
+        self.assertEqual(centre.poll_offices, 1)
+        self.assertEqual(centre.voters_count, 4)
+        self.assertEqual(centre.reporting_offices, 0)
@@ -1,8 +1,12 @@
+import secrets
+
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import PollOffice, Source
+from core.authentication import CachedSourceToken, TokenCache, token_cache
+from core.models import PollOffice, Source, SourceToken
 
 
 class AuthenticateApiViewTests(APITestCase):
@@ -89,3 +93,80 @@ class AuthenticateApiViewTests(APITestCase):
         from core.models import SourceToken
         token = SourceToken.objects.get(source=src)
         self.assertTrue(token.token)
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        self.poll_office = PollOffice.objects.create(
+            name="Cache Office", identifier="PO-TEST-CACHE-001", country="FR"
+        )
+        self.source = Source.objects.create(
+            elector_id="02-12-069-0080-16-000570", type="unverified"
+        )
+        self.cache = TokenCache()
+
+    def make_token(self) -> SourceToken:
+        return SourceToken.objects.create(
+            source=self.source,
+            poll_office=self.poll_office,
+            token=secrets.token_urlsafe(32),
+        )
+
+    def test_known_token_is_fetched_once(self):
+        source_token = self.make_token()
+        expected = CachedSourceToken(
+            token_id=source_token.pk,
+            source_id=self.source.pk,
+            elector_id=self.source.elector_id,
+            poll_office_id=self.poll_office.pk,
+            poll_office_identifier=self.poll_office.identifier,
+            user_id=self.source.user_id,
+            username=self.source.user.username,
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get(source_token.token), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get(source_token.token), expected)
+
+        # Another process only has the shared Redis entry
+        self.cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get(source_token.token), expected)
+
+    def test_unknown_token_is_negatively_cached(self):
+        key = secrets.token_urlsafe(32)
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.cache.get(key))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.get(key))
+        self.cache.clear()
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.get(key))
+
+    def test_deleted_token_is_invalidated(self):
+        source_token = self.make_token()
+        self.assertIsNotNone(token_cache.get(source_token.token))
+
+        source_token.delete()
+        self.assertIsNone(token_cache.get(source_token.token))
+
+    @override_settings(TOKEN_CACHE_SIZE=2)
+    def test_local_cache_is_bounded_lru(self):
+        keys = [self.make_token().token for _ in range(3)]
+        for key in keys:
+            self.cache.get(key)
+        self.assertEqual(list(self.cache._entries), keys[1:])
+
+        # Reading keys[1] makes keys[2] the least recently used
+        self.cache.get(keys[1])
+        self.cache.get(keys[0])
+        self.assertEqual(list(self.cache._entries), [keys[1], keys[0]])
+
+    @override_settings(TOKEN_CACHE_TTL=0)
+    def test_expired_local_entry_is_refreshed_from_redis(self):
+        source_token = self.make_token()
+        self.cache.get(source_token.token)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(self.cache.get(source_token.token))
+        self.assertIn(source_token.token, self.cache._entries)
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.management.commands.audit_imports import audit_imports
+from core.management.commands.bench_startup import measure_setup
+from core.models import AreaCoverage, CandidateParty, PollOffice
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        self.base_dir = Path(tempfile.mkdtemp())
+        (self.base_dir / "poll_offices.json").write_text(
+            json.dumps(
+                [
+                    {"identifier": "PO-BOOT-1", "name": "Boot 1", "country": "CM", "voters_count": 10},
+                    {"identifier": "PO-BOOT-2", "name": "Boot 2", "country": "CM"},
+                    {"name": "No identifier"},
+                ]
+            )
+        )
+        (self.base_dir / "candidate_parties.json").write_text(
+            json.dumps(
+                [{"identifier": "BOOT-A", "party_name": "A", "candidate_name": "A"}]
+            )
+        )
+
+    def _bootstrap(self):
+        with override_settings(BASE_DIR=self.base_dir, DOWNLOADS_DIR=self.base_dir):
+            call_command("bootstrap", stdout=StringIO())
+
+    def test_loads_reference_data(self):
+        self._bootstrap()
+
+        self.assertEqual(
+            set(CandidateParty.objects.values_list("identifier", flat=True)),
+            {"**undecided**", "**white**", "BOOT-A"},
+        )
+        self.assertEqual(
+            sorted(PollOffice.objects.values_list("identifier", flat=True)),
+            ["PO-BOOT-1", "PO-BOOT-2"],
+        )
+        self.assertEqual(
+            PollOffice.objects.get(identifier="PO-BOOT-1").search_text, "po-boot-1 boot 1"
+        )
+        self.assertEqual(
+            AreaCoverage.objects.get(level="country", country="CM").voters_count, 10
+        )
+
+    def test_is_idempotent(self):
+        self._bootstrap()
+        self._bootstrap()
+
+        self.assertEqual(CandidateParty.objects.count(), 3)
+        self.assertEqual(PollOffice.objects.count(), 2)
+
+
+class StartupTests(SimpleTestCase):
+    def test_setup_does_no_database_io(self):
+        run = measure_setup(os.environ["DJANGO_SETTINGS_MODULE"])
+
+        self.assertEqual(run["db_connections"], [])
+
+
+class ImportAuditTests(SimpleTestCase):
+    def test_request_path_skips_deferred_packages(self):
+        modules = {name for name, _, _ in audit_imports(os.environ["DJANGO_SETTINGS_MODULE"])}
+
+        self.assertIn("core.api_views", modules)
+        self.assertNotIn("boto3", modules)
+        self.assertNotIn("crispy_forms", modules)
+
+    def test_command_passes(self):
+        # Raises CommandError when an IMPORT_AUDIT_DEFERRED package is imported
+        call_command("audit_imports", top=5, stdout=StringIO())
@@ -0,0 +1,89 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import CandidateParty, PollOffice, Vote, VoteAccepted, VotingPaperResult
+from core.utils import bump_versions, results_scopes, stats_scopes
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.office = PollOffice.objects.create(
+            name="Conditional Office", identifier="PO-COND-001", country="CM"
+        )
+        self.party = CandidateParty.objects.create(
+            party_name="Cond", candidate_name="Cond", identifier="COND"
+        )
+        # Test databases reuse ids: leave entries cached by earlier runs behind
+        bump_versions(stats_scopes(self.office.pk) + results_scopes(self.office.pk))
+
+    def _revalidate(self, url, params=None):
+        first = self.client.get(url, params or {})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("ETag", first)
+        self.assertIn("no-cache", first["Cache-Control"])
+        return first["ETag"], self.client.get(
+            url, params or {}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+
+    def test_unchanged_results_answer_304_without_query(self):
+        url = reverse("poll-office-results")
+        first = self.client.get(url, {"poll_office": self.office.pk})
+
+        with self.assertNumQueries(0):
+            resp = self.client.get(
+                url,
+                {"poll_office": self.office.pk},
+                HTTP_IF_NONE_MATCH=first["ETag"],
+            )
+
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], first["ETag"])
+
+    def test_accepted_paper_changes_results_etag(self):
+        url = reverse("poll-office-results")
+        etag, _ = self._revalidate(url, {"poll_office": self.office.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VotingPaperResult.objects.create(
+                poll_office=self.office, index=1, accepted_candidate_party=self.party
+            )
+
+        resp = self.client.get(
+            url, {"poll_office": self.office.pk}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+        self.assertEqual(resp.json()["totals"]["total_ballots"], 1)
+
+    def test_accepted_vote_changes_stats_etag(self):
+        url = reverse("poll-office-stats")
+        etag, resp = self._revalidate(url, {"poll_office": self.office.pk})
+        self.assertEqual(resp.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vote = Vote.objects.create(poll_office=self.office, index=1)
+            VoteAccepted.objects.create(vote=vote, gender="male", age="less_30")
+
+        resp = self.client.get(
+            url, {"poll_office": self.office.pk}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["totals"]["votes"], 1)
+
+    def test_poll_offices_list(self):
+        url = reverse("polloffices-list")
+        etag, resp = self._revalidate(url)
+        self.assertEqual(resp.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PollOffice.objects.create(
+                name="New Office", identifier="PO-COND-002", country="CM"
+            )
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_candidate_parties_list(self):
+        etag, resp = self._revalidate(reverse("candidateparties-list"))
+
+        self.assertEqual(resp.status_code, 304)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.live import GLOBAL, LiveFeedBroker, _redis, office_key
+from core.models import PollOffice
+from core.utils import bump_poll_office_counters
+
+
+class LiveFeedBrokerTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = LiveFeedBroker(listen=False)
+
+    async def test_dispatch_fans_out_per_office_and_summed(self):
+        everything = self.broker.subscribe(GLOBAL)
+        office_1 = self.broker.subscribe(office_key(1))
+        office_2 = self.broker.subscribe(office_key(2))
+
+        self.broker.dispatch(
+            {
+                "event": "stats",
+                "offices": {"1": {"votes": 2, "male": 1}, "3": {"votes": 1}},
+            }
+        )
+        await asyncio.sleep(0)
+
+        self.assertEqual(
+            everything.get_nowait(), ("stats", {"delta": {"votes": 3, "male": 1}})
+        )
+        self.assertEqual(
+            office_1.get_nowait(),
+            ("stats", {"poll_office_id": 1, "delta": {"votes": 2, "male": 1}}),
+        )
+        self.assertTrue(office_2.empty())
+
+    @override_settings(LIVE_FEED_QUEUE_SIZE=2)
+    async def test_slow_subscriber_drops_oldest_events(self):
+        queue = self.broker.subscribe(GLOBAL)
+        for votes in (1, 2, 3):
+            self.broker.dispatch(
+                {"event": "stats", "offices": {"1": {"votes": votes}}}
+            )
+        await asyncio.sleep(0)
+
+        self.assertEqual(queue.get_nowait()[1]["delta"], {"votes": 2})
+        self.assertEqual(queue.get_nowait()[1]["delta"], {"votes": 3})
+
+    async def test_unsubscribed_queue_gets_nothing(self):
+        queue = self.broker.subscribe(GLOBAL)
+        self.broker.unsubscribe(GLOBAL, queue)
+
+        self.broker.dispatch({"event": "stats", "offices": {"1": {"votes": 1}}})
+        await asyncio.sleep(0)
+
+        self.assertTrue(queue.empty())
+
+
+class LiveFeedPublishTests(TestCase):
+    def setUp(self):
+        self.office = PollOffice.objects.create(
+            name="Live Office", identifier="PO-LIVE-001", country="CM"
+        )
+
+    @override_settings(LIVE_FEED_CHANNEL="ufrecs:live:test")
+    def test_committed_counters_are_published_once(self):
+        pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe("ufrecs:live:test")
+        self.addCleanup(pubsub.close)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_poll_office_counters(
+                [
+                    (self.office.pk, "male", "less_30", False),
+                    (self.office.pk, "female", "less_30", True),
+                ]
+            )
+
+        message = None
+        for _ in range(10):
+            message = pubsub.get_message(timeout=0.5)
+            if message:
+                break
+        self.assertEqual(
+            json.loads(message["data"]),
+            {
+                "event": "stats",
+                "offices": {
+                    str(self.office.pk): {
+                        "votes": 2,
+                        "male": 1,
+                        "female": 1,
+                        "less_30": 2,
+                        "has_torn": 1,
+                    }
+                },
+            },
+        )
+
+    def test_live_feed_needs_asgi(self):
+        resp = self.client.get(reverse("live-feed"))
+
+        self.assertEqual(resp.status_code, 501)
+        self.assertEqual(resp.json()["code"], "asgi_required")
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
 from core.api_views import PollOfficeResultsView
-from core.models import PollOffice, CandidateParty, VotingPaperResult
+from core.models import AreaResult, PollOffice, CandidateParty, VotingPaperResult
+from core.utils import accept_paper_decisions, invalidate_poll_office_results
 
 
+@override_settings(RESULTS_CACHE_TTL=0)
 class PollOfficeResultsViewTests(APITestCase):
     def setUp(self):
         self.factory = APIRequestFactory()
@@ -83,6 +86,30 @@ class PollOfficeResultsViewTests(APITestCase):
         self.assertEqual(lp["index"], last.index)
         self.assertEqual(lp["party_id"], last.accepted_candidate_party.identifier)
 
+    def test_batch_acceptance_sets_last_paper_and_area_results(self):
+        o1 = self._create_office("PO-RES-B1")
+        o2 = self._create_office("PO-RES-B2")
+        pA = self._party("ABC")
+        papers = [
+            VotingPaperResult.objects.create(poll_office=office, index=index)
+            for office, index in ((o2, 1), (o1, 1), (o1, 2))
+        ]
+        for paper in papers:
+            paper.accepted_candidate_party = pA
+
+        accept_paper_decisions(papers)
+
+        data = self._auth_get().data
+        self.assertEqual(data.get("total_ballots"), 3)
+        self.assertEqual(data["last_paper"]["index"], papers[-1].index)
+        self.assertEqual(
+            self._auth_get({"poll_office_id": o2.id}).data["last_paper"]["index"], 1
+        )
+        self.assertEqual(
+            AreaResult.objects.get(level="city", country="FR", city="Paris", party=pA).ballots,
+            3,
+        )
+
     def test_per_office_filtering_and_ordering(self):
         o1 = self._create_office("PO-RES-ONE")
         o2 = self._create_office("PO-RES-TWO")
@@ -134,3 +161,46 @@ class PollOfficeResultsViewTests(APITestCase):
         self.assertEqual(data.get("results"), [])
         self.assertEqual(data.get("total_ballots"), 0)
 
+
+@override_settings(RESULTS_CACHE_TTL=60)
+class PollOfficeResultsCacheTests(APITestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = PollOfficeResultsView.as_view()
+        self.office = PollOffice.objects.create(
+            name="Cached Office", identifier="PO-RES-CACHE", country="FR"
+        )
+        self.party = CandidateParty.objects.create(
+            party_name="Cached", candidate_name="Cached", identifier="CACHED"
+        )
+        invalidate_poll_office_results([self.office.pk])
+
+    def _ballots(self, poll_office):
+        request = self.factory.get(
+            "/api/poll-office-results/", data={"poll_office": poll_office}
+        )
+        return self.view(request).data["totals"]["total_ballots"]
+
+    def test_pending_paper_keeps_cached_results(self):
+        self.assertEqual(self._ballots(self.office.pk), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VotingPaperResult.objects.create(poll_office=self.office, index=1)
+        # Written behind the ORM: only acceptances invalidate
+        VotingPaperResult.objects.filter(poll_office=self.office).update(
+            accepted_candidate_party=self.party
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._ballots(self.office.pk), 0)
+
+    def test_acceptance_invalidates_results(self):
+        self.assertEqual(self._ballots(self.office.identifier), 0)
+        vpr = VotingPaperResult.objects.create(poll_office=self.office, index=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vpr.accepted_candidate_party = self.party
+            vpr.save(update_fields=["accepted_candidate_party"])
+
+        self.assertEqual(self._ballots(self.office.identifier), 1)
+        self.assertEqual(self._ballots(self.office.pk), 1)
@@ -1,11 +1,41 @@
+import time
+import uuid
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from rest_framework.test import APITestCase, APIRequestFactory, force_authenticate
 
 from core.api_views import PollOfficeStatsView
-from core.enums import Age, Gender
-from core.models import PollOffice, Vote, VoteAccepted
+from core.enums import Age, Gender, SourceType
+from core.models import (
+    LastAccepted,
+    PollOffice,
+    PollOfficeCounters,
+    Source,
+    SourceToken,
+    Vote,
+    VoteAccepted,
+    VoteProposed,
+)
+from core.utils import (
+    _redis,
+    accept_votes_bulk,
+    bump_versions,
+    get_cached_stats,
+    get_global_counters,
+    get_last_accepted,
+    get_poll_office_counters,
+    last_accepted_key,
+    update_last_votes,
+)
 
 
+@override_settings(STATS_CACHE_TTL=0)
 class PollOfficeStatsViewTests(APITestCase):
     def setUp(self):
         self.factory = APIRequestFactory()
@@ -148,3 +178,277 @@ class PollOfficeStatsViewTests(APITestCase):
             },
         )
 
+
+
+class PollOfficeCountersTests(TestCase):
+    def setUp(self):
+        self.office = PollOffice.objects.create(
+            name="Counters Office", identifier="PO-COUNT-001", country="FR"
+        )
+        self.other = PollOffice.objects.create(
+            name="Other Office", identifier="PO-COUNT-002", country="FR"
+        )
+
+    def _accept(self, office, index, gender, age, has_torn=False):
+        vote = Vote.objects.create(poll_office=office, index=index)
+        return VoteAccepted.objects.create(
+            vote=vote, gender=gender, age=age, has_torn=has_torn
+        )
+
+    def test_created_vote_accepted_bumps_counters(self):
+        self._accept(self.office, 1, Gender.MALE, Age.LESS_30)
+        self._accept(self.office, 2, Gender.FEMALE, Age.MORE_60, has_torn=True)
+        self._accept(self.other, 1, Gender.UNDECIDED, Age.UNDECIDED)
+
+        self.assertEqual(
+            get_poll_office_counters(poll_office_id=self.office.pk),
+            {
+                "votes": 2,
+                "male": 1,
+                "female": 1,
+                "less_30": 1,
+                "less_60": 0,
+                "more_60": 1,
+                "has_torn": 1,
+            },
+        )
+        self.assertEqual(
+            get_poll_office_counters(poll_office__identifier=self.other.identifier)["votes"],
+            1,
+        )
+        self.assertEqual(get_global_counters()["votes"], 3)
+        self.assertEqual(get_global_counters()["male"], 1)
+
+    def test_bulk_accept_bumps_counters_once(self):
+        source = Source.objects.create(elector_id="E-COUNT", type=SourceType.UNVERIFIED)
+        votes = [Vote.objects.create(poll_office=self.office, index=i) for i in (1, 2)]
+        for vote in votes:
+            VoteProposed.objects.create(
+                vote=vote, source=source, gender=Gender.FEMALE, age=Age.LESS_60
+            )
+
+        accept_votes_bulk([vote.pk for vote in votes])
+        accept_votes_bulk([vote.pk for vote in votes])
+
+        counters = get_poll_office_counters(poll_office_id=self.office.pk)
+        self.assertEqual(counters["votes"], 2)
+        self.assertEqual(counters["female"], 2)
+        self.assertEqual(counters["less_60"], 2)
+
+    def test_rebuild_command_fixes_drift(self):
+        self._accept(self.office, 1, Gender.MALE, Age.LESS_30, has_torn=True)
+        PollOfficeCounters.objects.filter(pk=self.office.pk).update(votes=42)
+        PollOfficeCounters.objects.create(poll_office=self.other, votes=3)
+
+        call_command("rebuild_poll_office_counters", stdout=StringIO())
+
+        self.assertEqual(
+            get_poll_office_counters(poll_office_id=self.office.pk),
+            {
+                "votes": 1,
+                "male": 1,
+                "female": 0,
+                "less_30": 1,
+                "less_60": 0,
+                "more_60": 0,
+                "has_torn": 1,
+            },
+        )
+        self.assertFalse(PollOfficeCounters.objects.filter(pk=self.other.pk).exists())
+
+
+@override_settings(STATS_CACHE_TTL=60, STATS_CACHE_STALE_TTL=60, STATS_CACHE_LOCK_TTL=1)
+class StatsCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.key = f"test:{uuid.uuid4().hex}"
+        self.scopes = [self.key]
+        self.calls = 0
+
+    def tearDown(self):
+        _redis().delete(f"ufrecs:stats:v2:{self.key}", f"ufrecs:stats:v2:{self.key}:lock")
+        _redis().hdel("ufrecs:versions", self.key, f"{self.key}:at")
+
+    def compute(self):
+        self.calls += 1
+        return {"totals": {"votes": self.calls}}
+
+    def get(self):
+        value, _, _ = get_cached_stats(self.key, self.scopes, self.compute)
+        return value
+
+    def test_fresh_entry_is_computed_once(self):
+        self.assertEqual(self.get(), {"totals": {"votes": 1}})
+        self.assertEqual(self.get(), {"totals": {"votes": 1}})
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_is_served_while_another_worker_refreshes(self):
+        with override_settings(STATS_CACHE_TTL=1):
+            self.get()
+        time.sleep(1.1)
+        lock = _redis().lock(f"ufrecs:stats:v2:{self.key}:lock", timeout=5)
+        self.assertTrue(lock.acquire(blocking=False))
+
+        self.assertEqual(self.get(), {"totals": {"votes": 1}})
+        self.assertEqual(self.calls, 1)
+
+        lock.release()
+        self.assertEqual(self.get(), {"totals": {"votes": 2}})
+
+    def test_version_bump_keeps_fresh_entry(self):
+        _, tag, _ = get_cached_stats(self.key, self.scopes, self.compute)
+
+        bump_versions(self.scopes)
+        value, same_tag, _ = get_cached_stats(self.key, self.scopes, self.compute)
+
+        # Served with the version it was computed at
+        self.assertEqual(value, {"totals": {"votes": 1}})
+        self.assertEqual(same_tag, tag)
+        self.assertEqual(self.calls, 1)
+
+    def test_refresh_after_ttl_takes_new_version(self):
+        with override_settings(STATS_CACHE_TTL=1):
+            _, tag, _ = get_cached_stats(self.key, self.scopes, self.compute)
+        bump_versions(self.scopes)
+        time.sleep(1.1)
+
+        value, new_tag, modified = get_cached_stats(self.key, self.scopes, self.compute)
+
+        self.assertEqual(value, {"totals": {"votes": 2}})
+        self.assertNotEqual(new_tag, tag)
+        self.assertIsNotNone(modified)
+
+    @override_settings(STATS_CACHE_TTL=0)
+    def test_disabled_cache_always_computes(self):
+        self.get()
+        self.get()
+        self.assertEqual(self.calls, 2)
+
+
+class LastAcceptedTests(TestCase):
+    def setUp(self):
+        self.office = PollOffice.objects.create(
+            name="Last Office", identifier="PO-LAST-001", country="FR"
+        )
+        self.source = Source.objects.create(
+            elector_id="E-LAST", full_name="Reporter", type=SourceType.UNVERIFIED
+        )
+
+    def _accept(self, index, gender=Gender.MALE):
+        vote = Vote.objects.create(poll_office=self.office, index=index)
+        VoteProposed.objects.create(
+            vote=vote, source=self.source, gender=gender, age=Age.LESS_30
+        )
+        VoteAccepted.objects.create(vote=vote, gender=gender, age=Age.LESS_30)
+        return vote
+
+    def test_pointers_follow_the_latest_accepted_vote(self):
+        self._accept(1)
+        last = self._accept(2, gender=Gender.FEMALE)
+
+        office_block = get_last_accepted(last_accepted_key("vote", self.office.pk))
+        self.assertEqual(office_block["Accepted"]["index"], 2)
+        self.assertEqual(office_block["Accepted"]["gender"], Gender.FEMALE)
+        self.assertEqual(office_block["Reporter"]["index"], 2)
+        self.assertEqual(office_block["Verified"], {})
+        # The global block shows the vote id as index
+        self.assertEqual(
+            get_last_accepted(last_accepted_key("vote"))["Accepted"]["index"], last.pk
+        )
+
+    def test_pointers_never_move_back(self):
+        first = self._accept(1)
+        self._accept(2)
+
+        update_last_votes([first.pk])
+
+        self.assertEqual(
+            LastAccepted.objects.get(key=last_accepted_key("vote", self.office.pk)).ref_id,
+            Vote.objects.get(poll_office=self.office, index=2).pk,
+        )
+
+    def test_stats_read_last_vote_from_one_row(self):
+        self._accept(1)
+        view = PollOfficeStatsView.as_view()
+        request = APIRequestFactory().get("/api/stats/", {"poll_office": self.office.pk})
+
+        with override_settings(STATS_CACHE_TTL=0), CaptureQueriesContext(connection) as ctx:
+            response = view(request)
+
+        self.assertEqual(response.data["last_vote"]["Accepted"]["index"], 1)
+        vote_tables = (Vote._meta.db_table, VoteProposed._meta.db_table)
+        self.assertFalse(
+            [q["sql"] for q in ctx.captured_queries if any(f'"{t}"' in q["sql"] for t in vote_tables)]
+        )
+
+    def test_rebuild_command(self):
+        self._accept(1)
+        LastAccepted.objects.all().delete()
+
+        call_command("rebuild_last_accepted", stdout=StringIO())
+
+        self.assertEqual(
+            get_last_accepted(last_accepted_key("vote", self.office.pk))["Accepted"]["index"],
+            1,
+        )
+
+
+class PollOfficeStatsBulkTests(APITestCase):
+    def setUp(self):
+        self.offices = [
+            PollOffice.objects.create(
+                name=f"Bulk {i}",
+                identifier=f"PO-BULK-{i}",
+                country="CM",
+                region="Centre" if i < 2 else "Littoral",
+            )
+            for i in range(3)
+        ]
+        source = Source.objects.create(elector_id="E-BULK", type=SourceType.UNVERIFIED)
+        SourceToken.objects.create(
+            source=source, poll_office=self.offices[0], token="bulk-token"
+        )
+        for office, count in zip(self.offices, (2, 1, 0)):
+            for index in range(1, count + 1):
+                vote = Vote.objects.create(poll_office=office, index=index)
+                VoteAccepted.objects.create(vote=vote, gender=Gender.MALE, age=Age.LESS_30)
+
+    def test_offices_by_id_and_identifier(self):
+        with self.assertNumQueries(4):
+            # poll offices, counters, sources, last votes
+            resp = self.client.get(
+                reverse("poll-office-stats-bulk"),
+                {"poll_offices": f"{self.offices[0].pk},PO-BULK-2"},
+            )
+
+        self.assertEqual(resp.status_code, 200)
+        offices = resp.json()["offices"]
+        self.assertEqual(set(offices), {str(self.offices[0].pk), str(self.offices[2].pk)})
+        first = offices[str(self.offices[0].pk)]
+        self.assertEqual(first["identifier"], "PO-BULK-0")
+        self.assertEqual(first["totals"]["votes"], 2)
+        self.assertEqual(first["totals"]["total_sources"], 1)
+        self.assertEqual(first["last_vote"]["Accepted"]["index"], 2)
+        empty = offices[str(self.offices[2].pk)]
+        self.assertEqual(empty["totals"]["votes"], 0)
+        self.assertNotIn("last_vote", empty)
+
+    def test_offices_by_area(self):
+        resp = self.client.get(
+            reverse("poll-office-stats-bulk"), {"country": "CM", "region": "Centre"}
+        )
+
+        self.assertEqual(
+            set(resp.json()["offices"]), {str(o.pk) for o in self.offices[:2]}
+        )
+
+    def test_offices_are_required(self):
+        resp = self.client.get(reverse("poll-office-stats-bulk"))
+
+        self.assertEqual(resp.status_code, 400)
+
+    @override_settings(STATS_BULK_MAX_OFFICES=2)
+    def test_too_many_offices(self):
+        resp = self.client.get(reverse("poll-office-stats-bulk"), {"country": "CM"})
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["code"], "invalid_data")
@@ -1,6 +1,219 @@
+import gzip
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import PollOffice
+from core.utils import bump_versions
 from .gen.test_polloffice import GeneratedPollOfficeTestCase
 
 
 class PollOfficeTestCase(GeneratedPollOfficeTestCase):
 
     pass
+
+
+class PollOfficeListTests(APITestCase):
+    def setUp(self):
+        self.offices = [
+            PollOffice.objects.create(
+                name=f"Picker {i}",
+                identifier=f"PO-PICK-{i}",
+                country="CM",
+                city="Yaounde",
+            )
+            for i in range(5)
+        ]
+        bump_versions(["polloffices"])
+        self.url = reverse("polloffices-list")
+
+    def test_keyset_pages(self):
+        seen = []
+        url = f"{self.url}?after=0&limit=2"
+        pages = 0
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn("count", resp.json())
+            seen += [office["id"] for office in resp.json()["results"]]
+            url = resp.json()["next"]
+            pages += 1
+
+        self.assertEqual(seen, [office.pk for office in self.offices])
+        self.assertEqual(pages, 3)
+
+    def test_keyset_page_skips_count(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(
+                self.url, {"after": self.offices[1].pk, "limit": 2}
+            )
+
+        self.assertEqual(
+            [office["id"] for office in resp.json()["results"]],
+            [office.pk for office in self.offices[2:4]],
+        )
+
+    def test_invalid_after(self):
+        resp = self.client.get(self.url, {"after": "abc"})
+
+        self.assertEqual(resp.status_code, 400)
+
+    def test_offsets_without_count(self):
+        resp = self.client.get(self.url, {"count": "false", "limit": 2, "offset": 4})
+
+        data = resp.json()
+        self.assertNotIn("count", data)
+        self.assertIsNone(data["next"])
+        self.assertIsNotNone(data["previous"])
+        self.assertEqual([office["id"] for office in data["results"]], [self.offices[4].pk])
+
+    def test_default_pagination_still_counts(self):
+        resp = self.client.get(self.url, {"limit": 2})
+
+        self.assertEqual(resp.json()["count"], 5)
+
+    def test_compact_fields(self):
+        resp = self.client.get(self.url, {"fields": "compact", "after": 0, "limit": 1})
+
+        self.assertEqual(
+            resp.json()["results"],
+            [
+                {
+                    "id": self.offices[0].pk,
+                    "identifier": "PO-PICK-0",
+                    "name": "Picker 0",
+                    "city": "Yaounde",
+                }
+            ],
+        )
+
+
+class PollOfficeBundleTests(APITestCase):
+    def setUp(self):
+        for i in range(3):
+            PollOffice.objects.create(
+                name=f"Bundle {i}",
+                identifier=f"PO-BUNDLE-{i}",
+                country="CM",
+                voters_count=100 + i,
+            )
+        bump_versions(["polloffices"])
+        self.url = reverse("poll-offices-bundle")
+
+    def _get(self, params=None, **headers):
+        return self.client.get(self.url, params or {}, HTTP_ACCEPT_ENCODING="gzip", **headers)
+
+    def test_gzip_json_bundle(self):
+        resp = self._get()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        offices = json.loads(gzip.decompress(resp.content))
+        self.assertEqual(
+            [office["identifier"] for office in offices],
+            ["PO-BUNDLE-0", "PO-BUNDLE-1", "PO-BUNDLE-2"],
+        )
+        self.assertEqual(offices[0]["voters_count"], 100)
+
+    def test_columns_bundle(self):
+        resp = self._get({"format": "columns"})
+
+        data = json.loads(gzip.decompress(resp.content))
+        identifier = data["columns"].index("identifier")
+        self.assertEqual(len(data["rows"]), 3)
+        self.assertEqual(data["rows"][2][identifier], "PO-BUNDLE-2")
+
+    def test_identity_without_gzip(self):
+        resp = self.client.get(self.url)
+
+        self.assertFalse(resp.has_header("Content-Encoding"))
+        self.assertEqual(len(json.loads(resp.content)), 3)
+        self.assertNotEqual(resp["ETag"], self._get()["ETag"])
+
+    def test_not_modified(self):
+        etag = self._get()["ETag"]
+
+        resp = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_rebuilt_when_offices_change(self):
+        etag = self._get()["ETag"]
+        PollOffice.objects.create(name="Bundle 3", identifier="PO-BUNDLE-3", country="CM")
+        # post_save bumps on commit, which never happens in a TestCase
+        bump_versions(["polloffices"])
+
+        resp = self._get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(json.loads(gzip.decompress(resp.content))), 4)
+
+    def test_invalid_format(self):
+        resp = self._get({"format": "xml"})
+
+        self.assertEqual(resp.status_code, 400)
+
+
+class PollOfficeSearchTests(APITestCase):
+    def setUp(self):
+        self.mbalmayo = PollOffice.objects.create(
+            name="École Publique de Mbalmayo",
+            identifier="PO-SRCH-001",
+            country="CM",
+            city="Mbalmayo",
+        )
+        self.douala = PollOffice.objects.create(
+            name="Lycée de Bonabéri",
+            identifier="PO-SRCH-002",
+            country="CM",
+            city="Douala",
+        )
+        self.url = reverse("polloffices-search")
+
+    def _search(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        return [office["identifier"] for office in resp.json()["results"]]
+
+    def test_search_text_is_normalized(self):
+        self.assertEqual(
+            self.mbalmayo.search_text, "po-srch-001 ecole publique de mbalmayo mbalmayo"
+        )
+
+        self.douala.city = "Douala IV"
+        self.douala.save(update_fields=["city"])
+        self.douala.refresh_from_db()
+        self.assertTrue(self.douala.search_text.endswith("douala iv"))
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self._search(q="ECOLE"), ["PO-SRCH-001"])
+        self.assertEqual(self._search(q="bonaberi"), ["PO-SRCH-002"])
+
+    def test_typos_match(self):
+        self.assertEqual(self._search(q="Mbalmyo"), ["PO-SRCH-001"])
+
+    def test_identifier(self):
+        self.assertEqual(self._search(q="po-srch-002"), ["PO-SRCH-002"])
+
+    def test_best_match_first_and_limit(self):
+        PollOffice.objects.create(
+            name="Mbalmayo Centre", identifier="PO-SRCH-003", country="CM", city="Mbalmayo"
+        )
+
+        with self.settings(POLL_OFFICE_SEARCH_LIMIT=1):
+            self.assertEqual(len(self._search(q="mbalmayo", limit=5)), 1)
+        self.assertEqual(set(self._search(q="mbalmayo")), {"PO-SRCH-001", "PO-SRCH-003"})
+
+    def test_empty_query(self):
+        self.assertEqual(self._search(q="  "), [])
+
+    def test_rebuild_command(self):
+        PollOffice.objects.update(search_text="")
+
+        call_command("rebuild_poll_office_search", stdout=StringIO())
+
+        self.assertEqual(self._search(q="bonaberi"), ["PO-SRCH-002"])
@@ -0,0 +1,152 @@
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.prefork import RecyclingApplication
+
+SERVE_SCRIPT = """
+import os, sys, time
+from core.prefork import PreforkServer
+
+def application(environ, start_response):
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(0.3)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [str(os.getpid()).encode()]
+
+server = PreforkServer("127.0.0.1:0", workers=2, threads=4, max_requests=int(sys.argv[1]))
+print(server.bind()[1], flush=True)
+server.run(application)
+"""
+
+
+def hello(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"hello"]
+
+
+class RecyclingApplicationTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def _app(self, max_requests, **kwargs):
+        return RecyclingApplication(
+            hello,
+            max_requests,
+            stop_accepting=lambda: self.calls.append(("stop_accepting", time.monotonic())),
+            linger=0.05,
+            retire=lambda: self.calls.append(("retire", time.monotonic())),
+            **kwargs,
+        )
+
+    def _request(self, app):
+        return app({}, lambda status, headers: None)
+
+    def _wait_retired(self, seconds=2):
+        deadline = time.monotonic() + seconds
+        while len(self.calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_retires_after_max_requests(self):
+        app = self._app(2)
+
+        self.assertEqual(list(self._request(app)), [b"hello"])
+        time.sleep(0.1)
+        self.assertEqual(self.calls, [])
+
+        self._request(app).close()
+        self._wait_retired()
+        self.assertEqual([call for call, _ in self.calls], ["stop_accepting", "retire"])
+
+    def test_waits_for_requests_in_flight(self):
+        app = self._app(1)
+
+        body = self._request(app)
+        time.sleep(0.2)
+        # Stopped accepting at once, but still serving
+        self.assertEqual([call for call, _ in self.calls], ["stop_accepting"])
+        self.assertEqual(app.in_flight, 1)
+
+        # Done once the body is sent, whether or not the server closes it
+        sent = time.monotonic()
+        list(body)
+        body.close()
+        self.assertEqual(app.in_flight, 0)
+        self._wait_retired()
+        self.assertEqual(self.calls[-1][0], "retire")
+        self.assertGreaterEqual(self.calls[-1][1], sent)
+
+    def test_retires_after_grace(self):
+        app = self._app(1, grace=0.2)
+
+        self._request(app)
+        self._wait_retired()
+
+        self.assertEqual(self.calls[-1][0], "retire")
+        self.assertEqual(app.in_flight, 1)
+
+
+class PreforkServerTests(SimpleTestCase):
+    def _serve(self, max_requests=0):
+        server = subprocess.Popen(
+            [sys.executable, "-c", SERVE_SCRIPT, str(max_requests)],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.addCleanup(self._stop, server)
+        port = int(server.stdout.readline())
+        # Workers listen once forked
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                self._get(port)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        time.sleep(0.5)
+        return server, port
+
+    def _stop(self, server):
+        server.terminate()
+        server.wait(timeout=10)
+        server.stdout.close()
+        self.assertEqual(server.returncode, 0)
+
+    def _get(self, port, path="/"):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as resp:
+            return resp.status, int(resp.read())
+
+    def test_workers_share_the_port(self):
+        server, port = self._serve()
+
+        pids = {self._get(port)[1] for _ in range(20)}
+
+        # SO_REUSEPORT spreads the connections over both workers
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(server.pid, pids)
+
+    def test_workers_retire_without_failing_requests(self):
+        server, port = self._serve(max_requests=5)
+        responses = []
+
+        def client():
+            for _ in range(6):
+                responses.append(self._get(port, "/slow"))
+
+        clients = [threading.Thread(target=client) for _ in range(6)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        # Every request answered while workers retired with requests in flight
+        self.assertEqual([status for status, _ in responses], [200] * 36)
+        self.assertGreater(len({pid for _, pid in responses}), 2)
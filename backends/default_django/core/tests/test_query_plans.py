@@ -0,0 +1,169 @@
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+
+from core.enums import Age, Gender, SourceType
+from core.models import (
+    CandidateParty,
+    PollOffice,
+    Source,
+    SourceToken,
+    Vote,
+    VoteAccepted,
+    VoteProposed,
+    VotingPaperResult,
+    VotingPaperResultProposed,
+)
+from core.utils import pending_votes, pending_vp_results
+
+
+class HotQueryPlanTests(TestCase):
+    """
+    Run EXPLAIN on the hot query shapes of the ingestion endpoints and the
+    decider loops and fail unless the plan uses the index meant for it.
+
+    Sequential scans are disabled for the session, so a "Seq Scan" node left
+    in the plan means no index can serve the query. Checking the index by
+    name also fails when the planner falls back on a less selective one,
+    such as the foreign key index, because the dedicated index is missing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.party = CandidateParty.objects.create(
+            party_name="Party", candidate_name="Candidate", identifier="P-1"
+        )
+        cls.offices = PollOffice.objects.bulk_create(
+            [
+                PollOffice(
+                    name=f"Office {i}", identifier=f"PO-PLAN-{i}", country="CM"
+                )
+                for i in range(5)
+            ]
+        )
+        cls.sources = [
+            Source.objects.create(
+                elector_id=f"PLAN-{i}", password="x", type=SourceType.UNVERIFIED
+            )
+            for i in range(3)
+        ]
+        tokens = []
+        for office in cls.offices:
+            for source in cls.sources:
+                tokens.append(
+                    SourceToken(
+                        source=source,
+                        poll_office=office,
+                        token=f"{office.identifier}-{source.elector_id}",
+                    )
+                )
+        SourceToken.objects.bulk_create(tokens)
+
+        votes = Vote.objects.bulk_create(
+            [
+                Vote(poll_office=office, index=index)
+                for office in cls.offices
+                for index in range(1, 41)
+            ]
+        )
+        VoteProposed.objects.bulk_create(
+            [
+                VoteProposed(
+                    vote=vote,
+                    source=source,
+                    gender=Gender.MALE,
+                    age=Age.LESS_30,
+                )
+                for vote in votes
+                for source in cls.sources
+            ]
+        )
+        VoteAccepted.objects.bulk_create(
+            [
+                VoteAccepted(vote=vote, gender=Gender.MALE, age=Age.LESS_30)
+                for vote in votes[::2]
+            ]
+        )
+
+        vp_results = VotingPaperResult.objects.bulk_create(
+            [
+                VotingPaperResult(
+                    poll_office=office,
+                    index=index,
+                    accepted_candidate_party=(
+                        cls.party if index % 2 else None
+                    ),
+                )
+                for office in cls.offices
+                for index in range(1, 41)
+            ]
+        )
+        VotingPaperResultProposed.objects.bulk_create(
+            [
+                VotingPaperResultProposed(
+                    vp_result=vp_result,
+                    source=source,
+                    party_candidate=cls.party,
+                )
+                for vp_result in vp_results
+                for source in cls.sources
+            ]
+        )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        msg = f"\n{queryset.query}\n{plan}"
+        self.assertNotIn("Seq Scan", plan, msg=msg)
+        self.assertIn(index_name, plan, msg=msg)
+
+    def test_vote_lookup_by_poll_office_and_index(self):
+        self.assertUsesIndex(
+            Vote.objects.filter(poll_office=self.offices[0], index=7),
+            "unique_vote_poll_office_index",
+        )
+
+    def test_vote_proposed_lookup_by_vote_and_source(self):
+        vote = Vote.objects.filter(poll_office=self.offices[0]).first()
+        self.assertUsesIndex(
+            VoteProposed.objects.filter(vote=vote, source=self.sources[0]),
+            "unique_voteproposed_vote_source",
+        )
+
+    def test_pending_votes(self):
+        self.assertUsesIndex(
+            pending_votes()[:100], "voteproposed_vote_created_idx"
+        )
+
+    def test_pending_vp_results(self):
+        queryset = pending_vp_results()[:100]
+        self.assertUsesIndex(queryset, "vpresult_undecided_idx")
+        self.assertUsesIndex(queryset, "vprproposed_vpr_created_idx")
+
+    def test_source_token_lookup_by_source_and_poll_office(self):
+        self.assertUsesIndex(
+            SourceToken.objects.filter(
+                source=self.sources[0], poll_office=self.offices[0]
+            ),
+            "sourcetoken_source_office_idx",
+        )
+
+    def test_poll_office_results(self):
+        self.assertUsesIndex(
+            VotingPaperResult.objects.filter(
+                accepted_candidate_party__isnull=False,
+                poll_office=self.offices[0],
+            )
+            .values("accepted_candidate_party__identifier")
+            .annotate(ballots=Count("pk")),
+            "vpresult_office_party_idx",
+        )
+
@@ -1,7 +1,11 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.conf import settings
+from django.utils import timezone
 import boto3
-from core.utils import issue_scoped_creds
+from core.utils import StsCredentialBroker, issue_scoped_creds
 
 
 class S3TestCase(TestCase):
@@ -31,3 +35,106 @@ class S3TestCase(TestCase):
 
         # Basic success assertion: ETag present on successful put
         self.assertIn("ETag", resp)
+
+
+class FakeStsClient:
+    """Local stand-in for the STS client: counts assume_role calls."""
+
+    def __init__(self, lifetime: timedelta):
+        self.lifetime = lifetime
+        self.calls = []
+
+    def assume_role(self, **kwargs):
+        self.calls.append(kwargs)
+        return {
+            "Credentials": {
+                "AccessKeyId": f"AK{len(self.calls)}",
+                "SecretAccessKey": "secret",
+                "SessionToken": "session",
+                "Expiration": timezone.now() + self.lifetime,
+            }
+        }
+
+
+@override_settings(
+    AWS_STORAGE_BUCKET_NAME="bucket",
+    AWS_S3_STS_ROLE_ARN="arn:aws:iam::000000000000:role/upload",
+    AWS_S3_STS_ENDPOINT_URL="http://sts.local",
+    STS_CREDENTIALS_MARGIN=15 * 60,
+    STS_CREDENTIALS_REFRESH_AHEAD=60 * 60,
+)
+class StsCredentialBrokerTests(SimpleTestCase):
+
+    def make_broker(self, lifetime: timedelta):
+        fake = FakeStsClient(lifetime)
+        return StsCredentialBroker(client_factory=lambda: fake), fake
+
+    def test_credentials_are_cached_per_prefix(self):
+        broker, fake = self.make_broker(timedelta(hours=12))
+
+        first = broker.get("PO-1", "elector-1")
+        self.assertIs(broker.get("PO-1", "elector-1"), first)
+        broker.get("PO-2", "elector-1")
+
+        self.assertEqual(len(fake.calls), 2)
+        self.assertIn("PO-1/elector-1/*", fake.calls[0]["Policy"])
+
+    def test_credentials_close_to_expiry_are_reissued(self):
+        broker, fake = self.make_broker(timedelta(minutes=5))
+
+        first = broker.get("PO-1", "elector-1")
+        second = broker.get("PO-1", "elector-1")
+
+        self.assertEqual(len(fake.calls), 2)
+        self.assertNotEqual(first["AccessKeyId"], second["AccessKeyId"])
+
+    def test_credentials_are_refreshed_ahead_in_background(self):
+        broker, fake = self.make_broker(timedelta(minutes=30))
+
+        first = broker.get("PO-1", "elector-1")
+        # Still valid: served at once while a refresh runs in the background
+        self.assertIs(broker.get("PO-1", "elector-1"), first)
+        for _ in range(100):
+            if len(fake.calls) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(fake.calls), 2)
+
+    @override_settings(STS_CREDENTIALS_CACHE_SIZE=2)
+    def test_cache_is_bounded_lru(self):
+        broker, fake = self.make_broker(timedelta(hours=12))
+
+        broker.get("PO-1", "elector-1")
+        broker.get("PO-2", "elector-2")
+        broker.get("PO-1", "elector-1")
+        broker.get("PO-3", "elector-3")
+
+        self.assertEqual(
+            list(broker._credentials), [("PO-1", "elector-1"), ("PO-3", "elector-3")]
+        )
+        self.assertEqual(len(fake.calls), 3)
+
+    def test_expired_credentials_are_dropped(self):
+        broker, fake = self.make_broker(timedelta(minutes=5))
+        broker.get("PO-1", "elector-1")
+
+        def unavailable(**kwargs):
+            raise RuntimeError("STS unavailable")
+
+        fake.assume_role = unavailable
+        with self.assertRaises(RuntimeError):
+            broker.get("PO-1", "elector-1")
+
+        self.assertNotIn(("PO-1", "elector-1"), broker._credentials)
+
+    def test_client_is_built_once(self):
+        built = []
+
+        def factory():
+            built.append(1)
+            return FakeStsClient(timedelta(hours=12))
+
+        broker = StsCredentialBroker(client_factory=factory)
+        broker.get("PO-1", "elector-1")
+        broker.get("PO-2", "elector-2")
+        self.assertEqual(len(built), 1)
@@ -1,8 +1,15 @@
+from datetime import timedelta
+
 from core.enums import Age, Gender
 from core.models import PollOffice, Source, Vote, VoteProposed
+from core.utils import ProposalListener
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
 # Keep generated viewset tests
 from .gen.test_vote import GeneratedVoteTestCase
@@ -224,3 +231,281 @@ class VoteApiViewTests(APITestCase):
         self.assertEqual(resp.data.get("code"), "invalid_data")
         self.assertIn("gender", resp.data.get("errors", {}))
         self.assertIn("age", resp.data.get("errors", {}))
+
+    def test_existing_vote_row_is_not_rewritten(self):
+        token_a = self.create_token("02-12-069-0080-16-000712")
+        token_b = self.create_token("02-12-069-0080-16-000713")
+        payload = {"index": 4, "gender": Gender.MALE, "age": Age.LESS_30}
+
+        def vote_ctid():
+            # A new tuple version, even with unchanged values, moves the row
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT ctid::text FROM {Vote._meta.db_table} "
+                    "WHERE poll_office_id = %s AND index = 4",
+                    [self.poll_office.pk],
+                )
+                return cursor.fetchone()[0]
+
+        self.client.post(
+            self.vote_url, data=payload, format="json", **self.auth_headers(token_a)
+        )
+        before = vote_ctid()
+        resp = self.client.post(
+            self.vote_url, data=payload, format="json", **self.auth_headers(token_b)
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        self.assertEqual(vote_ctid(), before)
+
+    def test_authenticated_vote_issues_no_auth_queries(self):
+        token = self.create_token("02-12-069-0080-16-000760")
+        payload = {"index": 11, "gender": Gender.MALE, "age": Age.LESS_30}
+        # First request warms the token cache
+        resp = self.client.post(
+            self.vote_url, data=payload, format="json", **self.auth_headers(token)
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(
+                self.vote_url,
+                data=payload,
+                format="json",
+                **self.auth_headers(token),
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+
+        # Budget: Vote insert (DO NOTHING) and select, one VoteProposed upsert
+        sqls = [query["sql"] for query in ctx.captured_queries]
+        self.assertEqual(len(sqls), 3, msg="\n".join(sqls))
+        self.assertIn("ON CONFLICT DO NOTHING", sqls[0])
+        for table in ("core_sourcetoken", "core_source", "core_polloffice", "auth_user"):
+            for sql in sqls:
+                self.assertNotIn(f'"{table}"', sql)
+
+    def test_unique_constraints_reject_duplicate_rows(self):
+        token = self.create_token("02-12-069-0080-16-000750")
+        payload = {"index": 9, "gender": Gender.MALE, "age": Age.LESS_30}
+        resp = self.client.post(
+            self.vote_url,
+            data=payload,
+            format="json",
+            **self.auth_headers(token),
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        vp = VoteProposed.objects.get(pk=resp.data["id"])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Vote.objects.create(poll_office=vp.vote.poll_office, index=9)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            VoteProposed.objects.create(
+                vote=vp.vote,
+                source=vp.source,
+                gender=Gender.MALE,
+                age=Age.LESS_30,
+            )
+
+
+class VoteBatchApiViewTests(APITestCase):
+    def setUp(self):
+        self.poll_office_identifier = "PO-TEST-BATCH-001"
+        self.poll_office = PollOffice.objects.create(
+            name="Batch Office",
+            identifier=self.poll_office_identifier,
+            country="FR",
+            city="Paris",
+        )
+
+        self.auth_url = reverse("authenticate")
+        self.vote_url = reverse("vote")
+        self.batch_url = reverse("vote-batch")
+
+    def create_token(self, elector_id: str, password: str = "pass") -> str:
+        payload = {
+            "elector_id": elector_id,
+            "password": password,
+            "poll_office_id": self.poll_office_identifier,
+        }
+        resp = self.client.post(self.auth_url, data=payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        return resp.data["token"]
+
+    def auth_headers(self, token: str) -> dict:
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_requires_authentication(self):
+        resp = self.client.post(self.batch_url, data=[], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_empty_batch_rejected(self):
+        token = self.create_token("02-12-069-0080-16-000800")
+        resp = self.client.post(
+            self.batch_url, data=[], format="json", **self.auth_headers(token)
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data.get("code"), "invalid_data")
+
+    def test_bare_list_creates_votes_and_proposals(self):
+        elector_id = "02-12-069-0080-16-000801"
+        token = self.create_token(elector_id)
+        payload = [
+            {"index": i, "gender": Gender.MALE, "age": Age.LESS_30}
+            for i in range(1, 51)
+        ]
+
+        resp = self.client.post(
+            self.batch_url, data=payload, format="json", **self.auth_headers(token)
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        results = resp.data["results"]
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(r["status"] == "created" for r in results))
+
+        src = Source.objects.get(elector_id=elector_id)
+        self.assertEqual(
+            Vote.objects.filter(poll_office=self.poll_office).count(), 50
+        )
+        self.assertEqual(VoteProposed.objects.filter(source=src).count(), 50)
+        vp = VoteProposed.objects.get(pk=results[9]["id"])
+        self.assertEqual(vp.vote.index, 10)
+        self.assertFalse(vp.has_torn)
+
+    def test_batch_updates_existing_and_shares_votes_with_single_endpoint(self):
+        token_a = self.create_token("02-12-069-0080-16-000802")
+        token_b = self.create_token("02-12-069-0080-16-000803")
+
+        # Source A already reported index 1 through the single endpoint
+        r1 = self.client.post(
+            self.vote_url,
+            data={"index": 1, "gender": Gender.MALE, "age": Age.LESS_30},
+            format="json",
+            **self.auth_headers(token_a),
+        )
+        self.assertEqual(r1.status_code, status.HTTP_200_OK, msg=r1.data)
+
+        resp = self.client.post(
+            self.batch_url,
+            data={
+                "votes": [
+                    {"index": 1, "gender": Gender.FEMALE, "age": Age.MORE_60, "has_torn": True},
+                    {"index": 2, "gender": Gender.MALE, "age": Age.LESS_60},
+                ]
+            },
+            format="json",
+            **self.auth_headers(token_a),
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        self.assertEqual(
+            [r["status"] for r in resp.data["results"]], ["updated", "created"]
+        )
+        self.assertEqual(resp.data["results"][0]["id"], r1.data["id"])
+        vp = VoteProposed.objects.get(pk=r1.data["id"])
+        self.assertEqual(vp.gender, Gender.FEMALE)
+        self.assertTrue(vp.has_torn)
+
+        # Another source replaying the same indexes lands on the same Vote rows
+        resp = self.client.post(
+            self.batch_url,
+            data=[
+                {"index": 1, "gender": Gender.FEMALE, "age": Age.MORE_60},
+                {"index": 2, "gender": Gender.MALE, "age": Age.LESS_60},
+            ],
+            format="json",
+            **self.auth_headers(token_b),
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        self.assertEqual(
+            Vote.objects.filter(poll_office=self.poll_office).count(), 2
+        )
+        self.assertEqual(VoteProposed.objects.count(), 4)
+
+    def test_invalid_and_duplicate_items_get_their_own_status(self):
+        token = self.create_token("02-12-069-0080-16-000804")
+        payload = [
+            {"index": 1, "gender": Gender.MALE, "age": Age.LESS_30},
+            {"index": 2, "gender": "invalid", "age": Age.LESS_30},
+            {"index": 1, "gender": Gender.FEMALE, "age": Age.LESS_60},
+        ]
+
+        resp = self.client.post(
+            self.batch_url, data=payload, format="json", **self.auth_headers(token)
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        results = resp.data["results"]
+        self.assertEqual(
+            [r["status"] for r in results], ["duplicate", "invalid", "created"]
+        )
+        self.assertIn("gender", results[1]["errors"])
+
+        # The last item for an index wins
+        vp = VoteProposed.objects.get(pk=results[2]["id"])
+        self.assertEqual(vp.gender, Gender.FEMALE)
+        self.assertEqual(
+            Vote.objects.filter(poll_office=self.poll_office).count(), 1
+        )
+
+
+@override_settings(DECIDER_NOTIFY=True)
+class VoteNotifyTests(APITransactionTestCase):
+    """Ingestion NOTIFYs committed proposals to deciders started with --listen."""
+
+    def setUp(self):
+        self.poll_office_identifier = "PO-TEST-NOTIFY-001"
+        self.poll_office = PollOffice.objects.create(
+            name="Notify Office",
+            identifier=self.poll_office_identifier,
+            country="FR",
+            city="Paris",
+        )
+
+        self.auth_url = reverse("authenticate")
+        self.vote_url = reverse("vote")
+        self.batch_url = reverse("vote-batch")
+
+        self.listener = ProposalListener(
+            settings.VOTE_PROPOSED_CHANNEL, window=timedelta(0)
+        )
+        self.listener.listen()
+
+    def create_token(self, elector_id: str, password: str = "pass") -> str:
+        payload = {
+            "elector_id": elector_id,
+            "password": password,
+            "poll_office_id": self.poll_office_identifier,
+        }
+        resp = self.client.post(self.auth_url, data=payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+        return resp.data["token"]
+
+    def auth_headers(self, token: str) -> dict:
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_single_vote_notifies_its_key(self):
+        token = self.create_token("02-12-069-0080-16-000900")
+        resp = self.client.post(
+            self.vote_url,
+            data={"index": 4, "gender": Gender.MALE, "age": Age.LESS_30},
+            format="json",
+            **self.auth_headers(token),
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+
+        self.assertEqual(self.listener.wait(10), [(self.poll_office.pk, 4)])
+
+    def test_batch_notifies_each_index_once(self):
+        token = self.create_token("02-12-069-0080-16-000901")
+        payload = [
+            {"index": i, "gender": Gender.FEMALE, "age": Age.LESS_60}
+            for i in (3, 1, 2, 1)
+        ]
+        resp = self.client.post(
+            self.batch_url, data=payload, format="json", **self.auth_headers(token)
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, msg=resp.data)
+
+        keys = self.listener.wait(10)
+        self.assertEqual(
+            sorted(keys), [(self.poll_office.pk, i) for i in (1, 2, 3)]
+        )
+        self.assertEqual(self.listener.pending_count, 0)
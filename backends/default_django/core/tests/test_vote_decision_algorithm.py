@@ -1,18 +1,37 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
 
 from core.enums import Age, Gender, SourceType
-from core.models import PollOffice, Source, Vote, VoteProposed, Voter, VoteVerified
-from core.utils import compute_vote_decision
+from core.management.commands.decide_votes import Command as DecideVotesCommand
+from core.models import (
+    AreaCounters,
+    PollOffice,
+    PollOfficeCounters,
+    Source,
+    Vote,
+    VoteAccepted,
+    VoteProposed,
+    Voter,
+    VoteVerified,
+)
+from core.utils import (
+    DECIDE_WINDOW,
+    ProposalListener,
+    accept_votes_bulk,
+    compute_vote_decision,
+    compute_vote_decisions_bulk,
+    pending_votes,
+    upcoming_votes,
+)
 
 
-class VoteDecisionAlgorithmTests(TestCase):
-    """
-    End-to-end tests for the vote decision algorithm (compute_vote_decision).
-
-    These tests create real DB objects (no mocking) and validate both outcomes
-    and explanation details across many scenarios: no data, only verified,
-    only proposed, ties, and mixed distributions for gender, age, and has_torn.
-    """
+class VoteDecisionTestCase(TestCase):
+    """Shared fixtures to build votes with proposals and verifications."""
 
     def setUp(self):
         # Minimal PollOffice used across tests
@@ -43,6 +62,16 @@ class VoteDecisionAlgorithmTests(TestCase):
             voter=voter, vote=vote, gender=gender, age=age, has_torn=has_torn
         )
 
+
+class VoteDecisionAlgorithmTests(VoteDecisionTestCase):
+    """
+    End-to-end tests for the vote decision algorithm (compute_vote_decision).
+
+    These tests create real DB objects (no mocking) and validate both outcomes
+    and explanation details across many scenarios: no data, only verified,
+    only proposed, ties, and mixed distributions for gender, age, and has_torn.
+    """
+
     # --- Core behavior tests ---
 
     def test_no_data_returns_none(self):
@@ -229,3 +258,228 @@ class VoteDecisionAlgorithmTests(TestCase):
         self._add_proposed(vote, 1, gender=Gender.FEMALE, age=Age.LESS_60, has_torn=False)
         result, _ = compute_vote_decision(vote, include_details=False)
         self.assertIsInstance(result[2], bool)
+
+
+class BulkVoteDecisionTests(VoteDecisionTestCase):
+    """
+    compute_vote_decisions_bulk and accept_votes_bulk must decide exactly like
+    compute_vote_decision, including ties and has_torn tie-breaks.
+    """
+
+    def _seed_scenarios(self):
+        """Create one vote per scenario and return them."""
+        votes = []
+        src = iter(range(1, 1000))
+
+        # single proposed
+        vote = self._make_vote(1)
+        self._add_proposed(vote, next(src), gender=Gender.FEMALE, age=Age.LESS_30, has_torn=True)
+        votes.append(vote)
+
+        # only verified
+        vote = self._make_vote(2)
+        self._add_verified(vote, gender=Gender.MALE, age=Age.LESS_60, has_torn=True)
+        votes.append(vote)
+
+        # gender and age ties, has_torn tie without verified
+        vote = self._make_vote(3)
+        self._add_proposed(vote, next(src), gender=Gender.MALE, age=Age.LESS_30, has_torn=True)
+        self._add_proposed(vote, next(src), gender=Gender.FEMALE, age=Age.LESS_60, has_torn=False)
+        votes.append(vote)
+
+        # verified breaks has_torn tie, 2 vs 2.5 on gender
+        vote = self._make_vote(4)
+        self._add_proposed(vote, next(src), gender=Gender.FEMALE, age=Age.LESS_60, has_torn=True)
+        self._add_proposed(vote, next(src), gender=Gender.FEMALE, age=Age.LESS_60, has_torn=False)
+        self._add_proposed(vote, next(src), gender=Gender.MALE, age=Age.LESS_60, has_torn=False)
+        self._add_verified(vote, gender=Gender.MALE, age=Age.MORE_60, has_torn=True)
+        votes.append(vote)
+
+        # age tie at 2.0 with a losing verified value
+        vote = self._make_vote(5)
+        for age in (Age.LESS_30, Age.LESS_30, Age.MORE_60, Age.MORE_60):
+            self._add_proposed(vote, next(src), gender=Gender.MALE, age=age, has_torn=False)
+        self._add_verified(vote, gender=Gender.MALE, age=Age.LESS_60, has_torn=True)
+        votes.append(vote)
+
+        # proposals outweigh verified
+        vote = self._make_vote(6)
+        for _ in range(3):
+            self._add_proposed(vote, next(src), gender=Gender.FEMALE, age=Age.MORE_60, has_torn=False)
+        self._add_verified(vote, gender=Gender.MALE, age=Age.LESS_60, has_torn=True)
+        votes.append(vote)
+
+        return votes
+
+    def test_bulk_matches_per_vote_decision(self):
+        votes = self._seed_scenarios()
+        empty_vote = self._make_vote(7)
+
+        decisions = compute_vote_decisions_bulk([v.id for v in votes] + [empty_vote.id])
+
+        self.assertNotIn(empty_vote.id, decisions)
+        for vote in votes:
+            expected, _ = compute_vote_decision(vote)
+            self.assertEqual(decisions[vote.id], expected, f"vote index {vote.index}")
+
+    def test_accept_votes_bulk_creates_and_skips_existing(self):
+        votes = self._seed_scenarios()
+        first = votes[0]
+        VoteAccepted.objects.create(
+            vote=first, gender=Gender.MALE, age=Age.MORE_60, has_torn=False
+        )
+
+        created = accept_votes_bulk([v.id for v in votes])
+
+        self.assertEqual(created, len(votes) - 1)
+        self.assertEqual(VoteAccepted.objects.count(), len(votes))
+        # Existing decision is left untouched
+        self.assertEqual(VoteAccepted.objects.get(vote=first).gender, Gender.MALE)
+        for vote in votes[1:]:
+            expected, _ = compute_vote_decision(vote)
+            accepted = VoteAccepted.objects.get(vote=vote)
+            self.assertEqual((accepted.gender, accepted.age, accepted.has_torn), expected)
+
+    def test_empty_input(self):
+        self.assertEqual(compute_vote_decisions_bulk([]), {})
+        self.assertEqual(accept_votes_bulk([]), 0)
+
+    def _decide_with(self, engine, vote_ids):
+        """(returned count, output) of a decide_votes batch, rolled back."""
+        command = DecideVotesCommand(stdout=StringIO(), stderr=StringIO())
+        command.engine = engine
+        process = (
+            command._process_batch_sql if engine == "sql" else command._process_batch_python
+        )
+        with transaction.atomic():
+            created = process(
+                Vote.objects.filter(id__in=vote_ids).order_by("id"),
+                cycle_no=1,
+                verbosity=0,
+            )
+            transaction.set_rollback(True)
+        return created, command.stdout.getvalue()
+
+    def test_engines_report_the_same_counts(self):
+        votes = self._seed_scenarios()
+        VoteAccepted.objects.create(
+            vote=votes[0], gender=Gender.MALE, age=Age.MORE_60, has_torn=False
+        )
+        vote_ids = [v.id for v in votes]
+
+        python_run = self._decide_with("python", vote_ids)
+        sql_run = self._decide_with("sql", vote_ids)
+
+        self.assertEqual(python_run, sql_run)
+        self.assertEqual(python_run[0], len(votes) - 1)
+
+
+class PendingVotesTests(VoteDecisionTestCase):
+    """pending_votes is the batch the deciders claim with SKIP LOCKED."""
+
+    def _age_proposals(self, vote: Vote, minutes: int):
+        VoteProposed.objects.filter(vote=vote).update(
+            created_at=timezone.now() - timedelta(minutes=minutes)
+        )
+
+    def test_only_undecided_votes_past_the_window(self):
+        ready = self._make_vote(1)
+        young = self._make_vote(2)
+        decided = self._make_vote(3)
+        for src_idx, vote in enumerate((ready, young, decided), start=1):
+            for offset in (0, 10):
+                self._add_proposed(
+                    vote, src_idx + offset, gender=Gender.MALE, age=Age.LESS_30, has_torn=False
+                )
+        self._age_proposals(ready, 10)
+        self._age_proposals(decided, 10)
+        VoteAccepted.objects.create(
+            vote=decided, gender=Gender.MALE, age=Age.LESS_30, has_torn=False
+        )
+
+        # Each vote is returned once even with several proposals
+        self.assertEqual(list(pending_votes()), [ready])
+
+    def test_keys_restrict_the_batch(self):
+        votes = [self._make_vote(index) for index in (1, 2, 3)]
+        for src_idx, vote in enumerate(votes, start=1):
+            self._add_proposed(vote, src_idx, gender=Gender.MALE, age=Age.LESS_30, has_torn=False)
+            self._age_proposals(vote, 10)
+
+        keys = [(self.office.pk, 1), (self.office.pk, 3), (self.office.pk + 1, 2)]
+        self.assertEqual(list(pending_votes(keys)), [votes[0], votes[2]])
+
+    def test_upcoming_votes_are_due_after_their_first_proposal(self):
+        young = self._make_vote(1)
+        ready = self._make_vote(2)
+        self._add_proposed(young, 1, gender=Gender.MALE, age=Age.LESS_30, has_torn=False)
+        self._add_proposed(young, 2, gender=Gender.MALE, age=Age.LESS_30, has_torn=False)
+        self._add_proposed(ready, 3, gender=Gender.MALE, age=Age.LESS_30, has_torn=False)
+        self._age_proposals(ready, 10)
+        first = timezone.now() - timedelta(minutes=2)
+        VoteProposed.objects.filter(vote=young, source__elector_id="E1").update(created_at=first)
+
+        self.assertEqual(
+            upcoming_votes(), [((self.office.pk, 1), first + DECIDE_WINDOW)]
+        )
+
+    def test_listener_waits_for_scheduled_keys(self):
+        listener = ProposalListener("unused")
+        now = timezone.now()
+        listener.schedule([((self.office.pk, 1), now - timedelta(seconds=1))])
+        listener.schedule([((self.office.pk, 2), now + timedelta(hours=1))])
+
+        self.assertEqual(listener.wait(10, timeout=0.1), [(self.office.pk, 1)])
+        self.assertEqual(listener.wait(10, timeout=0.1), [])
+        self.assertEqual(listener.pending_count, 1)
+
+
+class DecideVotesWorkersTests(TransactionTestCase):
+    """Concurrent deciders claim disjoint batches and commit them all."""
+
+    def setUp(self):
+        self.offices = [
+            PollOffice.objects.create(
+                name=f"Office {name}", identifier=f"PO-WORK-{name}", country="CM", region=name
+            )
+            for name in ("A", "B")
+        ]
+        source = Source.objects.create(
+            elector_id="E-WORK", password="pass", type=SourceType.UNVERIFIED
+        )
+        # By id, the first batch touches A then B and the second B then A
+        a, b = self.offices
+        for office, index in ((a, 1), (b, 1), (b, 2), (a, 2)):
+            vote = Vote.objects.create(poll_office=office, index=index)
+            VoteProposed.objects.create(
+                source=source, vote=vote, gender=Gender.MALE, age=Age.LESS_30, has_torn=False
+            )
+        VoteProposed.objects.update(created_at=timezone.now() - timedelta(minutes=10))
+
+    def _worker(self, barrier, errors):
+        command = DecideVotesCommand(stdout=StringIO(), stderr=StringIO())
+        command.engine = "python"
+        try:
+            barrier.wait()
+            command._process_batch(batch_size=2, cycle_no=1, verbosity=0)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_two_workers_decide_disjoint_batches(self):
+        barrier = threading.Barrier(2)
+        errors = []
+        workers = [
+            threading.Thread(target=self._worker, args=(barrier, errors)) for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(VoteAccepted.objects.count(), 4)
+        for office in self.offices:
+            self.assertEqual(PollOfficeCounters.objects.get(poll_office=office).votes, 2)
+        self.assertEqual(AreaCounters.objects.get(level="country", country="CM").votes, 4)
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.enums import Age, Gender
+from core.models import PollOffice, Vote, VoteAccepted, VoteBucket
+from core.utils import (
+    bucket_start,
+    bump_vote_buckets,
+    get_vote_series,
+    poll_office_areas,
+    series_scope,
+)
+
+
+class VoteSeriesTests(APITestCase):
+    def setUp(self):
+        self.office = PollOffice.objects.create(
+            name="Series",
+            identifier="PO-SERIES-001",
+            country="CM",
+            region="Centre",
+        )
+        self.morning = datetime(2025, 10, 12, 8, 0, tzinfo=dt_timezone.utc)
+
+    def _accept_vote(self, index):
+        vote = Vote.objects.create(poll_office=self.office, index=index)
+        VoteAccepted.objects.create(vote=vote, gender=Gender.MALE, age=Age.LESS_30)
+
+    def _bump(self, moment, votes=1):
+        bump_vote_buckets(
+            {self.office.pk: votes}, poll_office_areas([self.office.pk]), moment
+        )
+
+    def test_bucket_start(self):
+        moment = datetime(2025, 10, 12, 8, 47, 31, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(bucket_start(moment, 60), moment.replace(second=0))
+        self.assertEqual(bucket_start(moment, 900), moment.replace(minute=45, second=0))
+        self.assertEqual(bucket_start(moment, 3600), moment.replace(minute=0, second=0))
+
+    def test_votes_are_bucketed_per_scope_and_width(self):
+        self._bump(self.morning + timedelta(minutes=1), votes=2)
+        self._bump(self.morning + timedelta(minutes=20))
+
+        region = series_scope(area=("region", "CM", "Centre", "", ""))
+        self.assertEqual(region, "region:CM|Centre")
+        for scope in (series_scope(), series_scope(self.office.pk), region):
+            hourly = VoteBucket.objects.get(scope=scope, width=3600, start=self.morning)
+            self.assertEqual(hourly.votes, 3)
+        self.assertEqual(
+            VoteBucket.objects.filter(scope=series_scope(), width=60).count(), 2
+        )
+
+    def test_series_is_downsampled(self):
+        for minute in range(0, 180, 5):
+            self._bump(self.morning + timedelta(minutes=minute))
+
+        step, series = get_vote_series(
+            series_scope(), self.morning, self.morning + timedelta(hours=3), 4
+        )
+
+        self.assertEqual(step, 3600)
+        self.assertEqual([point["votes"] for point in series], [12, 12, 12])
+
+        step, series = get_vote_series(
+            series_scope(), self.morning, self.morning + timedelta(hours=3), 2
+        )
+
+        self.assertLessEqual(len(series), 2)
+        self.assertEqual(sum(point["votes"] for point in series), 36)
+
+    def test_empty_steps_are_zero_filled(self):
+        self._bump(self.morning)
+        self._bump(self.morning + timedelta(minutes=3))
+
+        step, series = get_vote_series(
+            series_scope(), self.morning, self.morning + timedelta(minutes=4), 10
+        )
+
+        self.assertEqual(step, 60)
+        self.assertEqual([point["votes"] for point in series], [1, 0, 0, 1])
+
+    def test_endpoint_defaults_to_first_bucket(self):
+        self._accept_vote(1)
+        self._accept_vote(2)
+
+        resp = self.client.get(
+            reverse("turnout-series"), {"poll_office": "PO-SERIES-001"}
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(p["votes"] for p in resp.json()["series"]), 2)
+
+    def test_endpoint_by_area(self):
+        self._bump(self.morning)
+
+        resp = self.client.get(
+            reverse("turnout-series"),
+            {
+                "level": "region",
+                "country": "CM",
+                "region": "Centre",
+                "since": "2025-10-12T08:00:00Z",
+                "until": "2025-10-12T08:02:00Z",
+            },
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()["step"], 60)
+        self.assertEqual([p["votes"] for p in resp.json()["series"]], [1, 0])
+
+    def test_invalid_parameters(self):
+        resp = self.client.get(
+            reverse("turnout-series"), {"since": "yesterday", "points": "0"}
+        )
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(resp.json()["errors"]), {"since", "points"})
+
+    def test_rebuild_command(self):
+        self._accept_vote(1)
+        expected = set(VoteBucket.objects.values_list("scope", "width", "start", "votes"))
+        VoteBucket.objects.update(votes=42)
+
+        call_command("rebuild_vote_buckets", stdout=StringIO())
+
+        self.assertEqual(
+            set(VoteBucket.objects.values_list("scope", "width", "start", "votes")),
+            expected,
+        )
@@ -1,4 +1,10 @@
-from core.models import CandidateParty, PollOffice, Source
+from core.models import (
+    CandidateParty,
+    PollOffice,
+    Source,
+    VotingPaperResult,
+    VotingPaperResultProposed,
+)
 from core.tests.gen.test_votingpaperresult import (
     GeneratedVotingPaperResultTestCase,
 )
@@ -137,6 +143,35 @@ class VotingPaperResultViewTests(APITestCase):
         src = Source.objects.get(elector_id="02-12-069-0080-16-100104")
         self.assertIsNotNone(src.pk)
 
+    def test_resubmission_keeps_first_proposal(self):
+        token = self._create_token("02-12-069-0080-16-100105")
+        other_identifier = "other-movement-john-doe"
+        CandidateParty.objects.create(
+            party_name="Other Movement",
+            candidate_name="John Doe",
+            identifier=other_identifier,
+        )
+
+        for party_id in (self.party_identifier, other_identifier):
+            resp = self.client.post(
+                self.vpr_url,
+                data={"index": 4, "party_id": party_id},
+                format="json",
+                **self._auth_headers(token),
+            )
+            self.assertEqual(
+                resp.status_code,
+                status.HTTP_200_OK,
+                msg=getattr(resp, "data", None),
+            )
+
+        self.assertEqual(VotingPaperResult.objects.filter(index=4).count(), 1)
+        proposals = VotingPaperResultProposed.objects.filter(vp_result__index=4)
+        self.assertEqual(proposals.count(), 1)
+        self.assertEqual(
+            proposals.get().party_candidate.identifier, self.party_identifier
+        )
+
 
 class VotingPaperResultTestCase(APITestCase):
 
@@ -0,0 +1,25 @@
+import re
+import unicodedata
+from typing import Optional
+
+
+def strip_accents(s: str) -> str:
+    nfkd = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in nfkd if not unicodedata.combining(ch))
+
+
+def normalize_text(s: Optional[str]) -> str:
+    """Accent free, lower case, single spaced s without edge punctuation.
+
+    Used to match the headers of the official PDFs and the poll office
+    search terms against PollOffice.search_text.
+    """
+    if s is None:
+        return ""
+    s = str(s).strip()
+    if not s:
+        return ""
+    s = strip_accents(s).lower()
+    s = re.sub(r"\s+", " ", s)
+    s = s.strip(" :;,.|/\\-\u00a0")
+    return s
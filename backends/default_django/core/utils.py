@@ -1,23 +1,56 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
+import logging
+import math
+import multiprocessing
+import select
+import threading
 import time
-from collections import defaultdict
-from typing import Any, Dict, Iterable, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from django.conf import settings
-import boto3
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Prefetch, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from redis.exceptions import LockError, RedisError
 
 from core.enums import Age, Gender
 from core.models import (
+    Area,
+    AreaCounters,
+    AreaCoverage,
+    AreaResult,
+    LastAccepted,
+    PollOffice,
+    PollOfficeCounters,
     Vote,
+    VoteAccepted,
     VoteProposed,
     VoteVerified,
+    VoteBucket,
     VotingPaperResult,
     VotingPaperResultProposed, CandidateParty,
+    Source,
+    SourceToken,
 )
+from core.live import publish_live
+
+logger = logging.getLogger("api")
 
 Weight = float
 
+# Proposals younger than this are still in flight and are not decided yet
+DECIDE_WINDOW = timedelta(minutes=5)
+
+Key = Tuple[int, int]
+
 
 def _choose_value(
     proposed_values: Iterable[Any],
@@ -128,6 +161,1291 @@ def compute_vote_decision(
     }
 
 
+# Same rules as _choose_value, evaluated by PostgreSQL for a whole batch.
+# Weights are doubled (proposed=2, verified=3) so ties compare integers.
+# - gender/age: a tie on the max weight gives UNDECIDED
+# - has_torn: a tie can only happen between proposals (verified weights are
+#   odd), where _choose_value keeps the smallest by str, i.e. False
+_BULK_VOTE_DECISION_SQL = """
+WITH weighted AS (
+    SELECT vote_id, gender, age, has_torn, 2 AS weight
+    FROM {proposed}
+    WHERE vote_id = ANY(%(vote_ids)s)
+    UNION ALL
+    SELECT vote_id, gender, age, has_torn, 3 AS weight
+    FROM {verified}
+    WHERE vote_id = ANY(%(vote_ids)s)
+),
+gender_ranked AS (
+    SELECT vote_id, gender AS value,
+           RANK() OVER (PARTITION BY vote_id ORDER BY SUM(weight) DESC) AS rnk
+    FROM weighted
+    GROUP BY vote_id, gender
+),
+age_ranked AS (
+    SELECT vote_id, age AS value,
+           RANK() OVER (PARTITION BY vote_id ORDER BY SUM(weight) DESC) AS rnk
+    FROM weighted
+    GROUP BY vote_id, age
+),
+has_torn_ranked AS (
+    SELECT vote_id, has_torn AS value,
+           RANK() OVER (PARTITION BY vote_id ORDER BY SUM(weight) DESC) AS rnk
+    FROM weighted
+    GROUP BY vote_id, has_torn
+),
+gender_decision AS (
+    SELECT vote_id,
+           CASE WHEN COUNT(*) > 1 THEN %(gender_undecided)s
+                ELSE MIN(value) END AS value
+    FROM gender_ranked
+    WHERE rnk = 1
+    GROUP BY vote_id
+),
+age_decision AS (
+    SELECT vote_id,
+           CASE WHEN COUNT(*) > 1 THEN %(age_undecided)s
+                ELSE MIN(value) END AS value
+    FROM age_ranked
+    WHERE rnk = 1
+    GROUP BY vote_id
+),
+has_torn_decision AS (
+    SELECT vote_id, BOOL_AND(value) AS value
+    FROM has_torn_ranked
+    WHERE rnk = 1
+    GROUP BY vote_id
+)
+SELECT g.vote_id, g.value, a.value, t.value
+FROM gender_decision g
+JOIN age_decision a USING (vote_id)
+JOIN has_torn_decision t USING (vote_id)
+"""
+
+
+def compute_vote_decisions_bulk(
+    vote_ids: Iterable[int],
+) -> Dict[int, Tuple[str, str, bool]]:
+    """Compute the (gender, age, has_torn) decision of many votes in one query.
+
+    Gives the same result as compute_vote_decision for each vote. Votes
+    without proposals nor verification are missing from the returned dict.
+    """
+    vote_ids = list(vote_ids)
+    if not vote_ids:
+        return {}
+
+    sql = _BULK_VOTE_DECISION_SQL.format(
+        proposed=VoteProposed._meta.db_table,
+        verified=VoteVerified._meta.db_table,
+    )
+    params = {
+        "vote_ids": vote_ids,
+        "gender_undecided": Gender.UNDECIDED,
+        "age_undecided": Age.UNDECIDED,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return {
+        vote_id: (gender, age, has_torn)
+        for vote_id, gender, age, has_torn in rows
+    }
+
+
+def accept_votes_bulk(vote_ids: Iterable[int]) -> int:
+    """Decide the given votes in SQL and write their VoteAccepted rows.
+
+    Votes that already have a VoteAccepted are left untouched. Returns the
+    number of VoteAccepted created.
+    """
+    decisions = compute_vote_decisions_bulk(vote_ids)
+    if not decisions:
+        return 0
+    return len(accept_vote_decisions(decisions))
+
+
+def accept_vote_decisions(decisions: Dict[int, Tuple[str, str, bool]]) -> List[int]:
+    """Write the VoteAccepted rows of {vote_id: (gender, age, has_torn)}.
+
+    Votes that already have a VoteAccepted are left untouched. The counters
+    and last vote pointers of the whole batch are bumped once, in the same
+    transaction: bumping them per vote would lock the shared rows in the
+    order the votes come and deadlock concurrent deciders. Returns the ids
+    of the votes accepted.
+    """
+    if not decisions:
+        return []
+    with transaction.atomic():
+        # Deciders hold the Vote row locks, so nobody accepts these meanwhile
+        existing = set(
+            VoteAccepted.objects.filter(vote_id__in=decisions).values_list(
+                "vote_id", flat=True
+            )
+        )
+        new = {
+            vote_id: decision
+            for vote_id, decision in decisions.items()
+            if vote_id not in existing
+        }
+        # bulk_create skips increment_counters_on_accept
+        VoteAccepted.objects.bulk_create(
+            [
+                VoteAccepted(
+                    vote_id=vote_id, gender=gender, age=age, has_torn=has_torn
+                )
+                for vote_id, (gender, age, has_torn) in new.items()
+            ],
+            ignore_conflicts=True,
+        )
+        poll_offices = dict(
+            Vote.objects.filter(id__in=new).values_list("id", "poll_office_id")
+        )
+        bump_poll_office_counters(
+            (poll_offices[vote_id], *decision) for vote_id, decision in new.items()
+        )
+        update_last_votes(new)
+    return list(new)
+
+
+_INCREMENT_SQL = """
+INSERT INTO {table} AS c ({keys}, {fields}, updated_at)
+VALUES {rows}
+ON CONFLICT ({keys}) DO UPDATE SET {increments}, updated_at = EXCLUDED.updated_at
+"""
+
+
+def _increment_rows(
+    model,
+    key_fields: Tuple[str, ...],
+    deltas: Dict[tuple, Dict[str, int]],
+    returning: Tuple[str, ...] = (),
+) -> List[tuple]:
+    """Add deltas ({key: {field: delta}}) to the rows of model with one upsert.
+
+    Rows are upserted in key order so concurrent transactions lock them in
+    the same order. That only holds within one call: a transaction must
+    bump a table once, for its whole batch, or deadlock. Returns the returning columns of the
+    upserted rows, after the increment.
+    """
+    if not deltas:
+        return []
+    fields = tuple(next(iter(deltas.values())))
+    row_sql = "({}, NOW())".format(", ".join(["%s"] * (len(key_fields) + len(fields))))
+    sql = _INCREMENT_SQL.format(
+        table=model._meta.db_table,
+        keys=", ".join(key_fields),
+        fields=", ".join(fields),
+        rows=", ".join([row_sql] * len(deltas)),
+        increments=", ".join(f"{f} = c.{f} + EXCLUDED.{f}" for f in fields),
+    )
+    if returning:
+        sql += f"RETURNING {', '.join(returning)}\n"
+    params = []
+    for key in sorted(deltas):
+        params.extend(key)
+        params.extend(deltas[key][f] for f in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if returning else []
+
+
+def poll_office_areas(poll_office_ids: Iterable[int]) -> Dict[int, List[Tuple[str, ...]]]:
+    """Area keys (level, country, region, city, district) of each poll office.
+
+    Every poll office belongs to one area per level.
+    """
+    rows = PollOffice.objects.filter(id__in=set(poll_office_ids)).values_list(
+        "id", *Area.LEVELS
+    )
+    return {poll_office_id: _areas_of(path) for poll_office_id, *path in rows}
+
+
+def _areas_of(path: Iterable[Optional[str]]) -> List[Tuple[str, ...]]:
+    """Area keys of the PollOffice whose Area.LEVELS fields are path."""
+    path = [value or "" for value in path]
+    return [
+        (level, *path[: depth + 1], *[""] * (len(path) - depth - 1))
+        for depth, level in enumerate(Area.LEVELS)
+    ]
+
+
+def bump_poll_office_counters(accepted: Iterable[Tuple[int, str, str, bool]]) -> None:
+    """Add accepted votes, given as (poll_office_id, gender, age, has_torn), to
+    the PollOfficeCounters rows and to the AreaCounters of their areas.
+
+    Must run in the transaction inserting the VoteAccepted rows.
+    """
+    fields = PollOfficeCounters.COUNTER_FIELDS
+    deltas: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(fields, 0))
+    for poll_office_id, gender, age, has_torn in accepted:
+        delta = deltas[(poll_office_id,)]
+        delta["votes"] += 1
+        if gender in delta:
+            delta[gender] += 1
+        if age in delta:
+            delta[age] += 1
+        if has_torn:
+            delta["has_torn"] += 1
+    if not deltas:
+        return
+
+    rows = _increment_rows(
+        PollOfficeCounters, ("poll_office_id",), deltas, returning=("poll_office_id", "votes")
+    )
+    # Offices whose counted votes are all from this batch start reporting
+    reporting = {
+        poll_office_id
+        for poll_office_id, votes in rows
+        if votes == deltas[(poll_office_id,)]["votes"]
+    }
+
+    area_deltas: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(fields, 0))
+    coverage_deltas: Dict[tuple, Dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(AreaCoverage.COVERAGE_FIELDS, 0)
+    )
+    areas = poll_office_areas(poll_office_id for poll_office_id, in deltas)
+    for (poll_office_id,), delta in deltas.items():
+        for area in areas.get(poll_office_id, []):
+            for f in fields:
+                area_deltas[area][f] += delta[f]
+            if poll_office_id in reporting:
+                coverage_deltas[area]["reporting_offices"] += 1
+    _increment_rows(AreaCounters, ("level", *Area.LEVELS), area_deltas)
+    _increment_rows(AreaCoverage, ("level", *Area.LEVELS), coverage_deltas)
+    bump_vote_buckets(
+        {poll_office_id: delta["votes"] for (poll_office_id,), delta in deltas.items()},
+        areas,
+        timezone.now(),
+    )
+
+    bump_versions_on_commit(
+        ["votes:all", *(f"votes:{poll_office_id}" for poll_office_id, in deltas)]
+    )
+    publish_live(
+        "stats",
+        {poll_office_id: delta for (poll_office_id,), delta in deltas.items()},
+    )
+
+
+def bump_area_results(accepted: Iterable[Tuple[int, int]]) -> None:
+    """Add accepted ballots, given as (poll_office_id, party_id), to the
+    AreaResult rows of their areas.
+
+    Must run in the transaction setting VotingPaperResult.accepted_candidate_party.
+    """
+    accepted = list(accepted)
+    areas = poll_office_areas(poll_office_id for poll_office_id, _ in accepted)
+    deltas: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {"ballots": 0})
+    for poll_office_id, party_id in accepted:
+        for area in areas.get(poll_office_id, []):
+            deltas[(*area, party_id)]["ballots"] += 1
+    _increment_rows(AreaResult, ("level", *Area.LEVELS, "party_id"), deltas)
+
+    if not accepted:
+        return
+    identifiers = dict(
+        CandidateParty.objects.cache()
+        .filter(pk__in={party_id for _, party_id in accepted})
+        .values_list("pk", "identifier")
+    )
+    ballots: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for poll_office_id, party_id in accepted:
+        ballots[poll_office_id][identifiers[party_id]] += 1
+    publish_live("results", ballots)
+
+
+SERIES_GLOBAL = "all"
+
+
+def series_scope(
+    poll_office_id: Optional[int] = None, area: Optional[Tuple[str, ...]] = None
+) -> str:
+    """VoteBucket.scope of a poll office, of an area key or, by default, global."""
+    if poll_office_id is not None:
+        return f"office:{poll_office_id}"
+    if area is not None:
+        level, *path = area
+        return f"{level}:" + "|".join(path[: Area.LEVELS.index(level) + 1])
+    return SERIES_GLOBAL
+
+
+def bucket_start(moment: datetime, width: int) -> datetime:
+    """Start of the width seconds bucket holding moment, aligned on the epoch."""
+    ts = int(moment.timestamp())
+    return datetime.fromtimestamp(ts - ts % width, tz=dt_timezone.utc)
+
+
+def bump_vote_buckets(
+    votes: Dict[int, int],
+    areas: Dict[int, List[Tuple[str, ...]]],
+    moment: datetime,
+) -> None:
+    """Add accepted votes ({poll_office_id: votes}) at moment to the VoteBucket
+    rows of every width, globally, per poll office and per area."""
+    deltas: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {"votes": 0})
+    for width in settings.VOTE_BUCKET_WIDTHS:
+        start = bucket_start(moment, width)
+        for poll_office_id, count in votes.items():
+            scopes = [
+                SERIES_GLOBAL,
+                series_scope(poll_office_id),
+                *(series_scope(area=area) for area in areas.get(poll_office_id, [])),
+            ]
+            for scope in scopes:
+                deltas[(scope, width, start)]["votes"] += count
+    _increment_rows(VoteBucket, ("scope", "width", "start"), deltas)
+
+
+def get_vote_series(
+    scope: str, since: Optional[datetime], until: datetime, max_points: int
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """Accepted votes of scope between since and until as (step, points).
+
+    Reads the widest VoteBucket width that still gives max_points points,
+    then sums consecutive buckets when even the widest gives more, so the
+    series has at most max_points points whatever the range. Empty steps
+    are zero filled. since defaults to the first bucket of scope.
+    """
+    widths = sorted(settings.VOTE_BUCKET_WIDTHS)
+    if since is None:
+        since = (
+            VoteBucket.objects.filter(scope=scope, width=widths[-1])
+            .order_by("start")
+            .values_list("start", flat=True)
+            .first()
+        )
+        if since is None:
+            return widths[0], []
+    span = max((until - since).total_seconds(), 1)
+
+    width = next((w for w in widths if span / w <= max_points), widths[-1])
+    step = width * max(1, math.ceil(span / width / max_points))
+    # Aligning since on the step may add a point
+    while math.ceil((until - bucket_start(since, step)).total_seconds() / step) > max_points:
+        step += width
+
+    votes: Dict[datetime, int] = defaultdict(int)
+    for start, count in VoteBucket.objects.filter(
+        scope=scope,
+        width=width,
+        start__gte=bucket_start(since, width),
+        start__lt=until,
+    ).values_list("start", "votes"):
+        votes[bucket_start(start, step)] += count
+
+    points = []
+    start = bucket_start(since, step)
+    while start < until:
+        points.append({"start": start, "votes": votes.get(start, 0)})
+        start += timedelta(seconds=step)
+    return step, points
+
+
+def rebuild_area_coverage() -> int:
+    """Rebuild the AreaCoverage rows from PollOffice and PollOfficeCounters.
+
+    Deciders keep running: their reporting_offices updates wait for the
+    rebuild. Returns the number of areas.
+    """
+    coverage: Dict[tuple, Dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(AreaCoverage.COVERAGE_FIELDS, 0)
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {AreaCoverage._meta.db_table} IN EXCLUSIVE MODE")
+
+        reporting = set(
+            PollOfficeCounters.objects.filter(votes__gt=0).values_list(
+                "poll_office_id", flat=True
+            )
+        )
+        rows = PollOffice.objects.values_list("id", "voters_count", *Area.LEVELS)
+        for poll_office_id, voters_count, *path in rows.iterator(chunk_size=2000):
+            for area in _areas_of(path):
+                coverage[area]["poll_offices"] += 1
+                coverage[area]["voters_count"] += voters_count or 0
+                if poll_office_id in reporting:
+                    coverage[area]["reporting_offices"] += 1
+
+        AreaCoverage.objects.all().delete()
+        AreaCoverage.objects.bulk_create(
+            [
+                AreaCoverage(**dict(zip(("level", *Area.LEVELS), area)), **area_coverage)
+                for area, area_coverage in coverage.items()
+            ],
+            batch_size=1000,
+        )
+    return len(coverage)
+
+
+def add_poll_office_coverage(instance: PollOffice) -> None:
+    """Count a new poll office and its registered voters in its areas."""
+    coverage_deltas = {
+        area: {"poll_offices": 1, "voters_count": instance.voters_count or 0, "reporting_offices": 0}
+        for area in _areas_of(getattr(instance, level) for level in Area.LEVELS)
+    }
+    _increment_rows(AreaCoverage, ("level", *Area.LEVELS), coverage_deltas)
+
+
+def _poll_office_coverage(
+    poll_office_id: int,
+) -> Optional[Tuple[List[Tuple[str, ...]], int, bool]]:
+    """(areas, voters_count, reporting) of a poll office as stored, None when
+    it is not in the database."""
+    row = (
+        PollOffice.objects.filter(pk=poll_office_id)
+        .annotate(
+            reporting=Exists(
+                PollOfficeCounters.objects.filter(
+                    poll_office=OuterRef("pk"), votes__gt=0
+                )
+            )
+        )
+        .values_list("voters_count", "reporting", *Area.LEVELS)
+        .first()
+    )
+    if row is None:
+        return None
+    voters_count, reporting, *path = row
+    return _areas_of(path), voters_count or 0, reporting
+
+
+def _move_poll_office_coverage(before, after) -> None:
+    """Take a poll office out of the AreaCoverage rows of its before
+    coverage and count it in those of after (see _poll_office_coverage)."""
+    deltas: Dict[tuple, Dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(AreaCoverage.COVERAGE_FIELDS, 0)
+    )
+    for coverage, sign in ((before, -1), (after, 1)):
+        if coverage is None:
+            continue
+        areas, voters_count, reporting = coverage
+        for area in areas:
+            deltas[area]["poll_offices"] += sign
+            deltas[area]["voters_count"] += sign * voters_count
+            deltas[area]["reporting_offices"] += sign * reporting
+    # Same lock order as the deciders, see _increment_rows
+    for area in sorted(deltas):
+        delta = deltas[area]
+        if not any(delta.values()):
+            continue
+        if min(delta.values()) >= 0:
+            _increment_rows(AreaCoverage, ("level", *Area.LEVELS), {area: delta})
+        else:
+            # The office counted in this area before, so the row exists
+            AreaCoverage.objects.filter(
+                **dict(zip(("level", *Area.LEVELS), area))
+            ).update(
+                **{f: F(f) + d for f, d in delta.items() if d},
+                updated_at=timezone.now(),
+            )
+
+
+def remember_area_coverage(sender, instance: PollOffice, **kwargs):
+    """pre_save/pre_delete receiver keeping the coverage of a poll office
+    before the change for update_area_coverage_on_change."""
+    if kwargs.get("raw") or instance.pk is None:
+        return
+    instance._coverage_before = _poll_office_coverage(instance.pk)
+
+
+def update_area_coverage_on_change(sender, instance: PollOffice, created: bool = False, **kwargs):
+    """post_save receiver keeping AreaCoverage in line with PollOffice.
+
+    A created office is added to its areas; an edited one is taken out of
+    the areas it counted in before and counted in its current ones. Only
+    the rows of these areas are touched: rebuild_area_coverage, which locks
+    and rewrites them all, is left to the commands loading offices.
+    """
+    if kwargs.get("raw"):
+        return
+    if created:
+        add_poll_office_coverage(instance)
+        return
+    before = instance.__dict__.pop("_coverage_before", None)
+    _move_poll_office_coverage(before, _poll_office_coverage(instance.pk))
+
+
+def remove_area_coverage_on_delete(sender, instance: PollOffice, **kwargs):
+    """post_delete receiver taking a deleted poll office out of its areas."""
+    before = instance.__dict__.pop("_coverage_before", None)
+    _move_poll_office_coverage(before, None)
+
+
+def count_accepted_votes_by_poll_office() -> Dict[int, Dict[str, int]]:
+    """Counters of every poll office computed from the VoteAccepted rows."""
+    rows = (
+        VoteAccepted.objects.values("vote__poll_office_id")
+        .annotate(
+            votes=Count("pk"),
+            male=Count("pk", filter=Q(gender=Gender.MALE)),
+            female=Count("pk", filter=Q(gender=Gender.FEMALE)),
+            less_30=Count("pk", filter=Q(age=Age.LESS_30)),
+            less_60=Count("pk", filter=Q(age=Age.LESS_60)),
+            more_60=Count("pk", filter=Q(age=Age.MORE_60)),
+            has_torn=Count("pk", filter=Q(has_torn=True)),
+        )
+    )
+    return {
+        row.pop("vote__poll_office_id"): row
+        for row in rows
+    }
+
+
+def get_poll_office_counters(**poll_office_filter) -> Dict[str, int]:
+    """Counters of one poll office, zeros when nothing was accepted there.
+
+    poll_office_filter is a lookup on PollOfficeCounters, e.g.
+    poll_office_id=1 or poll_office__identifier="PO-1".
+    """
+    fields = PollOfficeCounters.COUNTER_FIELDS
+    counters = (
+        PollOfficeCounters.objects.filter(**poll_office_filter)
+        .values(*fields)
+        .first()
+    )
+    return counters or dict.fromkeys(fields, 0)
+
+
+def get_poll_offices_stats(poll_office_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """pollofficestats blocks (totals, last_vote) of many poll offices.
+
+    Runs one query per table whatever the number of offices: counters,
+    distinct sources per office and last votes.
+    """
+    poll_office_ids = list(poll_office_ids)
+    fields = PollOfficeCounters.COUNTER_FIELDS
+    counters = {
+        row.pop("poll_office_id"): row
+        for row in PollOfficeCounters.objects.filter(
+            poll_office_id__in=poll_office_ids
+        ).values("poll_office_id", *fields)
+    }
+    sources = dict(
+        SourceToken.objects.filter(poll_office_id__in=poll_office_ids)
+        .values("poll_office_id")
+        .annotate(total_sources=Count("source", distinct=True))
+        .values_list("poll_office_id", "total_sources")
+    )
+    last_votes = dict(
+        LastAccepted.objects.filter(
+            key__in=[last_accepted_key("vote", pk) for pk in poll_office_ids]
+        ).values_list("key", "snapshot")
+    )
+
+    stats = {}
+    for pk in poll_office_ids:
+        totals = counters.get(pk) or dict.fromkeys(fields, 0)
+        totals["total_sources"] = sources.get(pk, 0)
+        stats[pk] = {"totals": totals}
+        last_vote = last_votes.get(last_accepted_key("vote", pk))
+        if last_vote:
+            stats[pk]["last_vote"] = last_vote
+    return stats
+
+
+def get_global_counters() -> Dict[str, int]:
+    """Sum of the counters of all poll offices."""
+    return PollOfficeCounters.objects.aggregate(
+        **{
+            f: Coalesce(Sum(f), 0)
+            for f in PollOfficeCounters.COUNTER_FIELDS
+        }
+    )
+
+
+def increment_counters_on_accept(sender, instance: VoteAccepted, created: bool, **kwargs):
+    """post_save receiver counting VoteAccepted rows created one by one.
+
+    The deciders write whole batches with accept_vote_decisions instead.
+    """
+    if created:
+        bump_poll_office_counters(
+            [(instance.vote.poll_office_id, instance.gender, instance.age, instance.has_torn)]
+        )
+        update_last_votes([instance.vote_id])
+
+
+def last_accepted_key(kind: str, poll_office_id: Optional[int] = None) -> str:
+    """LastAccepted key of the latest "vote" or "paper" of a poll office
+    (None: of all offices)."""
+    return f"{kind}:{poll_office_id or 'all'}"
+
+
+def get_last_accepted(key: str) -> Optional[Dict[str, Any]]:
+    """Snapshot of the LastAccepted row key, None before any acceptance."""
+    return LastAccepted.objects.filter(key=key).values_list("snapshot", flat=True).first()
+
+
+_ADVANCE_LAST_ACCEPTED_SQL = """
+INSERT INTO {table} (key, ref_id, snapshot, updated_at)
+VALUES {rows}
+ON CONFLICT (key) DO UPDATE
+SET ref_id = EXCLUDED.ref_id,
+    snapshot = EXCLUDED.snapshot,
+    updated_at = EXCLUDED.updated_at
+WHERE {table}.ref_id < EXCLUDED.ref_id
+"""
+
+
+def _advance_last_accepted(pointers: Dict[str, Tuple[int, Dict[str, Any]]]) -> None:
+    """Upsert LastAccepted rows, keeping those already pointing further."""
+    if not pointers:
+        return
+    table = LastAccepted._meta.db_table
+    now = timezone.now()
+    rows, params = [], []
+    # Same lock order in every transaction, see _increment_rows
+    for key in sorted(pointers):
+        ref_id, snapshot = pointers[key]
+        rows.append("(%s, %s, %s::jsonb, %s)")
+        params.extend([key, ref_id, json.dumps(snapshot, cls=DjangoJSONEncoder), now])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _ADVANCE_LAST_ACCEPTED_SQL.format(table=table, rows=", ".join(rows)),
+            params,
+        )
+
+
+def _last_vote_snapshot(vote: Vote, index: int) -> Dict[str, Any]:
+    from core.serializers import VoteAcceptedSerializer, VoteProposedSerializer
+
+    snapshot = {"Accepted": VoteAcceptedSerializer(vote.voteaccepted).data}
+    snapshot["Accepted"]["index"] = index
+    try:
+        snapshot["Verified"] = VoteAcceptedSerializer(vote.voteverified).data
+        snapshot["Verified"]["index"] = index
+    except VoteVerified.DoesNotExist:
+        snapshot["Verified"] = {}
+    for prop_vote in vote.proposed_votes.all():
+        source_name = prop_vote.source.get_source_name()
+        snapshot[source_name] = VoteProposedSerializer(prop_vote).data
+        snapshot[source_name]["index"] = index
+    return snapshot
+
+
+def _last_paper_snapshot(vpr: VotingPaperResult) -> Dict[str, Any]:
+    snapshot = {
+        "Accepted": {
+            "index": vpr.index,
+            "party_id": vpr.accepted_candidate_party.identifier,
+        }
+    }
+    for prop_vp in vpr.proposed_vp_results.all():
+        snapshot[prop_vp.source.get_source_name()] = {
+            "index": vpr.index,
+            "party_id": prop_vp.party_candidate.identifier,
+        }
+    return snapshot
+
+
+def update_last_votes(vote_ids: Iterable[int]) -> None:
+    """Advance the last vote pointers past these newly accepted votes.
+
+    Must run in the transaction inserting their VoteAccepted rows.
+    """
+    latest = dict(
+        Vote.objects.filter(id__in=list(vote_ids))
+        .values("poll_office_id")
+        .annotate(latest=Max("id"))
+        .values_list("poll_office_id", "latest")
+    )
+    if not latest:
+        return
+    votes = {
+        vote.pk: vote
+        for vote in Vote.objects.filter(id__in=latest.values())
+        .select_related("voteverified", "voteaccepted")
+        .prefetch_related("proposed_votes__source")
+    }
+    pointers = {
+        last_accepted_key("vote", poll_office_id): (
+            vote_id,
+            _last_vote_snapshot(votes[vote_id], votes[vote_id].index),
+        )
+        for poll_office_id, vote_id in latest.items()
+    }
+    # The global block shows the vote id as index
+    newest = votes[max(votes)]
+    pointers[last_accepted_key("vote")] = (
+        newest.pk,
+        _last_vote_snapshot(newest, newest.pk),
+    )
+    _advance_last_accepted(pointers)
+
+
+def update_last_papers(vpr_ids: Iterable[int]) -> None:
+    """Advance the last paper pointers past these newly accepted papers.
+
+    Must run in the transaction setting their accepted_candidate_party.
+    """
+    latest = dict(
+        VotingPaperResult.objects.filter(
+            id__in=list(vpr_ids), accepted_candidate_party__isnull=False
+        )
+        .values("poll_office_id")
+        .annotate(latest=Max("id"))
+        .values_list("poll_office_id", "latest")
+    )
+    if not latest:
+        return
+    vp_results = {
+        vpr.pk: vpr
+        for vpr in VotingPaperResult.objects.filter(id__in=latest.values())
+        .select_related("accepted_candidate_party")
+        .prefetch_related(
+            Prefetch(
+                "proposed_vp_results",
+                queryset=VotingPaperResultProposed.objects.select_related(
+                    "source", "party_candidate"
+                ),
+            )
+        )
+    }
+    pointers = {
+        last_accepted_key("paper", poll_office_id): (
+            vpr_id,
+            _last_paper_snapshot(vp_results[vpr_id]),
+        )
+        for poll_office_id, vpr_id in latest.items()
+    }
+    newest = max(vp_results)
+    pointers[last_accepted_key("paper")] = (
+        newest,
+        _last_paper_snapshot(vp_results[newest]),
+    )
+    _advance_last_accepted(pointers)
+
+
+def _redis():
+    from cacheops.redis import redis_client
+
+    return redis_client
+
+
+# Version counters of the data behind the public read endpoints, one Redis
+# hash field per scope plus "<scope>:at" holding the time of the last bump:
+# - votes:<poll_office_id>, votes:all: accepted votes (PollOfficeCounters)
+# - results:<poll_office_id>, results:all: accepted VotingPaperResult rows
+# - polloffices, candidateparties, sources: rows of these tables
+_VERSIONS_KEY = "ufrecs:versions"
+
+Version = Tuple[Optional[str], Optional[float]]
+
+
+def get_versions(scopes: Iterable[str]) -> Version:
+    """(tag, last modified timestamp) of the data behind scopes.
+
+    The tag changes whenever one of the scopes is bumped. (None, None) when
+    Redis cannot be read.
+    """
+    scopes = list(scopes)
+    try:
+        values = _redis().hmget(
+            _VERSIONS_KEY, [f for scope in scopes for f in (scope, f"{scope}:at")]
+        )
+    except RedisError:
+        logger.exception("Cannot read versions from Redis")
+        return None, None
+    return _parse_versions(values)
+
+
+def _parse_versions(values: List[Optional[bytes]]) -> Version:
+    versions, modified = values[::2], [float(at) for at in values[1::2] if at]
+    tag = ".".join(str(int(v or 0)) for v in versions)
+    return tag, max(modified, default=None)
+
+
+def bump_versions(scopes: Iterable[str]) -> None:
+    """Bump the versions of scopes now, see get_versions."""
+    now = time.time()
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for scope in set(scopes):
+            pipe.hincrby(_VERSIONS_KEY, scope, 1)
+            pipe.hset(_VERSIONS_KEY, f"{scope}:at", now)
+        pipe.execute()
+    except RedisError:
+        logger.exception("Cannot bump versions in Redis")
+
+
+def bump_versions_on_commit(scopes: Iterable[str]) -> None:
+    """Bump the versions of scopes once the current transaction commits."""
+    scopes = list(scopes)
+    transaction.on_commit(lambda: bump_versions(scopes))
+
+
+def stats_scopes(poll_office_id: Optional[int]) -> List[str]:
+    """Scopes of the pollofficestats response of a poll office (None: all)."""
+    if poll_office_id is None:
+        return ["votes:all", "sources", "polloffices"]
+    return [f"votes:{poll_office_id}", "sources"]
+
+
+def results_scopes(poll_office_id: Optional[int]) -> List[str]:
+    """Scopes of the pollofficeresults response of a poll office (None: all)."""
+    return [f"results:{poll_office_id or 'all'}", "sources"]
+
+
+def bump_versions_on_change(sender, **kwargs):
+    """post_save/post_delete receiver bumping the scope of the saved model."""
+    bump_versions_on_commit(_CHANGE_SCOPES[sender])
+
+
+_CHANGE_SCOPES = {
+    PollOffice: ["polloffices"],
+    CandidateParty: ["candidateparties"],
+    Source: ["sources"],
+    SourceToken: ["sources"],
+}
+
+
+_RESULTS_CACHE_PREFIX = "ufrecs:results:v2:"
+
+
+def get_cached_results(
+    poll_office_id: Optional[int],
+    tag: Optional[str],
+    compute: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """pollofficeresults response of a poll office (None: all offices) at the
+    version tag of its results_scopes, from Redis or computed and stored for
+    RESULTS_CACHE_TTL seconds.
+
+    A response computed before an acceptance committed is stored under a
+    tag nobody reads anymore. RESULTS_CACHE_TTL = 0 or tag None (Redis
+    unavailable) bypass the cache.
+    """
+    ttl = settings.RESULTS_CACHE_TTL
+    if ttl <= 0 or tag is None:
+        return compute()
+
+    redis_client = _redis()
+    key = f"{_RESULTS_CACHE_PREFIX}{poll_office_id or 'all'}:{tag}"
+    try:
+        raw = redis_client.get(key)
+    except RedisError:
+        logger.exception("Cannot read results from Redis")
+        return compute()
+    if raw is not None:
+        return json.loads(raw)
+
+    results = compute()
+    try:
+        redis_client.set(key, json.dumps(results), ex=ttl)
+    except RedisError:
+        logger.exception("Cannot write results to Redis")
+    return results
+
+
+def invalidate_poll_office_results(poll_office_ids: Iterable[int]) -> None:
+    """Bump the results versions of these poll offices and of all offices."""
+    bump_versions(
+        ["results:all", *(f"results:{poll_office_id}" for poll_office_id in poll_office_ids)]
+    )
+
+
+def _accepts_paper(instance: VotingPaperResult, update_fields) -> bool:
+    """Whether saving instance with update_fields writes an accepted party."""
+    if instance.accepted_candidate_party_id is None:
+        return False
+    return update_fields is None or "accepted_candidate_party" in update_fields
+
+
+def invalidate_results_on_accept(sender, instance: VotingPaperResult, **kwargs):
+    """post_save/post_delete receiver invalidating the cached results once an
+    accepted VotingPaperResult is committed.
+
+    Papers saved while still pending leave the results unchanged.
+    """
+    if not _accepts_paper(instance, kwargs.get("update_fields")):
+        return
+    poll_office_id = instance.poll_office_id
+    transaction.on_commit(lambda: invalidate_poll_office_results([poll_office_id]))
+
+
+def update_last_paper_on_accept(sender, instance: VotingPaperResult, **kwargs):
+    """post_save receiver advancing the last paper pointers of papers saved
+    one by one. The deciders use accept_paper_decisions instead."""
+    if _accepts_paper(instance, kwargs.get("update_fields")):
+        update_last_papers([instance.pk])
+
+
+def accept_paper_decisions(vp_results: List[VotingPaperResult]) -> None:
+    """Save the accepted_candidate_party set on these papers as one batch.
+
+    bulk_update skips the post_save receivers: the area results and the
+    last paper pointers of the whole batch are bumped once, in key order,
+    so concurrent deciders do not lock "paper:all" and the office rows in
+    opposite orders. Must run in the transaction claiming the papers.
+    """
+    if not vp_results:
+        return
+    VotingPaperResult.objects.bulk_update(vp_results, ["accepted_candidate_party"])
+    bump_area_results(
+        (vpr.poll_office_id, vpr.accepted_candidate_party_id) for vpr in vp_results
+    )
+    update_last_papers(vpr.pk for vpr in vp_results)
+    poll_office_ids = {vpr.poll_office_id for vpr in vp_results}
+    transaction.on_commit(lambda: invalidate_poll_office_results(poll_office_ids))
+
+
+def serialize_poll_offices() -> List[Dict[str, Any]]:
+    """Every poll office serialized by PollOfficeSerializer, in identifier order."""
+    from core.serializers import PollOfficeSerializer
+
+    queryset = PollOffice.objects.all().order_by("identifier", "id")
+    return PollOfficeSerializer(queryset, many=True).data
+
+
+POLL_OFFICE_BUNDLE_FORMATS = ("json", "columns")
+
+_BUNDLE_PREFIX = "ufrecs:bundle:"
+
+
+def build_poll_office_bundle(form: str) -> bytes:
+    """gzip compressed serialize_poll_offices() in form.
+
+    "json" is the list of offices; "columns" is {"columns": [...],
+    "rows": [[...], ...]}, which does not repeat the field names. The same
+    rows always give the same bytes.
+    """
+    offices = serialize_poll_offices()
+    if form == "columns":
+        columns = list(offices[0]) if offices else []
+        data = {
+            "columns": columns,
+            "rows": [[office[c] for c in columns] for office in offices],
+        }
+    else:
+        data = offices
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    return gzip.compress(body.encode(), mtime=0)
+
+
+def get_poll_office_bundle(form: str) -> Tuple[bytes, str]:
+    """(gzip body, sha1 hex digest) of the poll office bundle in form.
+
+    Bundles are stored in Redis for POLL_OFFICE_BUNDLE_TTL seconds under
+    the version of the polloffices scope, so they are built once per change
+    of the PollOffice rows, by the worker holding the build lock while the
+    others wait for it.
+    """
+    def built(body):
+        return body, hashlib.sha1(body).hexdigest()
+
+    tag, _ = get_versions(["polloffices"])
+    if tag is None:
+        return built(build_poll_office_bundle(form))
+
+    redis_client = _redis()
+    key = f"{_BUNDLE_PREFIX}{form}:{tag}"
+    try:
+        body = redis_client.get(key)
+        if body is not None:
+            return built(body)
+
+        timeout = settings.POLL_OFFICE_BUNDLE_LOCK_TTL
+        with redis_client.lock(key + ":lock", timeout=timeout, blocking_timeout=timeout):
+            body = redis_client.get(key)
+            if body is None:
+                body = build_poll_office_bundle(form)
+                redis_client.set(key, body, ex=settings.POLL_OFFICE_BUNDLE_TTL)
+            return built(body)
+    except (RedisError, LockError):
+        logger.exception("Cannot use the poll office bundle cache in Redis")
+    return built(build_poll_office_bundle(form))
+
+
+_STATS_CACHE_PREFIX = "ufrecs:stats:v2:"
+
+
+def get_cached_stats(
+    key: str, scopes: Iterable[str], compute: Callable[[], Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Optional[str], Optional[float]]:
+    """pollofficestats response for key, recomputed by a single worker.
+
+    Returns the response with the version (tag, last modified) of scopes it
+    was computed at. An entry is fresh for STATS_CACHE_TTL seconds, even when
+    its scopes got a newer version meanwhile: under a steady stream of votes
+    the version changes on every write, so it would never be served. It is
+    then served stale for up to STATS_CACHE_STALE_TTL more seconds while the
+    worker holding the refresh lock recomputes it. Entries always carry the
+    version they were computed at, which makes their ETag. Without any entry, the other
+    workers wait up to STATS_CACHE_LOCK_TTL seconds for the lock holder
+    before computing it themselves. STATS_CACHE_TTL = 0 disables the cache.
+    """
+    scopes = list(scopes)
+    ttl = settings.STATS_CACHE_TTL
+    if ttl <= 0:
+        return (compute(), *get_versions(scopes))
+
+    redis_client = _redis()
+    entry_key = _STATS_CACHE_PREFIX + key
+    fields = [f for scope in scopes for f in (scope, f"{scope}:at")]
+
+    def read() -> Optional[Dict[str, Any]]:
+        raw = redis_client.get(entry_key)
+        return json.loads(raw) if raw is not None else None
+
+    def served(entry):
+        return entry["value"], entry["tag"], entry["modified"]
+
+    def refresh(tag, modified):
+        value = compute()
+        entry = {
+            "fresh_until": time.time() + ttl,
+            "tag": tag,
+            "modified": modified,
+            "value": value,
+        }
+        try:
+            redis_client.set(
+                entry_key,
+                json.dumps(entry, cls=DjangoJSONEncoder),
+                ex=ttl + settings.STATS_CACHE_STALE_TTL,
+            )
+        except RedisError:
+            logger.exception("Cannot write stats to Redis")
+        # Same shape as a cached value
+        return json.loads(json.dumps(value, cls=DjangoJSONEncoder)), tag, modified
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hmget(_VERSIONS_KEY, fields)
+        pipe.get(entry_key)
+        values, raw = pipe.execute()
+        tag, modified = _parse_versions(values)
+        entry = json.loads(raw) if raw is not None else None
+        if entry is not None and entry["fresh_until"] > time.time():
+            return served(entry)
+
+        lock = redis_client.lock(
+            entry_key + ":lock", timeout=settings.STATS_CACHE_LOCK_TTL, blocking=False
+        )
+        if lock.acquire():
+            try:
+                return refresh(tag, modified)
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # Expired while computing, maybe taken by another worker
+                    pass
+        if entry is not None:
+            return served(entry)
+
+        deadline = time.monotonic() + settings.STATS_CACHE_LOCK_TTL
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = read()
+            if entry is not None:
+                return served(entry)
+    except RedisError:
+        logger.exception("Cannot use the stats cache in Redis")
+    return compute(), None, None
+
+
+def notify_proposed(channel: str, poll_office_id: int, indexes: Iterable[int]) -> None:
+    """NOTIFY the deciders that ballots of a poll office got a proposal.
+
+    One "<poll_office_id>:<index>" payload is sent per index. PostgreSQL only
+    delivers them when the surrounding transaction commits. Does nothing
+    unless settings.DECIDER_NOTIFY is enabled.
+    """
+    if not settings.DECIDER_NOTIFY:
+        return
+    payloads = [f"{poll_office_id}:{index}" for index in indexes]
+    if not payloads:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            [channel, payloads],
+        )
+
+
+def keys_filter(keys: Iterable[Key]) -> Q:
+    """Q matching the rows (Vote or VotingPaperResult) of the given keys."""
+    by_office: Dict[int, List[int]] = defaultdict(list)
+    for poll_office_id, index in keys:
+        by_office[poll_office_id].append(index)
+    query = Q(pk__in=[])
+    for poll_office_id, indexes in by_office.items():
+        query |= Q(poll_office_id=poll_office_id, index__in=indexes)
+    return query
+
+
+def pending_votes(keys: Optional[Iterable[Key]] = None) -> QuerySet:
+    """Votes without a VoteAccepted having a proposal older than DECIDE_WINDOW.
+
+    Only anti/semi-joins are used, so the query can be locked with
+    select_for_update(skip_locked=True). When keys is given, only the votes
+    with these (poll_office_id, index) are returned.
+    """
+    window_start = timezone.now() - DECIDE_WINDOW
+    qs = Vote.objects.filter(
+        ~Exists(VoteAccepted.objects.filter(vote=OuterRef("pk"))),
+        Exists(
+            VoteProposed.objects.filter(
+                vote=OuterRef("pk"), created_at__lt=window_start
+            )
+        ),
+    )
+    if keys is not None:
+        qs = qs.filter(keys_filter(keys))
+    return qs.order_by("id")
+
+
+def pending_vp_results(keys: Optional[Iterable[Key]] = None) -> QuerySet:
+    """VotingPaperResult without accepted party having a proposal older than DECIDE_WINDOW.
+
+    Same shape as pending_votes.
+    """
+    window_start = timezone.now() - DECIDE_WINDOW
+    qs = VotingPaperResult.objects.filter(
+        Exists(
+            VotingPaperResultProposed.objects.filter(
+                vp_result=OuterRef("pk"), created_at__lt=window_start
+            )
+        ),
+        accepted_candidate_party__isnull=True,
+    )
+    if keys is not None:
+        qs = qs.filter(keys_filter(keys))
+    return qs.order_by("id")
+
+
+def upcoming_votes() -> List[Tuple[Key, datetime]]:
+    """(key, due) of the undecided votes whose proposals are all younger
+    than DECIDE_WINDOW, due DECIDE_WINDOW after their first proposal.
+
+    The votes pending_votes() will return once their window closes.
+    """
+    window_start = timezone.now() - DECIDE_WINDOW
+    rows = (
+        Vote.objects.filter(~Exists(VoteAccepted.objects.filter(vote=OuterRef("pk"))))
+        .annotate(first_proposed=Min("proposed_votes__created_at"))
+        .filter(first_proposed__gte=window_start)
+        .values_list("poll_office_id", "index", "first_proposed")
+    )
+    return [
+        ((poll_office_id, index), first_proposed + DECIDE_WINDOW)
+        for poll_office_id, index, first_proposed in rows
+    ]
+
+
+def upcoming_vp_results() -> List[Tuple[Key, datetime]]:
+    """Same as upcoming_votes for VotingPaperResult."""
+    window_start = timezone.now() - DECIDE_WINDOW
+    rows = (
+        VotingPaperResult.objects.filter(accepted_candidate_party__isnull=True)
+        .annotate(first_proposed=Min("proposed_vp_results__created_at"))
+        .filter(first_proposed__gte=window_start)
+        .values_list("poll_office_id", "index", "first_proposed")
+    )
+    return [
+        ((poll_office_id, index), first_proposed + DECIDE_WINDOW)
+        for poll_office_id, index, first_proposed in rows
+    ]
+
+
+def run_workers(count: int, target: Callable[[], None]) -> None:
+    """Run target in count forked processes and wait for all of them.
+
+    Database connections are closed before forking so each worker opens its
+    own. Workers share the terminal process group, so Ctrl-C stops them too.
+    """
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=target, name=f"worker-{number}")
+        for number in range(1, count + 1)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+class ProposalListener:
+    """Collect the (poll_office_id, index) keys NOTIFYed on a channel.
+
+    A key becomes due once its deciding window has elapsed since its first
+    notification. wait() blocks on the database socket, so an idle decider
+    runs no query at all.
+    """
+
+    def __init__(self, channel: str, window: timedelta = DECIDE_WINDOW):
+        self.channel = channel
+        self.window = window.total_seconds()
+        self._deadlines: Dict[Key, float] = {}
+
+    def listen(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, keys: Iterable[Tuple[Key, datetime]]) -> None:
+        """Add (key, due) pairs, e.g. from upcoming_votes(): proposals stored
+        before listen() were notified to nobody."""
+        now, clock = timezone.now(), time.monotonic()
+        for key, due in keys:
+            self._deadlines.setdefault(key, clock + max((due - now).total_seconds(), 0))
+
+    def wait(self, max_keys: int, timeout: Optional[float] = None) -> List[Key]:
+        """Block until some keys are due and return at most max_keys of them.
+
+        Returns an empty list when none is due within timeout seconds.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            due = sorted(
+                (deadline, key)
+                for key, deadline in self._deadlines.items()
+                if deadline <= now
+            )[:max_keys]
+            if due:
+                for _, key in due:
+                    del self._deadlines[key]
+                return [key for _, key in due]
+            if give_up is not None and now >= give_up:
+                return []
+
+            wakeups = list(self._deadlines.values())
+            if give_up is not None:
+                wakeups.append(give_up)
+            self._receive(min(wakeups) - now if wakeups else None)
+
+    def _receive(self, timeout: Optional[float]) -> None:
+        conn = connection.connection
+        # Notifications may already have been read while running other queries
+        if not conn.notifies:
+            readable, _, _ = select.select([conn], [], [], timeout)
+            if readable:
+                conn.poll()
+
+        deadline = time.monotonic() + self.window
+        for notify in conn.notifies:
+            try:
+                poll_office_id, index = notify.payload.split(":")
+                key = (int(poll_office_id), int(index))
+            except ValueError:
+                continue
+            self._deadlines.setdefault(key, deadline)
+        conn.notifies.clear()
+
+
 def compute_voting_paper_result_decision(
     vp_result: VotingPaperResult, *, include_details: bool = False
 ) -> Tuple[Optional[object], Optional[Dict[str, Dict[str, Any]]]]:
@@ -198,8 +1516,7 @@ def compute_voting_paper_result_decision(
     return chosen_party, details
 
 
-def issue_scoped_creds(poll_office_id:str, user_id:str):
-    # Validate env
+def _check_sts_settings() -> None:
     missing = [k for k, v in {
         "S3_BUCKET": settings.AWS_STORAGE_BUCKET_NAME,
         "STS_UPLOAD_ROLE_ARN": settings.AWS_S3_STS_ROLE_ARN,
@@ -208,46 +1525,137 @@ def issue_scoped_creds(poll_office_id:str, user_id:str):
     if missing:
         raise ValueError(f"Missing env vars: {', '.join(missing)}")
 
-    BUCKET = settings.AWS_STORAGE_BUCKET_NAME
-    STS_ENDPOINT = settings.AWS_S3_STS_ENDPOINT_URL
-    S3_REGION = settings.AWS_S3_REGION_NAME
-    ROLE_ARN = settings.AWS_S3_STS_ROLE_ARN
 
+def make_sts_client():
+    # boto3/botocore take long to import: only load them on first use
+    import boto3
 
     # Wasabi STS client (IMPORTANT: endpoint_url points to Wasabi STS)
-    sts = boto3.client("sts", endpoint_url=STS_ENDPOINT, region_name="us-east-1",
-                       aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                       aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
-
-    # Defense-in-depth: session policy restricts to EXACT office/user prefix
-    session_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Effect": "Allow",
-                "Action": ["s3:PutObject", "s3:AbortMultipartUpload", "s3:ListMultipartUploadParts"],
-                "Resource": f"arn:aws:s3:::{BUCKET}/{poll_office_id}/{user_id}/*"
-            },
-            {
-                "Effect": "Allow",
-                "Action": ["s3:ListBucket"],
-                "Resource": f"arn:aws:s3:::{BUCKET}",
-                "Condition": { "StringLike": { "s3:prefix": [f"{poll_office_id}/{user_id}/*"] } }
-            }
-        ]
-    }
+    return boto3.client("sts", endpoint_url=settings.AWS_S3_STS_ENDPOINT_URL, region_name="us-east-1",
+                        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
+
+
+class StsCredentialBroker:
+    """Issue scoped STS credentials and cache them per (poll_office_id, user_id).
+
+    The STS client is built once and shared: boto3 clients are thread-safe
+    and building one costs hundreds of milliseconds. Cached credentials are
+    handed out until STS_CREDENTIALS_MARGIN seconds before their Expiration.
+    Once less than STS_CREDENTIALS_REFRESH_AHEAD seconds remain, they are
+    renewed by a background thread while the current ones keep being served.
+    Credentials past the margin are dropped when looked up, and the cache is
+    an LRU bounded to STS_CREDENTIALS_CACHE_SIZE prefixes.
+
+    client_factory builds the STS client; tests pass a fake one.
+    """
 
-    res = sts.assume_role(
-        RoleArn=ROLE_ARN,
-        RoleSessionName=f"u-{user_id}-{int(time.time())}",
-        DurationSeconds=43200,
-        # Optional session tags (helpful if you add tag-based policies later)
-        Tags=[
-            {"Key": "user_id", "Value": user_id},
-            {"Key": "poll_office_id", "Value": poll_office_id},
-        ],
-        # TransitiveTagKeys=["user_id", "poll_office_id"],
-        Policy=json.dumps(session_policy),
-    )
-    c = res["Credentials"]
-    return c
+    def __init__(self, client_factory: Callable[[], Any] = make_sts_client):
+        self._client_factory = client_factory
+        self._client = None
+        self._credentials: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def get(self, poll_office_id: str, user_id: str) -> Dict[str, Any]:
+        key = (poll_office_id, user_id)
+        now = timezone.now()
+        with self._lock:
+            credentials = self._credentials.get(key)
+            if credentials is not None:
+                remaining = (credentials["Expiration"] - now).total_seconds()
+                if remaining > settings.STS_CREDENTIALS_MARGIN:
+                    self._credentials.move_to_end(key)
+                else:
+                    del self._credentials[key]
+                    credentials = None
+
+        if credentials is not None:
+            if remaining < settings.STS_CREDENTIALS_REFRESH_AHEAD:
+                self._refresh_in_background(key)
+            return credentials
+
+        return self._issue(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._credentials.clear()
+
+    def _refresh_in_background(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._issue(key)
+            except Exception:
+                logger.exception("Cannot refresh STS credentials of %s", key)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _issue(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        credentials = self._assume_role(*key)
+        with self._lock:
+            self._credentials[key] = credentials
+            self._credentials.move_to_end(key)
+            while len(self._credentials) > settings.STS_CREDENTIALS_CACHE_SIZE:
+                self._credentials.popitem(last=False)
+        return credentials
+
+    def _assume_role(self, poll_office_id: str, user_id: str) -> Dict[str, Any]:
+        _check_sts_settings()
+
+        BUCKET = settings.AWS_STORAGE_BUCKET_NAME
+        ROLE_ARN = settings.AWS_S3_STS_ROLE_ARN
+
+        # Defense-in-depth: session policy restricts to EXACT office/user prefix
+        session_policy = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Action": ["s3:PutObject", "s3:AbortMultipartUpload", "s3:ListMultipartUploadParts"],
+                    "Resource": f"arn:aws:s3:::{BUCKET}/{poll_office_id}/{user_id}/*"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": ["s3:ListBucket"],
+                    "Resource": f"arn:aws:s3:::{BUCKET}",
+                    "Condition": { "StringLike": { "s3:prefix": [f"{poll_office_id}/{user_id}/*"] } }
+                }
+            ]
+        }
+
+        res = self.client.assume_role(
+            RoleArn=ROLE_ARN,
+            RoleSessionName=f"u-{user_id}-{int(time.time())}",
+            DurationSeconds=settings.STS_CREDENTIALS_DURATION,
+            # Optional session tags (helpful if you add tag-based policies later)
+            Tags=[
+                {"Key": "user_id", "Value": user_id},
+                {"Key": "poll_office_id", "Value": poll_office_id},
+            ],
+            # TransitiveTagKeys=["user_id", "poll_office_id"],
+            Policy=json.dumps(session_policy),
+        )
+        return res["Credentials"]
+
+
+sts_broker = StsCredentialBroker()
+
+
+def issue_scoped_creds(poll_office_id:str, user_id:str):
+    """Scoped upload credentials for a poll office / elector prefix (cached)."""
+    return sts_broker.get(poll_office_id, user_id)
@@ -1,10 +1,28 @@
-import pyruvate
 import os
 
-from django.core.wsgi import get_wsgi_application
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ufrecs.settings")
 
+from django.conf import settings
+
+from core.prefork import PreforkServer
+
+server = PreforkServer(
+    settings.SERVE_BIND,
+    workers=settings.SERVE_WORKERS,
+    threads=settings.SERVE_THREADS,
+    max_requests=settings.SERVE_MAX_REQUESTS,
+    max_requests_jitter=settings.SERVE_MAX_REQUESTS_JITTER,
+)
+# Before Django opens log files or connections, see PreforkServer.bind
+server.bind()
+
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import get_resolver
+
+# Preload: the workers fork with views and serializers already imported
 application = get_wsgi_application()
+get_resolver().url_patterns
+connections.close_all()
 
-pyruvate.serve(application, "127.0.0.1:8448", 12)
+server.run(application)
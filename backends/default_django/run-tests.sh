@@ -47,7 +47,34 @@ cd "$PROJECT_ROOT"
 
 # Run Django test suite
 python manage.py test core.tests.test_vote.VoteApiViewTests
+python manage.py test core.tests.test_vote.VoteBatchApiViewTests
 python manage.py test core.tests.test_votingpaperresult.VotingPaperResultViewTests
 python manage.py test core.tests.test_authentication.AuthenticateApiViewTests
 python manage.py test core.tests.test_poll_office_stats.PollOfficeStatsViewTests
 python manage.py test core.tests.test_poll_office_results.PollOfficeResultsViewTests
+python manage.py test core.tests.test_query_plans.HotQueryPlanTests
+python manage.py test core.tests.test_vote_decision_algorithm.BulkVoteDecisionTests
+python manage.py test core.tests.test_vote.VoteNotifyTests
+python manage.py test core.tests.test_vote_decision_algorithm.PendingVotesTests
+python manage.py test core.tests.test_vote_decision_algorithm.DecideVotesWorkersTests
+python manage.py test core.tests.test_authentication.TokenCacheTests
+python manage.py test core.tests.test_s3.StsCredentialBrokerTests
+python manage.py test core.tests.test_poll_office_stats.PollOfficeCountersTests
+python manage.py test core.tests.test_area_rollups.AreaRollupsTests
+python manage.py test core.tests.test_poll_office_results.PollOfficeResultsCacheTests
+python manage.py test core.tests.test_poll_office_stats.StatsCacheTests
+python manage.py test core.tests.test_live.LiveFeedBrokerTests
+python manage.py test core.tests.test_live.LiveFeedPublishTests
+python manage.py test core.tests.test_conditional_get.ConditionalGetTests
+python manage.py test core.tests.test_poll_office_stats.LastAcceptedTests
+python manage.py test core.tests.test_poll_office_stats.PollOfficeStatsBulkTests
+python manage.py test core.tests.test_area_rollups.AreaTurnoutTests
+python manage.py test core.tests.test_vote_series.VoteSeriesTests
+python manage.py test core.tests.test_polloffice.PollOfficeListTests
+python manage.py test core.tests.test_polloffice.PollOfficeBundleTests
+python manage.py test core.tests.test_polloffice.PollOfficeSearchTests
+python manage.py test core.tests.test_bootstrap.BootstrapTests
+python manage.py test core.tests.test_bootstrap.StartupTests
+python manage.py test core.tests.test_bootstrap.ImportAuditTests
+python manage.py test core.tests.test_prefork.RecyclingApplicationTests
+python manage.py test core.tests.test_prefork.PreforkServerTests
@@ -40,6 +40,7 @@ cd "$SRC_PATH" || exit 1
 echo "Running migrations"
 python manage.py makemigrations
 python manage.py migrate
+python manage.py bootstrap
 
 # Start the server
 echo "Starting the server"
@@ -15,6 +15,7 @@ SKIP_DEPS=0
 SKIP_DB=0
 SKIP_UV=0
 SKIP_PROJECT=0
+SKIP_BOOTSTRAP=0
 SKIP_NGINX=0
 SKIP_SUPERVISOR=0
 SKIP_SERVICES=0
@@ -36,6 +37,7 @@ Options:
   --skip-db                  Skip database configuration
   --skip-uv                  Skip uv installation check
   --skip-project             Skip venv creation and uv sync
+  --skip-bootstrap           Skip migrate and bootstrap of the database
   --skip-nginx               Skip nginx configuration
   --skip-supervisor          Skip supervisor configuration
   --skip-services            Skip service restarts/reloads
@@ -67,6 +69,8 @@ parse_args() {
                 SKIP_UV=1; shift ;;
             --skip-project)
                 SKIP_PROJECT=1; shift ;;
+            --skip-bootstrap)
+                SKIP_BOOTSTRAP=1; shift ;;
             --skip-nginx)
                 SKIP_NGINX=1; shift ;;
             --skip-supervisor)
@@ -140,6 +144,12 @@ configure_project() {
     cd ufrecs && uv sync --active && cd ..
 }
 
+bootstrap_database() {
+    # Apply migrations and load the reference data (idempotent, run on every deployment)
+    source ufrecs/venv/bin/activate
+    (cd ufrecs/backends/default_django && python manage.py migrate --noinput && python manage.py bootstrap)
+}
+
 configure_nginx() {
     # Copy Nginx config if not present or force overwrite
     if [ ! -f /etc/nginx/conf.d/ufrecs.conf ] || [ "$FORCE_CONFIGS" -eq 1 ]; then
@@ -171,7 +181,7 @@ apply_service_changes() {
     sudo systemctl restart nginx
     sudo supervisorctl reread
     sudo supervisorctl update
-    sudo supervisorctl restart ufrecs-backend ufrecs-worker
+    sudo supervisorctl restart ufrecs ufrecs-live
 }
 
 fix_home_permissions() {
@@ -187,6 +197,7 @@ main() {
     [ "$SKIP_DB" -eq 1 ] || configure_database
     [ "$SKIP_UV" -eq 1 ] || ensure_uv
     [ "$SKIP_PROJECT" -eq 1 ] || configure_project
+    [ "$SKIP_BOOTSTRAP" -eq 1 ] || bootstrap_database
     [ "$SKIP_NGINX" -eq 1 ] || configure_nginx
     [ "$SKIP_SUPERVISOR" -eq 1 ] || configure_supervisor
     [ "$SKIP_SERVICES" -eq 1 ] || apply_service_changes
@@ -10,9 +10,90 @@ INSTALLED_APPS.remove("common_bases")
 INSTALLED_APPS.remove("crispy_bootstrap5")
 INSTALLED_APPS.append('corsheaders')
 INSTALLED_APPS.append('cacheops')
+INSTALLED_APPS.append('django.contrib.postgres')
 # UFRECS mode
 WORK_MODE = "test"
 
+# prod_serve.py: SERVE_WORKERS processes (0: one per CPU) forked from a
+# preloaded Django, each serving SERVE_THREADS threads on SERVE_BIND
+# (host:port). A worker is replaced after serving SERVE_MAX_REQUESTS
+# requests, plus up to SERVE_MAX_REQUESTS_JITTER so they do not all restart
+# together. 0 disables recycling
+SERVE_BIND = config("SERVE_BIND", default="127.0.0.1:8448")
+SERVE_WORKERS = config("SERVE_WORKERS", default=0, cast=int)
+SERVE_THREADS = config("SERVE_THREADS", default=4, cast=int)
+SERVE_MAX_REQUESTS = config("SERVE_MAX_REQUESTS", default=10000, cast=int)
+SERVE_MAX_REQUESTS_JITTER = config("SERVE_MAX_REQUESTS_JITTER", default=1000, cast=int)
+
+# Budget of a cold django.setup(), checked by the bench_startup command
+STARTUP_MAX_SECONDS = 3.0
+
+# Packages that must not be imported before the first request, checked by the
+# audit_imports command: only imported by the code paths that use them
+IMPORT_AUDIT_DEFERRED = (
+    "boto3",
+    "botocore",
+    "pdfplumber",
+    "faker",
+    "aiohttp",
+    "crispy_forms",
+    "traceback_with_variables",
+)
+
+# Max ballots accepted by a single /api/vote/batch/ request
+VOTE_BATCH_MAX_SIZE = 1000
+
+# Max poll offices of one /api/pollofficestats/bulk/ request
+STATS_BULK_MAX_OFFICES = 500
+
+# Accepted votes are counted in VoteBucket rows of these widths (seconds);
+# /api/turnout/series/ returns at most VOTE_SERIES_MAX_POINTS points
+VOTE_BUCKET_WIDTHS = (60, 900, 3600)
+VOTE_SERIES_MAX_POINTS = 500
+
+# /api/polloffices/search/ returns at most POLL_OFFICE_SEARCH_LIMIT offices
+POLL_OFFICE_SEARCH_LIMIT = 20
+
+# Bearer token cache (core.authentication.TokenCache): per-process LRU in
+# front of the cacheops Redis. Unknown tokens are cached for MISS_TTL.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_SHARED_TTL = 60 * 60
+TOKEN_CACHE_MISS_TTL = 30
+
+# Cached /api/pollofficeresults/ responses live RESULTS_CACHE_TTL seconds unless
+# a VotingPaperResult of the poll office gets accepted first. 0 disables
+RESULTS_CACHE_TTL = 60
+
+# /api/pollofficestats/ responses are fresh for STATS_CACHE_TTL seconds, then
+# served stale for up to STATS_CACHE_STALE_TTL seconds while a single worker,
+# holding a lock for at most LOCK_TTL seconds, recomputes them. 0 disables
+STATS_CACHE_TTL = 5
+STATS_CACHE_STALE_TTL = 60
+STATS_CACHE_LOCK_TTL = 10
+
+# /api/polloffices/bundle/ bodies are kept POLL_OFFICE_BUNDLE_TTL seconds per
+# version of the PollOffice rows; one worker builds a missing body while the
+# others wait up to POLL_OFFICE_BUNDLE_LOCK_TTL seconds
+POLL_OFFICE_BUNDLE_TTL = 60 * 60 * 24
+POLL_OFFICE_BUNDLE_LOCK_TTL = 30
+
+# Live feed (/api/live/, core.live): deciders publish accepted deltas on this
+# Redis channel; each SSE connection buffers at most QUEUE_SIZE events and
+# gets a keep-alive comment every HEARTBEAT seconds
+LIVE_FEED_CHANNEL = "ufrecs:live"
+LIVE_FEED_QUEUE_SIZE = 100
+LIVE_FEED_HEARTBEAT = 15
+
+# Ingestion NOTIFYs these channels so deciders started with --listen wake up
+# on new proposals instead of polling
+DECIDER_NOTIFY = config("DECIDER_NOTIFY", default=False, cast=bool)
+VOTE_PROPOSED_CHANNEL = "vote_proposed"
+VP_RESULT_PROPOSED_CHANNEL = "vp_result_proposed"
+# Listening deciders also decide every pending ballot each
+# DECIDE_SWEEP_SECONDS, catching the keys never notified or not decided
+DECIDE_SWEEP_SECONDS = 300
+
 # MIDDLEWARE.append("silk.middleware.SilkyMiddleware")
 
 # configure wasabi s3
@@ -28,6 +109,15 @@ AWS_S3_STS_ROLE_ARN = config("AWS_S3_STS_ROLE_ARN")
 AWS_QUERYSTRING_EXPIRE = 3600 * 24 * 90
 AWS_QUERYSTRING_AUTH = False
 
+# Scoped STS upload credentials (core.utils.StsCredentialBroker): issued for
+# DURATION, served until MARGIN seconds before expiry and renewed in the
+# background once less than REFRESH_AHEAD seconds remain. Each process keeps
+# those of at most CACHE_SIZE (poll office, elector) prefixes
+STS_CREDENTIALS_DURATION = 43200
+STS_CREDENTIALS_MARGIN = 15 * 60
+STS_CREDENTIALS_REFRESH_AHEAD = 60 * 60
+STS_CREDENTIALS_CACHE_SIZE = 10000
+
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
     "DEFAULT_AUTHENTICATION_CLASSES": (